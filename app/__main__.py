@@ -0,0 +1,126 @@
+"""
+Command line entry point: python -m app [serve|report|replay]
+"""
+import argparse
+import sys
+
+import yaml
+
+from .utils import codec
+from .utils.audit import AuditTrailManager, parse_filter_timestamp
+
+
+def export_report(args: argparse.Namespace) -> int:
+    """Render the audit trail (or a filtered part of it) as a markdown report"""
+    try:
+        with open(args.config, 'r') as f:
+            config = yaml.safe_load(f)
+    except (FileNotFoundError, yaml.YAMLError) as e:
+        print(f"[Reaper Report] FATAL: Could not load '{args.config}': {e}", file=sys.stderr)
+        return 1
+
+    filters = {
+        "event_type": args.type,
+        "status": args.status,
+        "mode": args.mode,
+        "event_id": args.event_id,
+        "target": args.target
+    }
+    for bound in ('since', 'until'):
+        value = getattr(args, bound)
+        if value is not None:
+            try:
+                filters[bound] = parse_filter_timestamp(value)
+            except ValueError:
+                print(f"[Reaper Report] FATAL: Invalid --{bound} timestamp: {value}", file=sys.stderr)
+                return 1
+
+    audit_manager = AuditTrailManager(config, read_only=True)
+    report = audit_manager.render_report(audit_manager.iter_entries(**filters))
+
+    output = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        for chunk in report:
+            output.write(chunk)
+    finally:
+        if args.output:
+            output.close()
+    return 0
+
+
+def replay_events(args: argparse.Namespace) -> int:
+    """Push an NDJSON event file (or stdin) through the agent in-process and print a report"""
+    from .replay import EventReplayer, format_report
+
+    try:
+        source = sys.stdin.buffer if args.file == '-' else open(args.file, 'rb')
+        output = open(args.output, 'wb') if args.output else None
+    except OSError as e:
+        print(f"[Reaper Replay] FATAL: {e}", file=sys.stderr)
+        return 1
+
+    replayer = EventReplayer(args.config, workers=args.workers, dry_run=args.dry_run,
+                             audit_file=args.audit_file, output=output)
+    try:
+        report = replayer.run(source)
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        if output is not None:
+            output.close()
+
+    print(codec.dumps(report) if args.json else format_report(report))
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser"""
+    parser = argparse.ArgumentParser(prog="python -m app", description="Reaper Agent")
+    subparsers = parser.add_subparsers(dest="command")
+
+    serve = subparsers.add_parser("serve", help="Run the API server with several worker processes")
+    serve.add_argument("--workers", "-w", type=int,
+                       help="Worker processes (default: server_workers setting, 0 = one per CPU core)")
+    serve.add_argument("--host", default="0.0.0.0", help="Address to listen on")
+    serve.add_argument("--port", "-p", type=int, default=5001, help="Port to listen on")
+
+    replay = subparsers.add_parser("replay", help="Process an NDJSON event file through the agent, without HTTP")
+    replay.add_argument("file", nargs="?", default="-", help="NDJSON file of events (default: stdin)")
+    replay.add_argument("--config", default="config.yaml", help="Configuration file")
+    replay.add_argument("--workers", "-j", type=int, default=1, help="Events processed in parallel")
+    replay.add_argument("--dry-run", action="store_true", help="Force dry run mode, whatever the configuration says")
+    replay.add_argument("--audit-file", help="Audit to this file instead of the configured one")
+    replay.add_argument("--output", "-o", help="Write each result to this file as NDJSON, in input order")
+    replay.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    report = subparsers.add_parser("report", help="Export the audit trail as a markdown report")
+    report.add_argument("--config", default="config.yaml", help="Configuration file")
+    report.add_argument("--type", help="Only events of this type")
+    report.add_argument("--status", help="Only results with this status")
+    report.add_argument("--mode", choices=["LIVE", "DRY_RUN"], help="Only entries logged in this mode")
+    report.add_argument("--event-id", help="Only this event ID")
+    report.add_argument("--target", help="Only this bucket or user")
+    report.add_argument("--since", help="ISO timestamp, inclusive")
+    report.add_argument("--until", help="ISO timestamp, exclusive")
+    report.add_argument("--output", "-o", help="Write to this file instead of stdout")
+    return parser
+
+
+def cli(argv=None) -> int:
+    """Dispatch a command line invocation"""
+    args = build_parser().parse_args(argv)
+    if args.command == "report":
+        return export_report(args)
+    if args.command == "replay":
+        return replay_events(args)
+    if args.command == "serve":
+        from .server import PreforkServer
+        return PreforkServer(args.host, args.port, args.workers).run()
+
+    from .main import main
+    main()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(cli())
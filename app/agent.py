@@ -1,78 +1,388 @@
 """
 Main agent class for processing security events
 """
+import asyncio
 import sys
-from typing import Dict, Any
+from functools import partial
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import yaml
 
 from .modules import SaaSAccessReaper, S3VisibilityReaper
 from .utils.audit import AuditTrailManager
+from .utils.coalesce import EventCoalescer
+from .utils.dedup import EventDeduplicator
+from .utils.locks import KeyedLockManager
+from .utils.shared_state import LocalState, SharedState
 
 
 class ReaperAgent:
     """Enhanced agent with audit trail and dry run capabilities."""
     
-    def __init__(self, modules_map: Dict[str, Any], config: Dict[str, Any]):
+    # Events per group of audit writes when processing a batch
+    BATCH_CHUNK_SIZE = 100
+    
+    def __init__(self, modules_map: Dict[str, Any], config: Dict[str, Any], state: Optional[Any] = None):
         self.modules_map = modules_map
         self.config = config
         self.settings = config.get('settings', {})
-        self.dry_run_mode = self.settings.get('dry_run_mode', False)
-        self.audit_manager = AuditTrailManager(config)
+        # Max events of a batch in flight at once on an event loop
+        self.async_concurrency = max(1, self.settings.get('async_concurrency', 200))
+        # Mutable state such as dry run mode; a SharedState when serving with several worker processes
+        self.state = state if state is not None else LocalState({"dry_run_mode": self.settings.get('dry_run_mode', False)})
+        # Worker processes of one server append to the same audit trail and remediate the same targets
+        shared = isinstance(self.state, SharedState)
+        self.audit_manager = AuditTrailManager(config, shared=shared)
+        
+        # Resent events (same event_id) are answered without running the module again
+        self.dedup = None
+        if self.settings.get('dedup_enabled', False):
+            self.dedup = EventDeduplicator(
+                ttl_seconds=self.settings.get('dedup_ttl_seconds', 3600),
+                cache_size=self.settings.get('dedup_cache_size', 100000),
+                filter_capacity=self.settings.get('dedup_filter_capacity', 1000000),
+                filter_error_rate=self.settings.get('dedup_filter_error_rate', 0.0001)
+            )
+        
+        # Bursts of events for the same (event type, target) share one remediation
+        self.coalescer = None
+        if self.settings.get('coalesce_window_ms', 0) > 0:
+            self.coalescer = EventCoalescer(window_ms=self.settings['coalesce_window_ms'])
+        
+        # Remediations of the same target are serialized, different targets run in parallel
+        self.target_locks = None
+        if self.settings.get('target_lock_stripes', 256) > 0:
+            self.target_locks = KeyedLockManager(
+                stripes=self.settings.get('target_lock_stripes', 256),
+                lock_file=f"{self.state.path}.targets.lock" if shared else None
+            )
         
         mode_text = "DRY RUN" if self.dry_run_mode else "LIVE"
         print(f"[Reaper] Modular API Agent initialized in {mode_text} mode.")
         print("[Reaper] Listening for events at http://127.0.0.1:5001/event")
 
+    @property
+    def dry_run_mode(self) -> bool:
+        return bool(self.state.get('dry_run_mode', False))
+    
+    @dry_run_mode.setter
+    def dry_run_mode(self, enabled: bool):
+        self.state.update(dry_run_mode=bool(enabled))
+    
     def process_event(self, event_data: Dict[str, Any]) -> Dict[str, Any]:
         """Process a security event through appropriate module"""
-        response_log = []
         event_type = event_data.get("type")
         
         if not event_type:
-            result = {"status": "error", "log": ["Event is missing 'type' field."]}
-            self.audit_manager.log_action(event_data, result, dry_run=self.dry_run_mode)
-            return result
+            return self._missing_type(event_data)
+        
+        key = self._coalesce_key(event_data)
+        if key is not None:
+            return self._process_group(event_type, [event_data], coalesce_key=key)[0]
+        return self._process_group(event_type, [event_data])[0]
+    
+    async def process_event_async(self, event_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Process a security event on the running event loop. Modules with a native
+        execute_async are awaited; others run execute() in a thread
+        """
+        event_type = event_data.get("type")
+        
+        if not event_type:
+            return self._missing_type(event_data)
+        return (await self._process_group_async(event_type, [event_data]))[0]
+    
+    def _missing_type(self, event_data: Dict[str, Any]) -> Dict[str, Any]:
+        result = {"status": "error", "log": ["Event is missing 'type' field."]}
+        self.audit_manager.log_action(event_data, result, dry_run=self.dry_run_mode)
+        return result
+    
+    def _coalesce_key(self, event_data: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        """(event type, target) key for events that may share one remediation, or None"""
+        if self.coalescer is None:
+            return None
+        event_type = event_data.get("type")
+        ModuleClass = self.modules_map.get(event_type)
+        target = ModuleClass.target(event_data) if ModuleClass else None
+        return (event_type, target) if target else None
+    
+    @staticmethod
+    def _duplicate_result(event_id: str, original: Dict[str, Any]) -> Dict[str, Any]:
+        audited_as = original.pop("audited_as", None) or event_id
+        return {
+            "status": "duplicate",
+            "log": [f"Event '{event_id}' was already received; remediation not repeated."],
+            "original": {**original, "audit_url": f"/audit/export?event_id={audited_as}"}
+        }
+    
+    def _check_duplicates(self, events: List[Dict[str, Any]]) -> Tuple[List[Optional[Dict[str, Any]]], List[int]]:
+        """Answer already seen events; returns the results so far and the indexes still to process"""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(events)
+        fresh = []
+        for index, event_data in enumerate(events):
+            event_id = event_data.get("event_id")
+            original = self.dedup.check(event_id) if self.dedup is not None and event_id else None
+            if original is not None:
+                results[index] = self._duplicate_result(event_id, original)
+            else:
+                fresh.append(index)
+        return results, fresh
+    
+    def _process_group(self, event_type: str, events: List[Dict[str, Any]],
+                       coalesce_key: Optional[Tuple[str, str]] = None) -> List[Dict[str, Any]]:
+        """
+        Process events of one type (and target) with a single module execution.
+        With a `coalesce_key`, events from other threads within the coalescing window
+        join in. Returns one result per event, in order
+        """
+        results, fresh = self._check_duplicates(events)
+        if not fresh:
+            return results
+        
+        group = [events[index] for index in fresh]
+        try:
+            if coalesce_key is not None:
+                result = self.coalescer.submit(coalesce_key, group[0], partial(self._dispatch, event_type))
+            else:
+                result = self._dispatch(event_type, group)
+        except Exception:
+            self._record_group(group, {"status": "error"})
+            raise
+        self._record_group(group, result)
+        for index in fresh:
+            results[index] = dict(result)
+        return results
+    
+    async def _process_group_async(self, event_type: str, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Async counterpart of _process_group, without the cross-thread coalescing window"""
+        results, fresh = self._check_duplicates(events)
+        if not fresh:
+            return results
+        
+        group = [events[index] for index in fresh]
+        try:
+            result = await self._dispatch_async(event_type, group)
+        except Exception:
+            self._record_group(group, {"status": "error"})
+            raise
+        self._record_group(group, result)
+        for index in fresh:
+            results[index] = dict(result)
+        return results
+    
+    def _record_group(self, events: List[Dict[str, Any]], result: Dict[str, Any]):
+        """Remember the result of processed events for deduplication"""
+        if self.dedup is None:
+            return
+        audited_as = result.get("coalesced_event_ids", [None])[0]
+        for event_data in events:
+            if event_data.get("event_id"):
+                self.dedup.record(event_data["event_id"], result, audited_as=audited_as)
+    
+    def _dispatch(self, event_type: str, events: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Run events through their module once and audit the result. Coalesced events
+        are remediated with the first event's data and audited in one entry listing all ids
+        """
+        ModuleClass = self.modules_map.get(event_type)
+        if ModuleClass is None:
+            return self._ignored(event_type, events[0])
         
+        # The same target is never remediated by two threads at once
+        target = ModuleClass.target(events[0])
+        if self.target_locks is not None and target:
+            with self.target_locks.hold(target):
+                return self._run_module(ModuleClass, events)
+        return self._run_module(ModuleClass, events)
+    
+    async def _dispatch_async(self, event_type: str, events: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Async counterpart of _dispatch; the same target is never remediated by two tasks at once"""
         ModuleClass = self.modules_map.get(event_type)
-        if not ModuleClass:
-            result = {"status": "ignored", "log": [f"No response module found for event type '{event_type}'."]}
-            self.audit_manager.log_action(event_data, result, dry_run=self.dry_run_mode)
-            return result
+        if ModuleClass is None:
+            return self._ignored(event_type, events[0])
+        
+        target = ModuleClass.target(events[0])
+        if self.target_locks is not None and target:
+            async with self.target_locks.hold_async(target):
+                return await self._run_module_async(ModuleClass, events)
+        return await self._run_module_async(ModuleClass, events)
+    
+    def _ignored(self, event_type: str, event_data: Dict[str, Any]) -> Dict[str, Any]:
+        result = {"status": "ignored", "log": [f"No response module found for event type '{event_type}'."]}
+        self.audit_manager.log_action(event_data, result, dry_run=self.dry_run_mode)
+        return result
+    
+    def _run_module(self, ModuleClass: Any, events: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Validate, execute and report with a module instance, and audit the result"""
+        module_instance, response_log, is_valid = self._start_module(ModuleClass, events)
+        if is_valid:
+            response_log.append(module_instance.execute())
+        return self._finish_module(module_instance, events, response_log, is_valid)
+    
+    async def _run_module_async(self, ModuleClass: Any, events: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Like _run_module, awaiting the module's execute_async"""
+        module_instance, response_log, is_valid = self._start_module(ModuleClass, events)
+        if is_valid:
+            response_log.append(await module_instance.execute_async())
+        return self._finish_module(module_instance, events, response_log, is_valid)
+    
+    def _start_module(self, ModuleClass: Any, events: List[Dict[str, Any]]) -> Tuple[Any, List[str], bool]:
+        """Create and validate the module instance for the first event"""
+        event_data = events[0]
+        response_log = []
         
         # Create module instance with dry run mode
         module_instance = ModuleClass(event_data, self.dry_run_mode)
         response_log.append(module_instance.log_prefix)
         
+        if len(events) > 1:
+            event_ids = [event.get("event_id") for event in events]
+            response_log.append(f"[Coalesce] {len(events)} events for target "
+                                f"'{ModuleClass.target(event_data)}' handled by one remediation: "
+                                f"{', '.join(str(event_id) for event_id in event_ids)}")
+        
         # Validate
         validation_result = module_instance.validate()
         response_log.append(validation_result)
-        
-        if "SUCCESS" in validation_result:
-            # Execute
-            response_log.append(module_instance.execute())
+        return module_instance, response_log, "SUCCESS" in validation_result
+    
+    def _finish_module(self, module_instance: Any, events: List[Dict[str, Any]],
+                       response_log: List[str], is_valid: bool) -> Dict[str, Any]:
+        """Report the executed module's result and log it to the audit trail"""
+        if is_valid:
             response_log.append(module_instance.report())
             result = {"status": "processed", "log": response_log}
-            
-            # Log to audit trail with API responses
-            self.audit_manager.log_action(
-                event_data, 
-                result, 
-                module_instance.get_api_responses(),
-                self.dry_run_mode
-            )
-            return result
+            api_responses = module_instance.get_api_responses()
         else:
             result = {"status": "validation_failed", "log": response_log}
-            self.audit_manager.log_action(event_data, result, dry_run=self.dry_run_mode)
-            return result
+            api_responses = None
+        
+        if len(events) > 1:
+            result["coalesced_event_ids"] = [event.get("event_id") for event in events]
+        
+        # Log to audit trail with API responses, in the mode the module actually ran in
+        self.audit_manager.log_action(events[0], result, api_responses, module_instance.dry_run_mode)
+        return result
+    
+    def _error_result(self, event_data: Any, error: Exception) -> Dict[str, Any]:
+        """Audited error result for an event whose processing raised"""
+        result = {"status": "error", "log": [f"Unhandled error while processing event: {error}"]}
+        self.audit_manager.log_action(event_data, result, dry_run=self.dry_run_mode)
+        return result
+    
+    def process_event_safely(self, event_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Process an event, turning an unexpected module error into an audited error result"""
+        try:
+            return self.process_event(event_data)
+        except Exception as e:
+            return self._error_result(event_data, e)
+    
+    def _plan_chunk(self, chunk: List[Any], validate: Optional[Callable[[Any], Tuple[bool, str]]]
+                    ) -> Tuple[List[Optional[Dict[str, Any]]], Dict[Tuple[str, str], List[int]], List[int]]:
+        """
+        Split a chunk into validation failures (as results), groups of events sharing
+        an (event type, target) when coalescing is enabled, and events processed alone
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(chunk)
+        groups: Dict[Tuple[str, str], List[int]] = {}
+        singles = []
+        for index, event_data in enumerate(chunk):
+            if validate is not None:
+                is_valid, message = validate(event_data)
+                if not is_valid:
+                    results[index] = {"status": "validation_error", "log": [message]}
+                    continue
+            key = self._coalesce_key(event_data) if isinstance(event_data, dict) else None
+            if key is not None:
+                groups.setdefault(key, []).append(index)
+            else:
+                singles.append(index)
+        return results, groups, singles
+    
+    def process_events(self, events: Iterable[Any],
+                       validate: Optional[Callable[[Any], Tuple[bool, str]]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Process a batch of events in order, yielding one result per event.
+        Events failing `validate` get a validation_error result and are not processed;
+        a failing event never stops the rest. Audit entries are written per chunk, and
+        events of a chunk sharing an (event type, target) are remediated together.
+        """
+        events = iter(events)
+        while True:
+            chunk = list(islice(events, self.BATCH_CHUNK_SIZE))
+            if not chunk:
+                return
+            
+            results, groups, singles = self._plan_chunk(chunk, validate)
+            with self.audit_manager.batch():
+                for index in singles:
+                    results[index] = self.process_event_safely(chunk[index])
+                
+                for key, indexes in groups.items():
+                    group = [chunk[index] for index in indexes]
+                    try:
+                        group_results = self._process_group(key[0], group)
+                    except Exception as e:
+                        group_results = [self._error_result(event_data, e) for event_data in group]
+                    for index, result in zip(indexes, group_results):
+                        results[index] = result
+            yield from results
+    
+    async def process_events_async(self, events: Iterable[Any],
+                                   validate: Optional[Callable[[Any], Tuple[bool, str]]] = None,
+                                   concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Process a batch of events concurrently on the running event loop and return
+        one result per event, in order. Up to `concurrency` events (async_concurrency
+        setting by default) are in flight at once; otherwise behaves like process_events
+        """
+        concurrency = max(1, concurrency or self.async_concurrency)
+        all_results = []
+        events = iter(events)
+        while True:
+            chunk = list(islice(events, concurrency))
+            if not chunk:
+                return all_results
+            all_results.extend(await self._process_chunk_async(chunk, validate))
+    
+    async def _process_chunk_async(self, chunk: List[Any],
+                                   validate: Optional[Callable[[Any], Tuple[bool, str]]]) -> List[Dict[str, Any]]:
+        """Run the events of one chunk at once: single events and coalesced groups side by side"""
+        results, groups, singles = self._plan_chunk(chunk, validate)
+        with self.audit_manager.batch():
+            single_results, group_results = await asyncio.gather(
+                asyncio.gather(*(self._run_single_async(chunk[index]) for index in singles)),
+                asyncio.gather(*(self._run_group_async(key[0], [chunk[index] for index in indexes])
+                                 for key, indexes in groups.items()))
+            )
+        for index, result in zip(singles, single_results):
+            results[index] = result
+        for indexes, group_result in zip(groups.values(), group_results):
+            for index, result in zip(indexes, group_result):
+                results[index] = result
+        return results
+    
+    async def _run_single_async(self, event_data: Any) -> Dict[str, Any]:
+        """process_event_async, turning an exception into an audited error result"""
+        try:
+            return await self.process_event_async(event_data)
+        except Exception as e:
+            return self._error_result(event_data, e)
+    
+    async def _run_group_async(self, event_type: str, group: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """_process_group_async, turning an exception into an audited error result per event"""
+        try:
+            return await self._process_group_async(event_type, group)
+        except Exception as e:
+            return [self._error_result(event_data, e) for event_data in group]
     
     def toggle_dry_run_mode(self) -> bool:
-        """Toggle dry run mode on/off"""
-        self.dry_run_mode = not self.dry_run_mode
-        mode_text = "DRY RUN" if self.dry_run_mode else "LIVE"
+        """Toggle dry run mode on/off, for every worker process sharing the state"""
+        dry_run_mode = self.state.toggle('dry_run_mode')
+        mode_text = "DRY RUN" if dry_run_mode else "LIVE"
         print(f"[Reaper] Mode switched to {mode_text}")
-        return self.dry_run_mode
+        return dry_run_mode
 
 
 def load_module_map_from_config(config_path: str = 'config.yaml') -> tuple[Dict[str, Any], Dict[str, Any]]:
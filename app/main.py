@@ -1,147 +1,657 @@
 """
 Flask application and API endpoints
 """
-import json
-import logging
+import asyncio
+import atexit
 import os
-from datetime import datetime
-from logging.handlers import RotatingFileHandler
+import socket
+import zlib
+from functools import partial
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
 
-from flask import Flask, jsonify, request
+from flask import Blueprint, Flask, Response, current_app, jsonify, request, stream_with_context
+from flask.json.provider import JSONProvider
 
 from .agent import ReaperAgent, load_module_map_from_config
+from .sources import UnixSocketSource
+from .utils import codec
+from .utils.action_log import ActionLog, get_action_log
+from .utils.audit import parse_filter_timestamp
+from .utils.event_queue import DurableEventQueue
+from .utils.admission import AdmissionController, AdmissionRejected
+from .utils.jobs import JobManager, JobQueueFull
 from .utils.schema import APISchemaValidator
 from .utils.dashboard import DashboardGenerator
 
 
-def setup_logging(log_file: str = 'logs/reaper_actions.log') -> logging.Logger:
+def setup_logging(log_file: str = 'logs/reaper_actions.log', **options) -> ActionLog:
     """
-    Configure logging to a rotating file for persistent audit trail.
+    Configure the action log: one JSON line per event result in a rotating file,
+    written from a background listener. Calling it again for the same file reuses
+    the existing log instead of adding handlers
     """
-    # Ensure logs directory exists
-    log_dir = os.path.dirname(log_file)
-    if log_dir and not os.path.exists(log_dir):
-        os.makedirs(log_dir)
-    
     print(f"[Reaper Logging] Actions will be logged to '{log_file}'")
-    logger = logging.getLogger('ReaperAgentLogger')
-    logger.setLevel(logging.INFO)
+    return get_action_log(log_file, **options)
 
-    # Use rotating file handler to prevent log file from growing indefinitely
-    handler = RotatingFileHandler(log_file, maxBytes=1024*1024*5, backupCount=5)
-    
-    # Define log entry format
-    formatter = logging.Formatter('%(asctime)s - %(message)s')
-    handler.setFormatter(formatter)
 
-    # Add handler to logger
-    logger.addHandler(handler)
-    return logger
+class CodecJSONProvider(JSONProvider):
+    """Flask JSON provider backed by the selected codec, for request bodies and jsonify"""
 
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return codec.dumps(obj)
 
-def create_app() -> Flask:
-    """Create and configure Flask application"""
-    app = Flask(__name__)
-    
-    # Initialize logging and agent on startup
-    logger = setup_logging()
-    remediation_modules, config = load_module_map_from_config()
-    agent = ReaperAgent(remediation_modules, config)
-    
-    @app.route('/', methods=['GET'])
-    def health_check():
-        """Health check endpoint with system status"""
-        mode = "DRY_RUN" if agent.dry_run_mode else "LIVE"
-        return jsonify({
-            "status": "healthy", 
-            "service": "reaper-agent", 
-            "version": "1.0.0",
-            "mode": mode,
-            "audit_format": agent.settings.get('audit_format', 'markdown'),
-            "modules": list(agent.modules_map.keys())
-        }), 200
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        return codec.loads(s)
 
-    @app.route('/config', methods=['GET'])
-    def get_config():
-        """Get current configuration and status"""
-        return jsonify({
-            "dry_run_mode": agent.dry_run_mode,
-            "audit_format": agent.settings.get('audit_format', 'markdown'),
-            "audit_file": agent.settings.get('audit_file', 'logs/audit_trail.md'),
-            "modules": list(agent.modules_map.keys())
-        }), 200
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(codec.dumpb(obj) + b"\n", mimetype="application/json")
 
-    @app.route('/toggle-dry-run', methods=['POST'])
-    def toggle_dry_run():
-        """Toggle dry run mode"""
-        new_mode = agent.toggle_dry_run_mode()
-        return jsonify({
-            "dry_run_mode": new_mode,
-            "message": f"Dry run mode {'enabled' if new_mode else 'disabled'}"
-        }), 200
 
-    @app.route('/audit', methods=['GET'])
-    def get_audit_trail():
-        """Get recent audit trail entries"""
+def gzip_stream(chunks: Iterable[str]) -> Iterator[bytes]:
+    """Gzip-encode a stream of text chunks, flushing after each so clients see progress"""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8')) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def parse_ndjson(stream: Iterable[bytes]) -> Iterator[Any]:
+    """Parse NDJSON lines lazily; a malformed line yields a ValueError in its place"""
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
         try:
-            if agent.settings.get('audit_format') == 'json':
-                entries = agent.audit_manager.get_recent_entries(10)
-                return jsonify({"entries": entries}), 200
-            else:
-                # For markdown, return file info
-                file_info = agent.audit_manager.get_file_info()
-                if file_info['exists']:
-                    return jsonify({
-                        **file_info,
-                        "message": "Use file system to access markdown audit trail"
-                    }), 200
-                else:
-                    return jsonify({"message": "Audit file not found"}), 404
-        except Exception as e:
-            return jsonify({"error": str(e)}), 500
-
-    @app.route('/dashboard', methods=['GET'])
-    def dashboard():
-        """Visual dashboard for monitoring agent status"""
+            yield codec.loads(line)
+        except ValueError as e:
+            yield ValueError(f"Invalid JSON on line {line_number}: {e}")
+
+
+def validate_batch_event(event: Any) -> Tuple[bool, str]:
+    """Validate one event of a batch. Returns (is_valid, error_message)"""
+    if isinstance(event, ValueError):
+        return False, str(event)
+    if not isinstance(event, dict):
+        return False, "Event must be a JSON object."
+    return APISchemaValidator.validate_event(event)
+
+
+def replay_pending_events(remediation_modules: dict, config: dict) -> int:
+    """
+    Process events left in the durable queue by a previous run, without serving.
+    The prefork server calls this once before starting its workers. Returns the count
+    """
+    settings = config.get('settings', {})
+    if not settings.get('event_queue_enabled', False):
+        return 0
+    
+    agent = None
+    event_queue = DurableEventQueue(settings.get('event_queue_file', 'logs/event_queue.db'))
+    try:
+        pending = event_queue.pending()
+        if pending:
+            print(f"[Reaper Queue] Replaying {len(pending)} events accepted before the last shutdown")
+            agent = ReaperAgent(remediation_modules, config)
+            event_queue.before_complete = agent.audit_manager.flush
+        for queue_id, event_data in pending:
+            agent.process_event_safely(event_data)
+            event_queue.complete([queue_id])
+    finally:
+        event_queue.close()
+        if agent is not None:
+            agent.audit_manager.close()
+    return len(pending)
+
+
+class EventService:
+    """
+    Accepts, persists and processes events for the HTTP endpoints and the event
+    sources, so they behave identically: the agent with its durable event queue,
+    admission control, async job pool and action log, configured from the agent's settings
+    """
+    
+    def __init__(self, agent: ReaperAgent, action_log: ActionLog):
+        self.agent = agent
+        self.action_log = action_log
+        self.event_queue = self._start_event_queue()
+        self.admission = self._build_admission()
+        self.jobs = self._start_jobs()
+        self.sources = []
+    
+    def _start_event_queue(self) -> Optional[DurableEventQueue]:
+        """Accepted events are persisted until processed, and replayed after a restart"""
+        settings = self.agent.settings
+        if not settings.get('event_queue_enabled', False):
+            return None
+        event_queue = DurableEventQueue(
+            settings.get('event_queue_file', 'logs/event_queue.db'),
+            commit_delay_ms=settings.get('event_queue_commit_delay_ms', 2),
+            before_complete=self.agent.audit_manager.flush,
+            watermark=self.agent.audit_manager.audit_watermark
+        )
+        atexit.register(event_queue.close)
+        return event_queue
+    
+    def _build_admission(self) -> Optional[AdmissionController]:
+        """/event admits a bounded number of pending events and answers 429 beyond that"""
+        settings = self.agent.settings
+        if settings.get('admission_max_pending', 0) <= 0:
+            return None
+        return AdmissionController(
+            max_pending=settings['admission_max_pending'],
+            shed_severities=settings.get('admission_shed_severities', ['low']),
+            shed_threshold=settings.get('admission_shed_threshold', 0.8),
+            max_retry_after=settings.get('admission_max_retry_after', 60)
+        )
+    
+    def _start_jobs(self) -> Optional[JobManager]:
+        """In async mode /event only validates and enqueues; a worker pool processes events"""
+        settings = self.agent.settings
+        if not settings.get('async_events', False):
+            return None
+        jobs = JobManager(
+            self.run_event,
+            workers=settings.get('job_workers', 4),
+            queue_size=settings.get('job_queue_size', 1000),
+            retain=settings.get('job_retention', 10000),
+            aging_seconds=settings.get('job_priority_aging_seconds', 30)
+        )
+        jobs.start()
+        atexit.register(jobs.close)
+        return jobs
+    
+    def start_sources(self, event_socket: Optional[socket.socket] = None):
+        """Co-located detectors can send events over a Unix domain socket instead of HTTP"""
+        settings = self.agent.settings
+        socket_path = settings.get('event_socket_path')
+        if not socket_path and event_socket is None:
+            return
+        source = UnixSocketSource(
+            socket_path,
+            self.accept_event,
+            framing=settings.get('event_socket_framing', 'ndjson'),
+            workers=settings.get('event_socket_workers', 8),
+            pipeline_depth=settings.get('event_socket_pipeline_depth', 64),
+            max_frame_bytes=settings.get('event_socket_max_frame_bytes', 1024 * 1024),
+            sock=event_socket
+        )
+        source.start()
+        atexit.register(source.stop)
+        self.sources.append(source)
+    
+    def replay_pending(self, owner: Optional[int] = None):
+        """
+        Process (or enqueue) the events left in the durable queue by a previous run,
+        or only those of the exited worker process `owner`. These are claimed first,
+        so they are replayed again should this process exit too
+        """
+        if self.event_queue is None:
+            return
+        if owner is None:
+            pending = self.event_queue.pending()
+            if pending:
+                print(f"[Reaper Queue] Replaying {len(pending)} events accepted before the last shutdown")
+        else:
+            self.event_queue.claim(owner)
+            pending = self.event_queue.pending(owner=os.getpid())
+            if pending:
+                print(f"[Reaper Queue] Replaying {len(pending)} events accepted by exited worker {owner}")
+        for queue_id, event_data in pending:
+            if self.jobs is None or self.submit_event(event_data, queue_id) is None:
+                self.run_event(event_data, queue_id)
+    
+    def run_event(self, event_data, queue_id=None, admitted=False):
+        """Process an event, log its result and mark it complete in the durable queue"""
         try:
-            return DashboardGenerator.render_dashboard(agent, agent.audit_manager)
-        except Exception as e:
-            return f"<h1>Dashboard Error</h1><p>{str(e)}</p>", 500
-
-    @app.route('/openapi.json', methods=['GET'])
-    def get_openapi_spec():
-        """Get OpenAPI specification"""
-        return jsonify(APISchemaValidator.get_openapi_spec()), 200
-
-    @app.route('/event', methods=['POST'])
-    def handle_event():
-        """Process security event"""
-        if not request.is_json:
-            return jsonify({
-                "status": "error", 
-                "log": ["Invalid request: Content-Type must be application/json."]
-            }), 400
-        
-        event_data = request.get_json()
-        
+            result = self.agent.process_event_safely(event_data)
+        finally:
+            if admitted:
+                self.admission.release()
+        if queue_id is not None:
+            self.event_queue.complete([queue_id])
+        self.action_log.log(result)
+        return result
+    
+    def submit_event(self, event_data, queue_id=None, admitted=False):
+        """Hand an event to the job pool; returns the job, or None if the pool is full"""
+        try:
+            return self.jobs.submit(event_data, handler=partial(self.run_event, queue_id=queue_id, admitted=admitted))
+        except JobQueueFull:
+            return None
+    
+    def run_batch(self, events):
+        """
+        Validate and process batch events chunk by chunk, persisting each chunk's
+        valid events in one durable commit first. Yields one result per event
+        """
+        async_dispatch = self.agent.settings.get('async_dispatch', False)
+        # An async chunk is one event loop run with every event in flight at once
+        chunk_size = self.agent.async_concurrency if async_dispatch else self.agent.BATCH_CHUNK_SIZE
+        events = iter(events)
+        while True:
+            chunk = list(islice(events, chunk_size))
+            if not chunk:
+                return
+            checks = [validate_batch_event(event) for event in chunk]
+            valid = [event for event, (is_valid, _) in zip(chunk, checks) if is_valid]
+            queue_ids = self.event_queue.enqueue_many(valid) if self.event_queue is not None else []
+            if async_dispatch:
+                processed = iter(asyncio.run(self.agent.process_events_async(valid)))
+            else:
+                processed = iter(list(self.agent.process_events(valid)))
+            if queue_ids:
+                self.event_queue.complete(queue_ids)
+            for is_valid, message in checks:
+                yield next(processed) if is_valid else {"status": "validation_error", "log": [message]}
+    
+    def accept_event(self, event_data: Any) -> Tuple[Union[dict, codec.EncodedResult], int, Dict[str, str]]:
+        """
+        Validate, admit, persist and process (or enqueue) one event. Shared by /event
+        and the event sources so they behave identically. Returns the response body,
+        status code and headers
+        """
         # Validate event data against schema
         is_valid, validation_message = APISchemaValidator.validate_event(event_data)
         if not is_valid:
-            return jsonify({
+            return {
                 "status": "validation_error",
                 "log": [f"Schema validation failed: {validation_message}"]
-            }), 400
+            }, 400, {}
+        
+        rejected = self._admit(event_data)
+        if rejected is not None:
+            return rejected
+        admitted = self.admission is not None
         
-        result = agent.process_event(event_data)
+        # Persist the event before acknowledging it
+        try:
+            queue_id = self.event_queue.enqueue(event_data) if self.event_queue is not None else None
+        except Exception:
+            if admitted:
+                self.admission.release()
+            raise
         
-        # Log to console for real-time monitoring
-        print(json.dumps(result, indent=2))
+        if self.jobs is not None:
+            return self._accept_async(event_data, queue_id, admitted)
         
-        # Log to file for persistent audit trail
-        logger.info(json.dumps(result))
+        try:
+            result = self.agent.process_event(event_data)
+        finally:
+            if admitted:
+                self.admission.release()
+        # Only once processed and audited; an event whose processing raised is replayed after a restart
+        if queue_id is not None:
+            self.event_queue.complete([queue_id])
         
-        return jsonify(result), 200
+        # Serialized once for both the log (written by a background listener) and the response
+        encoded = codec.EncodedResult(result)
+        self.action_log.log(encoded)
+        return encoded, 200, {}
+    
+    def _admit(self, event_data: Dict[str, Any]) -> Optional[Tuple[dict, int, Dict[str, str]]]:
+        """Admit an event under admission control; returns the 429 response if it is rejected"""
+        if self.admission is None:
+            return None
+        try:
+            self.admission.admit(event_data.get('severity'))
+        except AdmissionRejected as e:
+            return {"status": "shed" if e.shed else "rejected", "log": [str(e)], "retry_after": e.retry_after}, \
+                429, {"Retry-After": str(e.retry_after)}
+        return None
+    
+    def _accept_async(self, event_data: Dict[str, Any], queue_id: Optional[int],
+                      admitted: bool) -> Tuple[dict, int, Dict[str, str]]:
+        """Answer 202 with the job for an event handed to the job pool, or 503 if the pool is full"""
+        job = self.submit_event(event_data, queue_id, admitted)
+        if job is None:
+            if queue_id is not None:
+                self.event_queue.complete([queue_id])
+            if admitted:
+                self.admission.release()
+            return {"status": "error", "log": ["Job queue is full, retry later."]}, 503, {}
+        return {**job, "status_url": f"/jobs/{job['job_id']}"}, 202, {"Location": f"/jobs/{job['job_id']}"}
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get audit entry counts and the dedup, coalescing, lock, action log and event source counters"""
+        agent = self.agent
+        stats = agent.audit_manager.get_stats()
+        if agent.dedup is not None:
+            stats["dedup"] = agent.dedup.stats()
+        if agent.coalescer is not None:
+            stats["coalesce"] = agent.coalescer.stats()
+        if agent.target_locks is not None:
+            stats["locks"] = agent.target_locks.stats()
+        stats["action_log"] = self.action_log.stats()
+        if self.sources:
+            stats["sources"] = [source.stats() for source in self.sources]
+        return stats
+
+
+api = Blueprint('api', __name__)
+
+
+def current_service() -> EventService:
+    """Get the event service of the app handling the current request"""
+    return current_app.extensions['reaper_events']
+
+
+@api.route('/', methods=['GET'])
+def health_check():
+    """Health check endpoint with system status"""
+    service = current_service()
+    mode = "DRY_RUN" if service.agent.dry_run_mode else "LIVE"
+    return jsonify({
+        "status": "healthy", 
+        "service": "reaper-agent", 
+        "version": "1.0.0",
+        "mode": mode,
+        "audit_format": service.agent.settings.get('audit_format', 'markdown'),
+        "modules": list(service.agent.modules_map.keys()),
+        "event_processing": "async" if service.jobs is not None else "sync",
+        "worker_pid": os.getpid(),
+        "workers": len(service.agent.state.get('workers') or [os.getpid()]),
+        "admission": service.admission.stats() if service.admission is not None else {"state": "accepting", "enabled": False}
+    }), 200
+
+
+@api.route('/config', methods=['GET'])
+def get_config():
+    """Get current configuration and status"""
+    agent = current_service().agent
+    return jsonify({
+        "dry_run_mode": agent.dry_run_mode,
+        "audit_format": agent.settings.get('audit_format', 'markdown'),
+        "audit_file": agent.settings.get('audit_file', 'logs/audit_trail.md'),
+        "modules": list(agent.modules_map.keys())
+    }), 200
+
+
+@api.route('/toggle-dry-run', methods=['POST'])
+def toggle_dry_run():
+    """Toggle dry run mode"""
+    agent = current_service().agent
+    new_mode = agent.toggle_dry_run_mode()
+    return jsonify({
+        "dry_run_mode": new_mode,
+        "message": f"Dry run mode {'enabled' if new_mode else 'disabled'}"
+    }), 200
+
+
+@api.route('/audit', methods=['GET'])
+def get_audit_trail():
+    """Get recent audit trail entries"""
+    agent = current_service().agent
+    try:
+        if agent.settings.get('audit_format') == 'sqlite':
+            return query_audit_store()
+        if agent.settings.get('audit_format') == 'json':
+            entries = agent.audit_manager.get_recent_entries(10)
+            return jsonify({"entries": entries}), 200
+
+        limit = min(request.args.get('limit', 10, type=int), 1000)
+        page = request.args.get('page', type=int)
+        cursor = request.args.get('cursor', type=int)
+        if page is None and cursor is None and agent.audit_manager.is_buffered(limit):
+            # Served from the in-memory ring buffer without touching the file
+            return jsonify({
+                "format": agent.audit_manager.audit_format,
+                "file": agent.audit_manager.audit_file,
+                "entries": agent.audit_manager.get_recent_entries(limit)
+            }), 200
+
+        # JSON Lines and markdown files are read through the offset index
+        file_info = agent.audit_manager.get_file_info()
+        if not file_info['exists']:
+            return jsonify({"message": "Audit file not found"}), 404
+
+        if page is not None:
+            return jsonify(agent.audit_manager.get_entries_page(page, limit)), 200
+        if cursor is not None:
+            return jsonify(agent.audit_manager.get_entries_since(cursor, limit)), 200
+        return jsonify({
+            **file_info,
+            "entries": agent.audit_manager.get_recent_entries(limit)
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+def parse_audit_filters():
+    """
+    Read type, status, mode, event_id, target and since/until filters from the query string.
+    Returns (filters, error_message)
+    """
+    filters = {
+        "event_type": request.args.get('type'),
+        "status": request.args.get('status'),
+        "mode": request.args.get('mode'),
+        "event_id": request.args.get('event_id'),
+        "target": request.args.get('target')
+    }
+    for bound in ('since', 'until'):
+        value = request.args.get(bound)
+        if value is None:
+            continue
+        try:
+            # Entries are stamped with naive local ISO timestamps
+            filters[bound] = parse_filter_timestamp(value)
+        except ValueError:
+            return None, f"Invalid '{bound}' timestamp: {value}"
+    return filters, None
+
+
+def query_audit_store():
+    """Filter audit entries by type, status, mode, event_id, target and time range"""
+    agent = current_service().agent
+    filters, error = parse_audit_filters()
+    if error:
+        return jsonify({"error": error}), 400
+
+    page = agent.audit_manager.query_entries(
+        **filters,
+        limit=request.args.get('limit', 50, type=int),
+        cursor=request.args.get('cursor', type=int)
+    )
+    return jsonify(page), 200
+
+
+@api.route('/audit/report.md', methods=['GET'])
+def get_audit_report():
+    """Render a markdown audit report for any filter or time range"""
+    agent = current_service().agent
+    filters, error = parse_audit_filters()
+    if error:
+        return jsonify({"error": error}), 400
+
+    entries = agent.audit_manager.iter_entries(**filters)
+    report = agent.audit_manager.render_report(entries)
+    return Response(stream_with_context(report), mimetype='text/markdown'), 200
+
+
+@api.route('/audit/export', methods=['GET'])
+def export_audit_trail():
+    """
+    Stream the audit trail as chunked NDJSON, oldest first, with the same filters
+    as /audit. Every line carries a cursor; pass the last one back to resume.
+    """
+    agent = current_service().agent
+    filters, error = parse_audit_filters()
+    if error:
+        return jsonify({"error": error}), 400
+    cursor = request.args.get('cursor')
+    if cursor is not None:
+        try:
+            cursor = int(cursor)
+        except ValueError:
+            return jsonify({"error": f"Invalid 'cursor': {cursor}"}), 400
+
+    entries = agent.audit_manager.iter_entries_after(cursor, **filters)
+    body = agent.audit_manager.render_ndjson(entries)
+    headers = {"Content-Disposition": "attachment; filename=audit_export.ndjson"}
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        body = gzip_stream(body)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    return Response(stream_with_context(body), mimetype='application/x-ndjson', headers=headers), 200
+
+
+@api.route('/stats', methods=['GET'])
+def get_stats():
+    """
+    Get audit entry counts by event type, status, mode and severity, and dedup,
+    coalescing, lock, action log and event source counters
+    """
+    service = current_service()
+    return jsonify(service.stats()), 200
+
+
+@api.route('/audit/writer', methods=['GET'])
+def get_audit_writer_stats():
+    """Get background audit writer queue depth and batching statistics"""
+    agent = current_service().agent
+    return jsonify(agent.audit_manager.get_writer_stats()), 200
+
+
+@api.route('/dashboard', methods=['GET'])
+def dashboard():
+    """Visual dashboard for monitoring agent status"""
+    agent = current_service().agent
+    try:
+        return DashboardGenerator.render_dashboard(agent, agent.audit_manager)
+    except Exception as e:
+        return f"<h1>Dashboard Error</h1><p>{str(e)}</p>", 500
+
+
+@api.route('/openapi.json', methods=['GET'])
+def get_openapi_spec():
+    """Get OpenAPI specification"""
+    return jsonify(APISchemaValidator.get_openapi_spec()), 200
+
+
+@api.route('/event', methods=['POST'])
+def handle_event():
+    """Process security event"""
+    service = current_service()
+    if not request.is_json:
+        return jsonify({
+            "status": "error", 
+            "log": ["Invalid request: Content-Type must be application/json."]
+        }), 400
+
+    body, status_code, headers = service.accept_event(request.get_json())
+    if isinstance(body, codec.EncodedResult):
+        return Response(body.data + b"\n", mimetype='application/json', headers=headers), status_code
+    return jsonify(body), status_code, headers
+
+
+@api.route('/jobs', methods=['GET'])
+def get_job_stats():
+    """Get job queue depth, in-flight count and latency statistics"""
+    service = current_service()
+    if service.jobs is None:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **service.jobs.stats()}), 200
+
+
+@api.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get the status and result of an async event job"""
+    service = current_service()
+    if service.jobs is None:
+        return jsonify({"error": "Async event processing is disabled"}), 404
+    job = service.jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Job '{job_id}' not found"}), 404
+    return jsonify(job), 200
+
+
+@api.route('/queue', methods=['GET'])
+def get_queue_stats():
+    """Get durable event queue depth and group commit statistics"""
+    service = current_service()
+    if service.event_queue is None:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **service.event_queue.stats()}), 200
+
+
+@api.route('/events', methods=['POST'])
+def handle_events():
+    """Process a batch of security events sent as a JSON array or NDJSON"""
+    service = current_service()
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        events = parse_ndjson(request.stream)
+    elif request.is_json:
+        events = request.get_json(silent=True)
+        if not isinstance(events, list):
+            return jsonify({
+                "status": "error",
+                "log": ["Invalid request: body must be a JSON array of events."]
+            }), 400
+    else:
+        return jsonify({
+            "status": "error",
+            "log": ["Invalid request: Content-Type must be application/json or application/x-ndjson."]
+        }), 400
+
+    results = service.run_batch(events)
+
+    if request.accept_mimetypes.best == 'application/x-ndjson':
+        def stream_results():
+            for index, result in enumerate(results):
+                encoded = codec.EncodedResult(result)
+                service.action_log.log(encoded)
+                yield encoded.with_index(index) + b"\n"
+        return Response(stream_with_context(stream_results()), mimetype='application/x-ndjson'), 200
+
+    # Each result is serialized once; the response is assembled from the same bytes
+    collected = []
+    summary = {}
+    for index, result in enumerate(results):
+        encoded = codec.EncodedResult(result)
+        service.action_log.log(encoded)
+        collected.append(encoded.with_index(index))
+        summary[result['status']] = summary.get(result['status'], 0) + 1
+    print(f"[Reaper] Processed batch of {len(collected)} events: {summary}")
+    body = b'{"total":%d,"summary":%s,"results":[%s]}\n' % (len(collected), codec.dumpb(summary), b",".join(collected))
+    return Response(body, mimetype='application/json'), 200
+
+
+def create_app(state: Optional[Any] = None, replay: bool = True,
+               event_socket: Optional[socket.socket] = None, replay_owner: Optional[int] = None) -> Flask:
+    """
+    Create and configure Flask application. Worker processes of the prefork server
+    pass the SharedState they have in common and the event socket bound by the
+    master, and skip replaying the event queue. A worker replacing one that exited
+    passes its pid as `replay_owner` to replay just the events that worker accepted
+    """
+    app = Flask(__name__)
+    
+    # Initialize agent and logging on startup
+    remediation_modules, config = load_module_map_from_config()
+    print(f"[Reaper Codec] Using {codec.select_codec(config.get('settings', {}).get('json_codec', 'auto')).name} for JSON")
+    app.json = CodecJSONProvider(app)
+    agent = ReaperAgent(remediation_modules, config, state=state)
+    APISchemaValidator.compile_schemas(check_formats=agent.settings.get('validate_formats', False))
+    action_log = setup_logging(
+        agent.settings.get('action_log_file', 'logs/reaper_actions.log'),
+        console=agent.settings.get('action_log_console', 'summary'),
+        sample_rates=agent.settings.get('action_log_sample_rates', {}),
+        max_bytes=agent.settings.get('action_log_max_bytes', 5 * 1024 * 1024),
+        backup_count=agent.settings.get('action_log_backup_count', 5)
+    )
     
+    service = EventService(agent, action_log)
+    if replay:
+        service.replay_pending()
+    elif replay_owner is not None:
+        service.replay_pending(owner=replay_owner)
+    service.start_sources(event_socket)
+    app.extensions['reaper_events'] = service
+    app.extensions['reaper_sources'] = service.sources
+    app.register_blueprint(api)
     return app
 
 
@@ -1,8 +1,9 @@
 """
 Base class for all remediation modules
 """
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Any, Dict, List, Optional
 
 
 class BaseReaperModule(ABC):
@@ -14,6 +15,11 @@ class BaseReaperModule(ABC):
         self.api_responses = []
         self.log_prefix = f"--- Event ID: {event.get('event_id')} | Module: {self.__class__.__name__} | Mode: {'DRY RUN' if dry_run_mode else 'LIVE'} ---"
     
+    @classmethod
+    def target(cls, event: Dict[str, Any]) -> Optional[str]:
+        """Resource the event acts on, or None if unknown. Events for the same target may be coalesced"""
+        return None
+    
     @abstractmethod
     def validate(self) -> str:
         """Validate event data"""
@@ -24,6 +30,13 @@ class BaseReaperModule(ABC):
         """Execute remediation action"""
         pass
     
+    async def execute_async(self) -> str:
+        """
+        Execute remediation action without blocking the event loop.
+        Modules with async SDK clients override this; by default execute() runs in a thread
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, self.execute)
+    
     @abstractmethod
     def report(self) -> str:
         """Generate execution report"""
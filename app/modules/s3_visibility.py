@@ -2,14 +2,22 @@
 Module to handle publicly exposed S3 buckets
 """
 from datetime import datetime
+from typing import Optional
 
 from .base import BaseReaperModule
-from ..sdks.aws import MockAWSS3
+from ..sdks.aws import AsyncMockAWSS3, MockAWSS3
 
 
 class S3VisibilityReaper(BaseReaperModule):
     """Module to handle publicly exposed S3 buckets."""
     
+    @classmethod
+    def target(cls, event) -> Optional[str]:
+        """The bucket being locked down"""
+        bucket = event.get('bucket_name')
+        region = event.get('region')
+        return f"s3:{bucket}" if bucket and region else None
+    
     def validate(self) -> str:
         """Validate required fields for S3 bucket event"""
         if self.event.get("bucket_name") and self.event.get("region"):
@@ -22,68 +30,77 @@ class S3VisibilityReaper(BaseReaperModule):
         region = self.event.get('region')
         
         if self.dry_run_mode:
-            # Simulate API calls without actually executing
-            mock_response = {
-                "dry_run": True,
-                "action": "put_public_access_block",
-                "bucket": bucket,
-                "region": region,
-                "timestamp": datetime.now().isoformat(),
-                "would_execute": f"s3.put_public_access_block for {bucket}"
-            }
-            self.api_responses.append(mock_response)
-            return f"[Execute]  DRY RUN: Would restrict public permissions on S3 bucket '{bucket}'."
-        else:
-            # Execute actual API calls (using mock for demo)
-            try:
-                api_response1 = MockAWSS3.put_public_access_block(bucket, region)
-                self.api_responses.append(api_response1)
-                
-                # Also update bucket policy
-                restrictive_policy = {
-                    "Version": "2012-10-17",
-                    "Statement": [{
-                        "Effect": "Deny",
-                        "Principal": "*",
-                        "Action": "s3:GetObject",
-                        "Resource": f"arn:aws:s3:::{bucket}/*",
-                        "Condition": {"Bool": {"aws:SecureTransport": "false"}}
-                    }]
-                }
-                api_response2 = MockAWSS3.put_bucket_policy(bucket, restrictive_policy)
-                self.api_responses.append(api_response2)
-                
-                return f"[Execute]  ACTION: Restricted public permissions on S3 bucket '{bucket}'."
-            
-            except (ConnectionError, FileNotFoundError) as e:
-                error_response = {
-                    "success": False,
-                    "message": str(e),
-                    "timestamp": datetime.now().isoformat(),
-                    "error_type": type(e).__name__
-                }
-                self.api_responses.append(error_response)
-                return f"[Execute]  EXCEPTION: Network/Access error - {str(e)}"
+            return self._simulate(bucket, region)
+        
+        # Execute actual API calls (using mock for demo)
+        try:
+            api_response1 = MockAWSS3.put_public_access_block(bucket, region)
+            self.api_responses.append(api_response1)
             
-            except (PermissionError, ValueError) as e:
-                error_response = {
-                    "success": False,
-                    "message": str(e),
-                    "timestamp": datetime.now().isoformat(),
-                    "error_type": type(e).__name__
-                }
-                self.api_responses.append(error_response)
-                return f"[Execute]  EXCEPTION: Permission/Validation error - {str(e)}"
+            # Also update bucket policy
+            api_response2 = MockAWSS3.put_bucket_policy(bucket, self._restrictive_policy(bucket))
+            self.api_responses.append(api_response2)
             
-            except Exception as e:
-                error_response = {
-                    "success": False,
-                    "message": str(e),
-                    "timestamp": datetime.now().isoformat(),
-                    "error_type": type(e).__name__
-                }
-                self.api_responses.append(error_response)
-                return f"[Execute]  EXCEPTION: Unexpected error - {str(e)}"
+            return f"[Execute]  ACTION: Restricted public permissions on S3 bucket '{bucket}'."
+        except Exception as e:
+            return self._record_exception(e)
+    
+    async def execute_async(self) -> str:
+        """Execute S3 bucket security remediation with the asyncio S3 client"""
+        bucket = self.event.get('bucket_name')
+        region = self.event.get('region')
+        
+        if self.dry_run_mode:
+            return self._simulate(bucket, region)
+        
+        try:
+            self.api_responses.append(await AsyncMockAWSS3.put_public_access_block(bucket, region))
+            self.api_responses.append(await AsyncMockAWSS3.put_bucket_policy(bucket, self._restrictive_policy(bucket)))
+            return f"[Execute]  ACTION: Restricted public permissions on S3 bucket '{bucket}'."
+        except Exception as e:
+            return self._record_exception(e)
+    
+    def _simulate(self, bucket: str, region: str) -> str:
+        """Simulate API calls without actually executing"""
+        mock_response = {
+            "dry_run": True,
+            "action": "put_public_access_block",
+            "bucket": bucket,
+            "region": region,
+            "timestamp": datetime.now().isoformat(),
+            "would_execute": f"s3.put_public_access_block for {bucket}"
+        }
+        self.api_responses.append(mock_response)
+        return f"[Execute]  DRY RUN: Would restrict public permissions on S3 bucket '{bucket}'."
+    
+    @staticmethod
+    def _restrictive_policy(bucket: str) -> dict:
+        return {
+            "Version": "2012-10-17",
+            "Statement": [{
+                "Effect": "Deny",
+                "Principal": "*",
+                "Action": "s3:GetObject",
+                "Resource": f"arn:aws:s3:::{bucket}/*",
+                "Condition": {"Bool": {"aws:SecureTransport": "false"}}
+            }]
+        }
+    
+    def _record_exception(self, e: Exception) -> str:
+        """Record a failed API call in the responses and describe it"""
+        error_response = {
+            "success": False,
+            "message": str(e),
+            "timestamp": datetime.now().isoformat(),
+            "error_type": type(e).__name__
+        }
+        self.api_responses.append(error_response)
+        
+        if isinstance(e, (ConnectionError, FileNotFoundError)):
+            return f"[Execute]  EXCEPTION: Network/Access error - {str(e)}"
+        if isinstance(e, (PermissionError, ValueError)):
+            return f"[Execute]  EXCEPTION: Permission/Validation error - {str(e)}"
+        return f"[Execute]  EXCEPTION: Unexpected error - {str(e)}"
     
     def report(self) -> str:
         """Generate execution report"""
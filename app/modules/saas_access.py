@@ -2,14 +2,22 @@
 Module to handle unauthorized access to SaaS applications
 """
 from datetime import datetime
+from typing import Optional
 
 from .base import BaseReaperModule
-from ..sdks.slack import MockSlackAPI
+from ..sdks.slack import AsyncMockSlackAPI, MockSlackAPI
 
 
 class SaaSAccessReaper(BaseReaperModule):
     """Module to handle unauthorized access to SaaS applications."""
     
+    @classmethod
+    def target(cls, event) -> Optional[str]:
+        """The user whose access to the source is revoked"""
+        user = event.get('user')
+        source = event.get('source')
+        return f"{source}:{user}" if user and source else None
+    
     def validate(self) -> str:
         """Validate required fields for SaaS access event"""
         if self.event.get("user") and self.event.get("source"):
@@ -22,57 +30,65 @@ class SaaSAccessReaper(BaseReaperModule):
         source = self.event.get('source')
         
         if self.dry_run_mode:
-            # Simulate API call without actually executing
-            mock_response = {
-                "dry_run": True,
-                "action": "revoke_access",
-                "user": user,
-                "source": source,
-                "timestamp": datetime.now().isoformat(),
-                "would_execute": f"slack.admin.users.remove for {user}"
-            }
-            self.api_responses.append(mock_response)
-            return f"[Execute]  DRY RUN: Would revoke access for user '{user}' to '{source}'."
+            return self._simulate(user, source)
+        
+        # Execute actual API call (using mock for demo)
+        try:
+            api_response = MockSlackAPI.revoke_user_access(user, source)
+        except Exception as e:
+            return self._record_exception(e)
+        return self._record_response(api_response, user, source)
+    
+    async def execute_async(self) -> str:
+        """Execute SaaS access revocation with the asyncio Slack client"""
+        user = self.event.get('user')
+        source = self.event.get('source')
+        
+        if self.dry_run_mode:
+            return self._simulate(user, source)
+        
+        try:
+            api_response = await AsyncMockSlackAPI.revoke_user_access(user, source)
+        except Exception as e:
+            return self._record_exception(e)
+        return self._record_response(api_response, user, source)
+    
+    def _simulate(self, user: str, source: str) -> str:
+        """Simulate API call without actually executing"""
+        mock_response = {
+            "dry_run": True,
+            "action": "revoke_access",
+            "user": user,
+            "source": source,
+            "timestamp": datetime.now().isoformat(),
+            "would_execute": f"slack.admin.users.remove for {user}"
+        }
+        self.api_responses.append(mock_response)
+        return f"[Execute]  DRY RUN: Would revoke access for user '{user}' to '{source}'."
+    
+    def _record_response(self, api_response: dict, user: str, source: str) -> str:
+        self.api_responses.append(api_response)
+        
+        if api_response.get('success'):
+            return f"[Execute]  ACTION: Successfully revoked access for user '{user}' to '{source}'."
         else:
-            # Execute actual API call (using mock for demo)
-            try:
-                api_response = MockSlackAPI.revoke_user_access(user, source)
-                self.api_responses.append(api_response)
-                
-                if api_response.get('success'):
-                    return f"[Execute]  ACTION: Successfully revoked access for user '{user}' to '{source}'."
-                else:
-                    return f"[Execute]  ERROR: Failed to revoke access for user '{user}' to '{source}': {api_response.get('message')}"
-            
-            except (ConnectionError, TimeoutError) as e:
-                error_response = {
-                    "success": False,
-                    "message": str(e),
-                    "timestamp": datetime.now().isoformat(),
-                    "error_type": type(e).__name__
-                }
-                self.api_responses.append(error_response)
-                return f"[Execute]  EXCEPTION: Network error - {str(e)}"
-            
-            except PermissionError as e:
-                error_response = {
-                    "success": False,
-                    "message": str(e),
-                    "timestamp": datetime.now().isoformat(),
-                    "error_type": "PermissionError"
-                }
-                self.api_responses.append(error_response)
-                return f"[Execute]  EXCEPTION: Permission denied - {str(e)}"
-            
-            except Exception as e:
-                error_response = {
-                    "success": False,
-                    "message": str(e),
-                    "timestamp": datetime.now().isoformat(),
-                    "error_type": type(e).__name__
-                }
-                self.api_responses.append(error_response)
-                return f"[Execute]  EXCEPTION: Unexpected error - {str(e)}"
+            return f"[Execute]  ERROR: Failed to revoke access for user '{user}' to '{source}': {api_response.get('message')}"
+    
+    def _record_exception(self, e: Exception) -> str:
+        """Record a failed API call in the responses and describe it"""
+        error_response = {
+            "success": False,
+            "message": str(e),
+            "timestamp": datetime.now().isoformat(),
+            "error_type": type(e).__name__
+        }
+        self.api_responses.append(error_response)
+        
+        if isinstance(e, (ConnectionError, TimeoutError)):
+            return f"[Execute]  EXCEPTION: Network error - {str(e)}"
+        if isinstance(e, PermissionError):
+            return f"[Execute]  EXCEPTION: Permission denied - {str(e)}"
+        return f"[Execute]  EXCEPTION: Unexpected error - {str(e)}"
     
     def report(self) -> str:
         """Generate execution report"""
@@ -0,0 +1,122 @@
+"""
+Offline replay of NDJSON event files through the agent, without HTTP
+"""
+import time
+from array import array
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Any, Dict, Iterable, Optional, Tuple
+
+from .agent import ReaperAgent, load_module_map_from_config
+from .main import parse_ndjson, validate_batch_event
+from .utils import codec
+from .utils.schema import APISchemaValidator
+
+
+class EventReplayer:
+    """
+    Streams events from NDJSON lines through schema validation and
+    ReaperAgent.process_event in this process, `workers` events at a time.
+
+    Every event is audited like one received on /event, so a replay can
+    backfill missed events or rehearse incident-day volumes (with `dry_run`
+    forcing dry run mode, and `audit_file` keeping the rehearsal out of the
+    real trail). Results can be written to `output` as NDJSON, in input order.
+    run() returns a throughput and latency report.
+    """
+
+    # Events submitted ahead of the oldest unfinished one, per worker
+    WINDOW_PER_WORKER = 4
+
+    def __init__(self, config_path: str = 'config.yaml', workers: int = 1, dry_run: bool = False,
+                 audit_file: Optional[str] = None, output: Optional[IO[bytes]] = None):
+        self.config_path = config_path
+        self.workers = max(1, workers)
+        self.dry_run = dry_run
+        self.audit_file = audit_file
+        self.output = output
+
+    def build_agent(self) -> ReaperAgent:
+        remediation_modules, config = load_module_map_from_config(self.config_path)
+        settings = dict(config.get('settings') or {})
+        if self.dry_run:
+            settings['dry_run_mode'] = True
+        if self.audit_file:
+            settings['audit_file'] = self.audit_file
+        APISchemaValidator.compile_schemas(check_formats=settings.get('validate_formats', False))
+        return ReaperAgent(remediation_modules, {**config, 'settings': settings})
+
+    @staticmethod
+    def _replay_one(agent: ReaperAgent, event: Any) -> Tuple[Dict[str, Any], float]:
+        """Validate and process one event; returns its result and latency in ms"""
+        started = time.perf_counter()
+        is_valid, message = validate_batch_event(event)
+        if is_valid:
+            result = agent.process_event_safely(event)
+        else:
+            result = {"status": "validation_error", "log": [message]}
+        return result, (time.perf_counter() - started) * 1000
+
+    def run(self, lines: Iterable[bytes]) -> Dict[str, Any]:
+        """Replay every event of the NDJSON lines and return the report"""
+        agent = self.build_agent()
+        statuses: Dict[str, int] = {}
+        latencies = array('d')
+
+        def collect(future):
+            result, latency_ms = future.result()
+            statuses[result['status']] = statuses.get(result['status'], 0) + 1
+            latencies.append(latency_ms)
+            if self.output is not None:
+                self.output.write(codec.EncodedResult(result).with_index(len(latencies) - 1) + b"\n")
+
+        started = time.perf_counter()
+        pending = deque()
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='reaper-replay') as pool:
+                for event in parse_ndjson(lines):
+                    pending.append(pool.submit(self._replay_one, agent, event))
+                    if len(pending) >= self.workers * self.WINDOW_PER_WORKER:
+                        collect(pending.popleft())
+                while pending:
+                    collect(pending.popleft())
+        finally:
+            agent.audit_manager.close()
+        elapsed = time.perf_counter() - started
+
+        return {
+            "events": len(latencies),
+            "workers": self.workers,
+            "dry_run": agent.dry_run_mode,
+            "elapsed_seconds": round(elapsed, 3),
+            "events_per_second": round(len(latencies) / elapsed, 1) if elapsed > 0 else 0,
+            "statuses": statuses,
+            "latency_ms": self._summarize(sorted(latencies))
+        }
+
+    @staticmethod
+    def _summarize(samples) -> Dict[str, float]:
+        if not samples:
+            return {"avg": 0, "p50": 0, "p95": 0, "p99": 0, "max": 0}
+        return {
+            "avg": round(sum(samples) / len(samples), 3),
+            "p50": round(samples[len(samples) // 2], 3),
+            "p95": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+            "p99": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 3),
+            "max": round(samples[-1], 3)
+        }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Render a replay report for the terminal"""
+    latency = report['latency_ms']
+    statuses = ", ".join(f"{status}: {count}" for status, count in sorted(report['statuses'].items())) or "none"
+    mode = "DRY RUN" if report['dry_run'] else "LIVE"
+    return "\n".join([
+        f"[Reaper Replay] {report['events']} events in {report['elapsed_seconds']}s "
+        f"with {report['workers']} workers ({mode})",
+        f"[Reaper Replay] Throughput: {report['events_per_second']} events/s",
+        f"[Reaper Replay] Latency ms: avg {latency['avg']}, p50 {latency['p50']}, p95 {latency['p95']}, "
+        f"p99 {latency['p99']}, max {latency['max']}",
+        f"[Reaper Replay] Results: {statuses}"
+    ])
@@ -2,7 +2,7 @@
 Mock SDK implementations for testing
 """
 
-from .slack import MockSlackAPI
-from .aws import MockAWSS3
+from .slack import MockSlackAPI, AsyncMockSlackAPI
+from .aws import MockAWSS3, AsyncMockAWSS3
 
-__all__ = ['MockSlackAPI', 'MockAWSS3']
+__all__ = ['MockSlackAPI', 'MockAWSS3', 'AsyncMockSlackAPI', 'AsyncMockAWSS3']
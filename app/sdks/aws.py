@@ -4,7 +4,7 @@ Mock AWS S3 API for testing bucket policy changes
 from datetime import datetime
 from typing import Dict, Any
 
-from .base import BaseSDK
+from .base import AsyncSDKMixin, BaseSDK
 
 
 class MockAWSS3(BaseSDK):
@@ -55,3 +55,23 @@ class MockAWSS3(BaseSDK):
             "bucket": bucket_name,
             "policy_statements": len(policy.get("Statement", []))
         }
+
+
+class AsyncMockAWSS3(AsyncSDKMixin, MockAWSS3):
+    """asyncio variant of the mock AWS S3 API"""
+    
+    def get_name(self) -> str:
+        """Return SDK name"""
+        return "AsyncMockAWSS3"
+    
+    @classmethod
+    async def put_public_access_block(cls, bucket_name: str, region: str) -> Dict[str, Any]:
+        """Simulate applying public access block to S3 bucket without blocking the event loop"""
+        await cls._round_trip()
+        return MockAWSS3.put_public_access_block(bucket_name, region)
+    
+    @classmethod
+    async def put_bucket_policy(cls, bucket_name: str, policy: Dict) -> Dict[str, Any]:
+        """Simulate updating S3 bucket policy without blocking the event loop"""
+        await cls._round_trip()
+        return MockAWSS3.put_bucket_policy(bucket_name, policy)
@@ -1,6 +1,7 @@
 """
 Base SDK class for standardized API interfaces
 """
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Dict, Any
 
@@ -17,3 +18,15 @@ class BaseSDK(ABC):
     def get_name(self) -> str:
         """Return the name of the SDK"""
         pass
+
+
+class AsyncSDKMixin:
+    """Helpers for asyncio variants of the mock SDKs"""
+    
+    # Simulated network round trip per API call, in seconds
+    latency_seconds = 0.0
+    
+    @classmethod
+    async def _round_trip(cls):
+        """Yield to the event loop as a real non-blocking API call would"""
+        await asyncio.sleep(cls.latency_seconds)
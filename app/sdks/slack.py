@@ -5,7 +5,7 @@ import random
 from datetime import datetime
 from typing import Dict, Any
 
-from .base import BaseSDK
+from .base import AsyncSDKMixin, BaseSDK
 
 
 class MockSlackAPI(BaseSDK):
@@ -48,3 +48,17 @@ class MockSlackAPI(BaseSDK):
             "timestamp": datetime.now().isoformat(),
             "api_call": "slack.admin.users.remove"
         }
+
+
+class AsyncMockSlackAPI(AsyncSDKMixin, MockSlackAPI):
+    """asyncio variant of the mock Slack API"""
+    
+    def get_name(self) -> str:
+        """Return SDK name"""
+        return "AsyncMockSlackAPI"
+    
+    @classmethod
+    async def revoke_user_access(cls, user: str, workspace: str) -> Dict[str, Any]:
+        """Simulate revoking user access from Slack workspace without blocking the event loop"""
+        await cls._round_trip()
+        return MockSlackAPI.revoke_user_access(user, workspace)
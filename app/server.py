@@ -0,0 +1,160 @@
+"""
+Prefork server: several worker processes serving one listening socket
+"""
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from typing import Any, Dict, Optional
+
+from werkzeug.serving import make_server
+
+from .agent import load_module_map_from_config
+from .main import create_app, replay_pending_events
+from .sources import UnixSocketSource
+from .utils.shared_state import SharedState
+
+
+class PreforkServer:
+    """
+    Runs the API in `workers` processes (server_workers setting, or one per CPU core).
+
+    The master binds the socket, replays the durable event queue once, then forks
+    the workers; each builds its own app and accepts connections on the inherited
+    socket with a threaded WSGI server. Mutable agent state such as dry run mode
+    lives in a SharedState file mapped by every worker, so /toggle-dry-run on one
+    worker applies to all of them. Workers that exit are restarted, and the new
+    worker replays the queued events the exited one had accepted; SIGTERM or
+    SIGINT stops them gracefully so audit writers are flushed. The event socket
+    (event_socket_path), if configured, is also bound once by the master and
+    shared by the workers the same way.
+    """
+
+    # Minimum seconds between restarts of one worker slot
+    RESTART_DELAY = 1.0
+
+    def __init__(self, host: str = '0.0.0.0', port: int = 5001, workers: Optional[int] = None):
+        self.host = host
+        self.port = port
+        self.workers = workers
+
+        self._socket: Optional[socket.socket] = None
+        self._event_socket: Optional[socket.socket] = None
+        self._event_socket_path = None
+        self._state: Optional[SharedState] = None
+        self._state_file = None
+        self._children: Dict[int, int] = {}  # pid -> worker slot
+        self._started: Dict[int, float] = {}  # worker slot -> last start
+        self._stopping = False
+
+    def run(self) -> int:
+        """Serve until stopped by a signal"""
+        remediation_modules, config = load_module_map_from_config()
+        settings = config.get('settings', {})
+        if self.workers is None:
+            self.workers = settings.get('server_workers', 0)
+        if self.workers <= 0:
+            self.workers = os.cpu_count() or 1
+        self._state_file = settings.get('agent_state_file', 'logs/agent_state.bin')
+        self._state = SharedState(self._state_file, initial={
+            "dry_run_mode": settings.get('dry_run_mode', False),
+            "workers": []
+        })
+
+        # Once here rather than in every worker
+        replay_pending_events(remediation_modules, config)
+        self._bind(settings)
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        for slot in range(self.workers):
+            self._spawn(slot)
+        self._reap_workers()
+
+        self._close()
+        print("[Reaper Server] Stopped")
+        return 0
+
+    def _bind(self, settings: Dict[str, Any]):
+        """Bind the listening socket and the event socket shared by all workers"""
+        self._socket = socket.create_server((self.host, self.port), backlog=1024)
+        self._socket.set_inheritable(True)
+        print(f"[Reaper Server] Listening on http://{self.host}:{self.port} with {self.workers} workers")
+        self._event_socket_path = settings.get('event_socket_path')
+        if self._event_socket_path:
+            self._event_socket = UnixSocketSource.bind(self._event_socket_path)
+
+    def _close(self):
+        self._socket.close()
+        if self._event_socket is not None:
+            self._event_socket.close()
+            os.unlink(self._event_socket_path)
+        self._state.close()
+
+    def _reap_workers(self):
+        """Wait for workers to exit, restarting them until the server is stopping"""
+        while self._children:
+            try:
+                pid, status = os.waitpid(-1, 0)
+            except ChildProcessError:
+                break
+            slot = self._children.pop(pid, None)
+            if slot is None:
+                continue
+            if not self._stopping:
+                self._respawn(slot, pid, status)
+            self._publish_workers()
+
+    def _respawn(self, slot: int, pid: int, status: int):
+        """Replace an exited worker; the new one replays the events the old one had accepted"""
+        print(f"[Reaper Server] WARNING: Worker {pid} exited with status {status}; restarting")
+        delay = self.RESTART_DELAY - (time.monotonic() - self._started.get(slot, 0))
+        if delay > 0:
+            time.sleep(delay)
+        self._spawn(slot, replay_owner=pid)
+
+    def _stop(self, signum, frame):
+        if self._stopping:
+            return
+        self._stopping = True
+        print(f"[Reaper Server] Stopping {len(self._children)} workers")
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _publish_workers(self):
+        self._state.update(workers=sorted(self._children))
+
+    def _spawn(self, slot: int, replay_owner: Optional[int] = None):
+        self._started[slot] = time.monotonic()
+        pid = os.fork()
+        if pid == 0:
+            sys.exit(self._serve_worker(replay_owner))
+        self._children[pid] = slot
+        self._publish_workers()
+
+    @staticmethod
+    def _stop_worker(signum, frame):
+        # A second SIGTERM (e.g. from both the master and a process manager) must not interrupt the shutdown
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        sys.exit(0)
+
+    def _serve_worker(self, replay_owner: Optional[int] = None) -> int:
+        """Body of a worker process; returns its exit code"""
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, self._stop_worker)
+        try:
+            app = create_app(state=SharedState(self._state_file), replay=False, event_socket=self._event_socket,
+                             replay_owner=replay_owner)
+            server = make_server(self.host, self.port, app, threaded=True, fd=self._socket.fileno())
+            server.serve_forever()
+        except SystemExit:
+            pass
+        except Exception:
+            traceback.print_exc()
+            return 1
+        return 0
@@ -0,0 +1,8 @@
+"""
+Event sources that feed the agent alongside the HTTP API
+"""
+
+from .base import BaseEventSource
+from .unix_socket import UnixSocketSource
+
+__all__ = ['BaseEventSource', 'UnixSocketSource']
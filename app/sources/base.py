@@ -0,0 +1,66 @@
+"""
+Base class for event sources other than the HTTP API
+"""
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Tuple, Union
+
+from ..utils import codec
+
+# Validates, admits, persists and processes one event exactly as POST /event does;
+# returns the response body, status code and headers
+EventHandler = Callable[[Any], Tuple[Union[Dict[str, Any], codec.EncodedResult], int, Dict[str, str]]]
+
+
+class BaseEventSource(ABC):
+    """
+    Abstract base class for event sources running alongside the Flask app.
+
+    A source receives events from a local transport and hands each one to the
+    same handler as /event, so schema validation, admission, dedup, the
+    durable queue and the audit trail behave identically.
+    """
+
+    name = 'base'
+
+    def __init__(self, handler: EventHandler):
+        self.handler = handler
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "events": 0,
+            "errors": 0
+        }
+
+    @abstractmethod
+    def start(self):
+        """Start receiving events in background threads"""
+        pass
+
+    @abstractmethod
+    def stop(self):
+        """Stop receiving events and release the transport"""
+        pass
+
+    def respond(self, payload: bytes) -> bytes:
+        """Parse one event, run it through the handler and return the serialized response body"""
+        try:
+            event_data = codec.loads(payload)
+        except ValueError as e:
+            self._count("errors")
+            return codec.dumpb({"status": "error", "log": [f"Invalid JSON: {e}"]})
+        try:
+            body, _, _ = self.handler(event_data)
+        except Exception as e:
+            self._count("errors")
+            return codec.dumpb({"status": "error", "log": [f"Unhandled error while processing event: {e}"]})
+        self._count("events")
+        return body.data if isinstance(body, codec.EncodedResult) else codec.dumpb(body)
+
+    def _count(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self._stats[key] = self._stats.get(key, 0) + amount
+
+    def stats(self) -> Dict[str, Any]:
+        """Get event and error counters"""
+        with self._stats_lock:
+            return {"source": self.name, **self._stats}
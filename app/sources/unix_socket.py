@@ -0,0 +1,223 @@
+"""
+Unix domain socket event source for detectors running on the same host
+"""
+import os
+import queue
+import socket
+import stat
+import struct
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import IO, Optional
+
+from ..utils import codec
+from .base import BaseEventSource, EventHandler
+
+
+class FrameTooLarge(ValueError):
+    """Raised when a client sends a frame above the size limit; the connection is closed"""
+    pass
+
+
+class NDJSONFraming:
+    """One JSON document per line, answered by one JSON line"""
+
+    name = 'ndjson'
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+
+    def read(self, stream: IO[bytes]) -> Optional[bytes]:
+        """Next non-empty line, or None at end of stream"""
+        while True:
+            line = stream.readline(self.max_bytes + 1)
+            if not line:
+                return None
+            if len(line) > self.max_bytes:
+                raise FrameTooLarge(f"Line exceeds {self.max_bytes} bytes.")
+            if line.strip():
+                return line
+
+    @staticmethod
+    def encode(payload: bytes) -> bytes:
+        return payload + b"\n"
+
+
+class LengthPrefixedFraming:
+    """Each document preceded by its length as a 4-byte big-endian unsigned integer, in both directions"""
+
+    name = 'length'
+    HEADER = struct.Struct('>I')
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+
+    def read(self, stream: IO[bytes]) -> Optional[bytes]:
+        """Next frame's payload, or None at end of stream (a truncated frame is dropped)"""
+        header = stream.read(self.HEADER.size)
+        if len(header) < self.HEADER.size:
+            return None
+        (length,) = self.HEADER.unpack(header)
+        if length > self.max_bytes:
+            raise FrameTooLarge(f"Frame of {length} bytes exceeds {self.max_bytes} bytes.")
+        payload = stream.read(length)
+        return payload if len(payload) == length else None
+
+    @classmethod
+    def encode(cls, payload: bytes) -> bytes:
+        return cls.HEADER.pack(len(payload)) + payload
+
+
+FRAMINGS = {framing.name: framing for framing in (NDJSONFraming, LengthPrefixedFraming)}
+
+
+class UnixSocketSource(BaseEventSource):
+    """
+    Accepts events on a Unix domain socket, bypassing HTTP.
+
+    Clients may pipeline: every event read from a connection is processed on a
+    shared pool of `workers` threads while the connection keeps reading, and a
+    writer thread sends the responses back in request order (events of one
+    connection are processed concurrently, like separate /event requests). At most
+    `pipeline_depth` events per connection are in flight; beyond that reading
+    pauses until the oldest is answered. The response to each event is the body
+    /event would return (results, validation errors, 429 rejections with
+    retry_after, or the job of an async event).
+    """
+
+    name = 'unix_socket'
+
+    # Seconds between checks for stop() while waiting for connections
+    ACCEPT_TIMEOUT = 1.0
+
+    def __init__(self, path: str, handler: EventHandler, framing: str = 'ndjson', workers: int = 8,
+                 pipeline_depth: int = 64, max_frame_bytes: int = 1024 * 1024,
+                 sock: Optional[socket.socket] = None):
+        super().__init__(handler)
+        if framing not in FRAMINGS:
+            raise ValueError(f"Unknown event socket framing '{framing}'. Options: {', '.join(FRAMINGS)}")
+        self.path = path
+        self.framing = FRAMINGS[framing](max_frame_bytes)
+        self.workers = max(1, workers)
+        self.pipeline_depth = max(1, pipeline_depth)
+        # A socket bound by the prefork master is shared by the workers and left to the master to remove
+        self._socket = sock
+        self._owns_socket = sock is None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._connections = set()
+        self._stopping = threading.Event()
+        self._stats.update({"connections": 0, "active_connections": 0, "oversized_frames": 0})
+
+    @staticmethod
+    def bind(path: str, mode: int = 0o660) -> socket.socket:
+        """Listen on `path`, replacing a stale socket file left by a previous run"""
+        if os.path.exists(path):
+            if not stat.S_ISSOCK(os.stat(path).st_mode):
+                raise OSError(f"Event socket path '{path}' exists and is not a socket")
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(path)
+            else:
+                raise OSError(f"Event socket '{path}' is in use by another process")
+            finally:
+                probe.close()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(path)
+        os.chmod(path, mode)
+        sock.listen(1024)
+        sock.set_inheritable(True)
+        return sock
+
+    def start(self):
+        if self._socket is None:
+            self._socket = self.bind(self.path)
+        self._socket.settimeout(self.ACCEPT_TIMEOUT)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='reaper-socket')
+        threading.Thread(target=self._accept_loop, name='reaper-socket-accept', daemon=True).start()
+        print(f"[Reaper Sources] Accepting {self.framing.name} events on unix socket '{self.path}'")
+
+    def stop(self):
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        for conn in list(self._connections):
+            try:
+                conn.shutdown(socket.SHUT_RD)
+            except OSError:
+                pass
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+        if self._socket is not None:
+            self._socket.close()
+            if self._owns_socket and os.path.exists(self.path):
+                os.unlink(self.path)
+
+    def _accept_loop(self):
+        while not self._stopping.is_set():
+            try:
+                conn, _ = self._socket.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            conn.settimeout(None)
+            self._count("connections")
+            threading.Thread(target=self._serve, args=(conn,), name='reaper-socket-conn', daemon=True).start()
+
+    def _serve(self, conn: socket.socket):
+        """Read events from one connection; responses are written by a companion thread"""
+        self._connections.add(conn)
+        self._count("active_connections")
+        responses = queue.Queue(maxsize=self.pipeline_depth)
+        writer = threading.Thread(target=self._write_responses, args=(conn, responses), daemon=True)
+        writer.start()
+        stream = conn.makefile('rb')
+        try:
+            while True:
+                try:
+                    payload = self.framing.read(stream)
+                except FrameTooLarge as e:
+                    self._count("oversized_frames")
+                    responses.put(self._completed(codec.dumpb({"status": "error", "log": [str(e)]})))
+                    break
+                if payload is None:
+                    break
+                try:
+                    responses.put(self._pool.submit(self.respond, payload))
+                except RuntimeError:
+                    # The pool was shut down by stop()
+                    break
+        except OSError:
+            pass
+        finally:
+            responses.put(None)
+            writer.join()
+            stream.close()
+            conn.close()
+            self._connections.discard(conn)
+            self._count("active_connections", -1)
+
+    def _write_responses(self, conn: socket.socket, responses: queue.Queue):
+        """Send responses in request order; keeps draining after the client goes away"""
+        connected = True
+        while True:
+            future = responses.get()
+            if future is None:
+                return
+            data = future.result()
+            if connected:
+                try:
+                    conn.sendall(self.framing.encode(data))
+                except OSError:
+                    connected = False
+
+    @staticmethod
+    def _completed(data: bytes) -> Future:
+        future = Future()
+        future.set_result(data)
+        return future
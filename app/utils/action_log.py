@@ -0,0 +1,143 @@
+"""
+Non-blocking structured action log
+"""
+import atexit
+import logging
+import os
+import queue
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Dict, Optional, Union
+
+from .codec import EncodedResult
+
+# One ActionLog per log file, so creating several apps never duplicates writes
+_action_logs: Dict[str, 'ActionLog'] = {}
+_action_logs_lock = threading.Lock()
+
+
+class ActionLog:
+    """
+    Logs one JSON line per event result without blocking the request path.
+
+    log() serializes the result once (or reuses the bytes of an EncodedResult
+    already sent elsewhere) and puts the record on a queue; a
+    QueueListener thread formats it for the rotating file and, depending on
+    `console` ('off', 'summary' or 'full'), for stdout. Statuses listed in
+    `sample_rates` (e.g. {"ignored": 0.1}) are sampled deterministically: one
+    result in every 1/rate is logged, tagged with its sample_rate, and the
+    rest are only counted.
+    """
+
+    CONSOLE_MODES = ('off', 'summary', 'full')
+
+    def __init__(self, log_file: str = 'logs/reaper_actions.log', console: str = 'summary',
+                 sample_rates: Optional[Dict[str, float]] = None,
+                 max_bytes: int = 5 * 1024 * 1024, backup_count: int = 5):
+        if console not in self.CONSOLE_MODES:
+            raise ValueError(f"Unknown console mode '{console}'. Options: {', '.join(self.CONSOLE_MODES)}")
+        self.log_file = log_file
+        self.console = console
+        self.sample_rates: Dict[str, float] = {}
+        self._every: Dict[str, int] = {}
+        self.set_sample_rates(sample_rates or {})
+
+        log_dir = os.path.dirname(log_file)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._seen: Dict[str, int] = {}
+        self._stats = {"logged": 0, "sampled_out": 0}
+
+        file_handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count)
+        file_handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+        handlers = [file_handler]
+        if console != 'off':
+            console_handler = logging.StreamHandler(sys.stdout)
+            console_handler.setFormatter(logging.Formatter('%(summary)s' if console == 'summary' else '%(message)s'))
+            handlers.append(console_handler)
+        self._handlers = handlers
+
+        self._queue = queue.SimpleQueue()
+        self._listener = QueueListener(self._queue, *handlers)
+        self._listener.start()
+
+        # Not registered with logging.getLogger: records go only to this log's queue
+        self.logger = logging.Logger('ReaperAgentLogger', logging.INFO)
+        self.logger.propagate = False
+        self.logger.addHandler(QueueHandler(self._queue))
+        self._closed = False
+
+    def set_sample_rates(self, sample_rates: Dict[str, float]):
+        """Replace the per-status sample rates (1.0 logs every result, 0 none)"""
+        self.sample_rates = {status: min(1.0, max(0.0, float(rate))) for status, rate in sample_rates.items()}
+        self._every = {status: round(1 / rate) if rate > 0 else 0
+                       for status, rate in self.sample_rates.items() if rate < 1.0}
+
+    def log(self, result: Union[Dict[str, Any], EncodedResult]) -> bool:
+        """Queue a result for logging; returns False if it was sampled out"""
+        encoded = result if isinstance(result, EncodedResult) else EncodedResult(result)
+        result = encoded.value
+        status = result.get('status')
+        every = self._every.get(status)
+        if every is not None:
+            with self._lock:
+                seen = self._seen.get(status, 0)
+                self._seen[status] = seen + 1
+                if every == 0 or seen % every:
+                    self._stats["sampled_out"] += 1
+                    return False
+            result = {**result, "sample_rate": self.sample_rates[status]}
+            encoded = EncodedResult(result)
+
+        summary = self._summary(result) if self.console == 'summary' else None
+        self.logger.info(encoded.text, extra={"summary": summary})
+        with self._lock:
+            self._stats["logged"] += 1
+        return True
+
+    @staticmethod
+    def _summary(result: Dict[str, Any]) -> str:
+        """One console line: status and the last step of the response log"""
+        log = result.get('log') or []
+        if not log:
+            return f"[Reaper] {result.get('status')}"
+        return f"[Reaper] {result.get('status')}: {log[-1]}"
+
+    def stats(self) -> Dict[str, Any]:
+        """Get logged and sampled-out counts and the current settings"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["queued"] = self._queue.qsize()
+        stats["console"] = self.console
+        stats["sample_rates"] = dict(self.sample_rates)
+        return stats
+
+    def close(self):
+        """Write out queued records and close the handlers"""
+        if self._closed:
+            return
+        self._closed = True
+        self._listener.stop()
+        for handler in self._handlers:
+            handler.close()
+
+
+def get_action_log(log_file: str = 'logs/reaper_actions.log', **options) -> ActionLog:
+    """
+    Get the ActionLog for a file, creating it on first use. Later calls reuse
+    the same handlers and listener, only updating the sample rates
+    """
+    key = os.path.abspath(log_file)
+    with _action_logs_lock:
+        action_log = _action_logs.get(key)
+        if action_log is None or action_log._closed:
+            action_log = ActionLog(log_file, **options)
+            _action_logs[key] = action_log
+            atexit.register(action_log.close)
+            return action_log
+    if 'sample_rates' in options:
+        action_log.set_sample_rates(options['sample_rates'] or {})
+    return action_log
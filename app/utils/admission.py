@@ -0,0 +1,110 @@
+"""
+Admission control for incoming events
+"""
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, Optional
+
+
+class AdmissionRejected(Exception):
+    """Raised when an event is not admitted; carries the suggested Retry-After in seconds"""
+
+    def __init__(self, message: str, retry_after: int, shed: bool = False):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.shed = shed
+
+
+class AdmissionController:
+    """
+    Bounds the number of events being processed or waiting to be processed.
+
+    admit() takes a slot or raises AdmissionRejected once `max_pending` events
+    are in the system; release() frees it when the event is done. Above
+    `shed_threshold` of capacity, events with a severity in `shed_severities`
+    are turned away first so capacity is kept for the severe ones.
+    Retry-After is estimated from the recent completion (drain) rate.
+    """
+
+    # Seconds of completions used to estimate the drain rate
+    DRAIN_WINDOW = 10.0
+
+    def __init__(self, max_pending: int = 1000, shed_severities: Iterable[str] = ('low',),
+                 shed_threshold: float = 0.8, max_retry_after: int = 60):
+        self.max_pending = max(1, max_pending)
+        self.shed_severities = frozenset(shed_severities or ())
+        self.shed_at = max(1, int(self.max_pending * shed_threshold))
+        self.max_retry_after = max(1, max_retry_after)
+
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completions = deque()
+        self._stats = {
+            "admitted": 0,
+            "rejected": 0,
+            "shed": 0
+        }
+
+    def admit(self, severity: Optional[str] = None):
+        """Take a slot for an event, or raise AdmissionRejected"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._stats["rejected"] += 1
+                raise AdmissionRejected(f"Agent is at capacity ({self.max_pending} events pending), retry later.",
+                                        self._retry_after(self._pending - self.max_pending + 1))
+            if self._pending >= self.shed_at and severity in self.shed_severities:
+                self._stats["shed"] += 1
+                raise AdmissionRejected(f"Agent is under load; '{severity}' severity events are deferred, retry later.",
+                                        self._retry_after(self._pending - self.shed_at + 1), shed=True)
+            self._pending += 1
+            self._stats["admitted"] += 1
+
+    def release(self):
+        """Free the slot of an admitted event once it has been processed"""
+        now = time.monotonic()
+        with self._lock:
+            self._pending = max(0, self._pending - 1)
+            self._completions.append(now)
+            self._trim(now)
+
+    def _trim(self, now: float):
+        while self._completions and now - self._completions[0] > self.DRAIN_WINDOW:
+            self._completions.popleft()
+
+    def _drain_rate(self) -> float:
+        """Events completed per second over the drain window"""
+        self._trim(time.monotonic())
+        return len(self._completions) / self.DRAIN_WINDOW
+
+    def _retry_after(self, excess: int) -> int:
+        """Seconds until `excess` events have drained at the current rate"""
+        rate = self._drain_rate()
+        if rate <= 0:
+            return self.max_retry_after
+        return min(self.max_retry_after, max(1, math.ceil(excess / rate)))
+
+    def state(self) -> str:
+        """accepting, shedding (low severities turned away) or rejecting"""
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._pending >= self.max_pending:
+            return "rejecting"
+        if self._pending >= self.shed_at and self.shed_severities:
+            return "shedding"
+        return "accepting"
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the admission state, pending count, drain rate and counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["state"] = self._state()
+            stats["pending"] = self._pending
+            stats["drain_rate_per_second"] = round(self._drain_rate(), 2)
+        stats["max_pending"] = self.max_pending
+        stats["shed_at"] = self.shed_at
+        stats["shed_severities"] = sorted(self.shed_severities)
+        return stats
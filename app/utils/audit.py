@@ -1,19 +1,150 @@
 """
 Audit trail management for security actions
 """
+import atexit
+import contextlib
 import json
 import os
+import threading
+from collections import deque
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from . import codec
+from .audit_index import AuditFileIndex
+from .audit_segments import AuditSegmentManager
+from .audit_stats import AuditStats
+from .audit_store import SQLiteAuditStore, entry_target
+from .audit_writer import AuditWriter, FileAuditSink
+from .locks import InterProcessLock
+
+
+def parse_filter_timestamp(value: str) -> str:
+    """
+    Turn a since/until filter into the naive ISO form entries are stamped with.
+    Accepts a trailing 'Z', which datetime.fromisoformat() rejects before Python 3.11
+    """
+    if value[-1:] in ('Z', 'z'):
+        value = value[:-1] + '+00:00'
+    return datetime.fromisoformat(value).replace(tzinfo=None).isoformat()
+
+
+def _loads_or_none(text: str) -> Any:
+    """Parse a JSON block of a markdown report; None if it is damaged"""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return None
 
 
 class AuditTrailManager:
     """Manages audit trail generation in multiple formats"""
     
-    def __init__(self, config: Dict[str, Any]):
-        self.audit_format = config.get('settings', {}).get('audit_format', 'markdown')
-        self.audit_file = config.get('settings', {}).get('audit_file', 'logs/audit_trail.md')
-        self.ensure_audit_file_exists()
+    # Formats whose records can be appended without rewriting the file
+    APPEND_FORMATS = ('markdown', 'jsonl', 'sqlite')
+    
+    # Entries read per step when streaming through file formats
+    READ_CHUNK_SIZE = 500
+    
+    # Most recent entries kept in memory for /audit and the dashboard
+    RECENT_BUFFER_SIZE = 200
+    
+    MARKDOWN_HEADER = (
+        "# Reaper Agent Audit Trail\n\n"
+        "This file contains a detailed audit trail of all security remediation actions.\n\n"
+        "---\n\n"
+    )
+    
+    def __init__(self, config: Dict[str, Any], read_only: bool = False, shared: bool = False):
+        settings = config.get('settings', {})
+        self.audit_format = settings.get('audit_format', 'markdown')
+        self.audit_file = settings.get('audit_file', 'logs/audit_trail.md')
+        # Read-only managers (e.g. CLI exports) never write, migrate or maintain segments
+        self.read_only = read_only
+        # Shared managers (worker processes of one server) see entries other processes append
+        self.shared = shared
+        # Serializes appends, rotation and manifest updates across threads and worker processes
+        self._write_lock = InterProcessLock(f"{self.audit_file}.lock")
+        with self._write_lock:
+            self.ensure_audit_file_exists()
+            if self.audit_format == 'jsonl' and not read_only:
+                self._migrate_legacy_json()
+                if settings.get('audit_import_markdown'):
+                    self._import_markdown_trail(settings['audit_import_markdown'])
+        
+        self.store = SQLiteAuditStore(self.audit_file) if self.audit_format == 'sqlite' else None
+        self.index = (AuditFileIndex(self.audit_file, self.audit_format, persist=not read_only)
+                      if self.audit_format in AuditFileIndex.FORMATS else None)
+        self._segment_lock = threading.Lock()
+        
+        self.segments = None
+        if settings.get('audit_segment_max_bytes') or settings.get('audit_segment_max_age_hours'):
+            self._start_segments(settings)
+        
+        self.writer = None
+        if settings.get('audit_async', False) and not read_only:
+            self._start_writer(settings)
+        
+        # Entries held back by batch() on each thread
+        self._batches = threading.local()
+        
+        # Ring buffer of recent entries, seeded from the tail of the audit trail. It only
+        # sees this process's entries, so shared managers read recent entries from the file
+        self._recent = None
+        self._recent_lock = threading.Lock()
+        buffer_size = settings.get('audit_recent_buffer_size', self.RECENT_BUFFER_SIZE)
+        if buffer_size > 0 and not read_only and not shared:
+            self._recent = deque(self._read_recent_entries(buffer_size), maxlen=buffer_size)
+        
+        self.stats = AuditStats(f"{self.audit_file}.stats.json",
+                                checkpoint_interval=settings.get('audit_stats_checkpoint_seconds', 5),
+                                lock=self._write_lock)
+        with self._write_lock:
+            if not self.stats.load() and not read_only:
+                # First start with statistics: count the existing trail once
+                self.stats.rebuild(self.iter_entries())
+        
+        if not read_only:
+            atexit.register(self.close)
+    
+    def _start_segments(self, settings: Dict[str, Any]):
+        """Enable rotation of the audit file into compressed segments"""
+        if self.index is None:
+            print(f"[Reaper Audit] WARNING: Audit segments are not supported for '{self.audit_format}' format. "
+                  "Keeping a single file.")
+            return
+        
+        self.segments = AuditSegmentManager(
+            self.audit_file,
+            self.audit_format,
+            max_bytes=settings.get('audit_segment_max_bytes', 0),
+            max_age_hours=settings.get('audit_segment_max_age_hours', 0),
+            compression=settings.get('audit_compression', 'gzip'),
+            retention_days=settings.get('audit_retention_days', 0),
+            retention_bytes=settings.get('audit_retention_max_bytes', 0),
+            maintenance=not self.read_only,
+            lock=self._write_lock
+        )
+    
+    def _start_writer(self, settings: Dict[str, Any]):
+        """Start the background writer so log_action only enqueues"""
+        if self.audit_format not in self.APPEND_FORMATS:
+            print(f"[Reaper Audit] WARNING: audit_async is not supported for '{self.audit_format}' format. "
+                  "Writing synchronously.")
+            return
+        
+        rotate = self._rotate_if_due if self.segments is not None else None
+        sink = self.store or FileAuditSink(self.audit_file, self.format_entry,
+                                           lock=self._write_lock, on_flushed=rotate)
+        self.writer = AuditWriter(
+            sink,
+            queue_size=settings.get('audit_queue_size', 10000),
+            batch_size=settings.get('audit_batch_size', 256),
+            fsync_policy=settings.get('audit_fsync_policy', 'interval'),
+            fsync_interval_ms=settings.get('audit_fsync_interval_ms', 1000),
+            fsync_every=settings.get('audit_fsync_every', 100)
+        )
+        self.writer.start()
     
     def ensure_audit_file_exists(self):
         """Create audit file and directory if they don't exist"""
@@ -21,9 +152,12 @@ class AuditTrailManager:
         if audit_dir and not os.path.exists(audit_dir):
             os.makedirs(audit_dir)
         
-        if not os.path.exists(self.audit_file):
+        # The SQLite store creates its own database file
+        if not os.path.exists(self.audit_file) and self.audit_format != 'sqlite':
             if self.audit_format == 'markdown':
                 self._initialize_markdown_file()
+            elif self.audit_format == 'jsonl':
+                open(self.audit_file, 'a').close()
             else:
                 with open(self.audit_file, 'w') as f:
                     json.dump([], f)
@@ -31,53 +165,131 @@ class AuditTrailManager:
     def _initialize_markdown_file(self):
         """Initialize markdown audit file with header"""
         with open(self.audit_file, 'w') as f:
-            f.write("# Reaper Agent Audit Trail\n\n")
-            f.write("This file contains a detailed audit trail of all security remediation actions.\n\n")
-            f.write("---\n\n")
+            f.write(self.MARKDOWN_HEADER)
     
     def log_action(self, event_data: Dict[str, Any], result: Dict[str, Any], 
                    api_responses: Optional[List] = None, dry_run: bool = False):
         """Log an action to the audit trail"""
-        if self.audit_format == 'markdown':
-            self._log_markdown(event_data, result, api_responses, dry_run)
+        if self.read_only:
+            raise RuntimeError("Audit trail was opened read-only")
+        entry = self._build_entry(event_data, result, api_responses, dry_run)
+        if self._recent is not None:
+            with self._recent_lock:
+                self._recent.append(entry)
+        self.stats.record(entry)
+        
+        pending = getattr(self._batches, 'entries', None)
+        if pending is not None:
+            pending.append(entry)
         else:
-            self._log_json(event_data, result, api_responses, dry_run)
+            self._write_entries([entry])
     
-    def _log_markdown(self, event_data: Dict[str, Any], result: Dict[str, Any], 
-                     api_responses: Optional[List] = None, dry_run: bool = False):
-        """Log action in markdown format"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S UTC")
-        mode = "DRY RUN" if dry_run else "LIVE"
+    @contextlib.contextmanager
+    def batch(self):
+        """Group the log_action calls made by this thread into a single audit write"""
+        if getattr(self._batches, 'entries', None) is not None:
+            # Nested batches join the outer one
+            yield
+            return
         
+        self._batches.entries = []
+        try:
+            yield
+        finally:
+            entries = self._batches.entries
+            self._batches.entries = None
+            if entries:
+                self._write_entries(entries)
+    
+    def _write_entries(self, entries: List[Dict[str, Any]]):
+        """Hand entries to the writer, store or audit file in one operation"""
+        if self.writer is not None:
+            for entry in entries:
+                self.writer.submit(entry)
+        elif self.store is not None:
+            self.store.write(entries)
+        else:
+            with self._write_lock:
+                if self.audit_format == 'markdown':
+                    self._log_markdown(entries)
+                elif self.audit_format == 'jsonl':
+                    self._log_jsonl(entries)
+                else:
+                    self._log_json(entries)
+                
+                if self.segments is not None:
+                    self._rotate_if_due(os.path.getsize(self.audit_file))
+    
+    def _rotate_if_due(self, size: int) -> bool:
+        """Seal the active file into a segment once it reaches its size or age bound"""
+        if not self.segments.due(size):
+            return False
+        
+        with self._write_lock:
+            # Another worker process may have rotated the file already
+            if not self.segments.due(os.path.getsize(self.audit_file)):
+                return False
+            with self._segment_lock:
+                records = len(self.index)
+                if records == 0:
+                    return False
+                self.segments.seal(records)
+                self.index.reset()
+                self.ensure_audit_file_exists()
+        return True
+    
+    def format_entry(self, entry: Dict[str, Any]) -> str:
+        """Render an entry as the text appended to the audit file"""
+        if self.audit_format == 'markdown':
+            return self._format_markdown(entry)
+        return self._format_jsonl(entry)
+    
+    @staticmethod
+    def _format_markdown(entry: Dict[str, Any]) -> str:
+        """Render an entry as a markdown action report"""
+        timestamp = datetime.fromisoformat(entry['timestamp']).strftime("%Y-%m-%d %H:%M:%S UTC")
+        mode = entry['mode'].replace('_', ' ')
+        event_data = entry['event_data']
+        result = entry['result']
+        
+        parts = [
+            f"## Action Report - {timestamp}\n\n",
+            f"**Mode:** {mode}\n\n",
+            f"**Event ID:** {event_data.get('event_id', 'N/A')}\n\n",
+            f"**Event Type:** {event_data.get('type', 'N/A')}\n\n",
+            f"**Status:** {result.get('status', 'Unknown')}\n\n",
+            "### Event Details\n",
+            "```json\n",
+            json.dumps(event_data, indent=2),
+            "\n```\n\n",
+            "### Processing Log\n"
+        ]
+        for log_entry in result.get('log', []):
+            parts.append(f"- {log_entry}\n")
+        parts.append("\n")
+        
+        if entry['api_responses']:
+            parts.append("### API Responses\n")
+            for response in entry['api_responses']:
+                parts.append("```json\n")
+                parts.append(json.dumps(response, indent=2))
+                parts.append("\n```\n\n")
+        
+        parts.append("---\n\n")
+        return "".join(parts)
+    
+    @staticmethod
+    def _format_jsonl(entry: Dict[str, Any]) -> str:
+        """Render an entry as one compact JSON line"""
+        return codec.dumps(entry) + "\n"
+    
+    def _log_markdown(self, new_entries: List[Dict[str, Any]]):
+        """Log actions in markdown format"""
         with open(self.audit_file, 'a') as f:
-            f.write(f"## Action Report - {timestamp}\n\n")
-            f.write(f"**Mode:** {mode}\n\n")
-            f.write(f"**Event ID:** {event_data.get('event_id', 'N/A')}\n\n")
-            f.write(f"**Event Type:** {event_data.get('type', 'N/A')}\n\n")
-            f.write(f"**Status:** {result.get('status', 'Unknown')}\n\n")
-            
-            f.write("### Event Details\n")
-            f.write("```json\n")
-            f.write(json.dumps(event_data, indent=2))
-            f.write("\n```\n\n")
-            
-            f.write("### Processing Log\n")
-            for log_entry in result.get('log', []):
-                f.write(f"- {log_entry}\n")
-            f.write("\n")
-            
-            if api_responses:
-                f.write("### API Responses\n")
-                for response in api_responses:
-                    f.write("```json\n")
-                    f.write(json.dumps(response, indent=2))
-                    f.write("\n```\n\n")
-            
-            f.write("---\n\n")
-    
-    def _log_json(self, event_data: Dict[str, Any], result: Dict[str, Any], 
-                 api_responses: Optional[List] = None, dry_run: bool = False):
-        """Log action in JSON format"""
+            f.write("".join(self._format_markdown(entry) for entry in new_entries))
+    
+    def _log_json(self, new_entries: List[Dict[str, Any]]):
+        """Log actions in JSON format"""
         # Read existing entries
         try:
             with open(self.audit_file, 'r') as f:
@@ -85,44 +297,438 @@ class AuditTrailManager:
         except (FileNotFoundError, json.JSONDecodeError):
             entries = []
         
-        # Create new entry
-        entry = {
+        entries.extend(new_entries)
+        
+        # Write back to file
+        with open(self.audit_file, 'w') as f:
+            json.dump(entries, f, indent=2)
+    
+    def _log_jsonl(self, new_entries: List[Dict[str, Any]]):
+        """Log actions in JSON Lines format (one compact record appended per line)"""
+        with open(self.audit_file, 'a') as f:
+            f.write("".join(self._format_jsonl(entry) for entry in new_entries))
+    
+    @staticmethod
+    def _build_entry(event_data: Dict[str, Any], result: Dict[str, Any], 
+                     api_responses: Optional[List] = None, dry_run: bool = False) -> Dict[str, Any]:
+        """Build a structured audit entry"""
+        return {
             "timestamp": datetime.now().isoformat(),
             "mode": "DRY_RUN" if dry_run else "LIVE",
             "event_data": event_data,
             "result": result,
             "api_responses": api_responses or []
         }
-        
-        entries.append(entry)
-        
-        # Write back to file
-        with open(self.audit_file, 'w') as f:
-            json.dump(entries, f, indent=2)
+    
+    def audit_watermark(self) -> int:
+        """Position of the last entry handed to the background writer (0 when writing synchronously)"""
+        return self.writer.watermark() if self.writer is not None else 0
+    
+    def flush(self, upto: Optional[int] = None) -> bool:
+        """
+        Block until every queued entry (or every entry up to an audit_watermark()) has
+        been written. Returns False if the background writer failed to write some of them
+        """
+        if self.writer is not None:
+            return self.writer.flush(upto)
+        return True
+    
+    def close(self):
+        """Drain the writer queue, fsync and release the audit file"""
+        if self.writer is not None:
+            self.writer.close()
+        elif self.store is not None:
+            self.store.close()
+        if self.segments is not None:
+            self.segments.close()
+        if self.index is not None:
+            self.index.close()
+        if not self.read_only:
+            self.stats.checkpoint()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get entry counts by event type, status, mode and severity"""
+        return self.stats.snapshot()
+    
+    def get_writer_stats(self) -> Dict[str, Any]:
+        """Get background writer statistics"""
+        if self.writer is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.writer.stats()}
     
     def get_recent_entries(self, limit: int = 10) -> List[Dict[str, Any]]:
-        """Get recent audit entries (for JSON format)"""
-        if self.audit_format != 'json':
+        """Get recent audit entries (all formats, oldest first)"""
+        if limit <= 0:
             return []
+        if self.is_buffered(limit):
+            with self._recent_lock:
+                return list(self._recent)[-limit:]
+        return self._read_recent_entries(limit)
+    
+    def is_buffered(self, limit: int) -> bool:
+        """Check whether the last `limit` entries are served from memory"""
+        return self._recent is not None and limit <= self._recent.maxlen
+    
+    def _read_recent_entries(self, limit: int) -> List[Dict[str, Any]]:
+        """Read the last `limit` entries from the audit trail"""
+        if self.store is not None:
+            return self.store.tail(limit)
         
+        if self.audit_format == 'json' or self._is_legacy_json_file():
+            return self._load_json_entries()[-limit:]
+        
+        total = self._total_records()
+        return self._decode_records(self._read_records(total - limit, total))
+    
+    def _load_json_entries(self) -> List[Dict[str, Any]]:
+        """Load every entry of a JSON array audit file"""
         try:
             with open(self.audit_file, 'r') as f:
-                entries = json.load(f)
-                return entries[-limit:]
+                return json.load(f)
         except (FileNotFoundError, json.JSONDecodeError):
             return []
     
+    def get_entries_page(self, page: int, page_size: int = 50) -> Dict[str, Any]:
+        """Get page `page` (0-based, oldest first) of a JSON Lines or markdown audit file"""
+        self._indexed_reader()
+        page = max(0, page)
+        page_size = max(1, page_size)
+        start = page * page_size
+        return {
+            "entries": self._decode_records(self._read_records(start, start + page_size)),
+            "page": page,
+            "page_size": page_size,
+            "total": self._total_records()
+        }
+    
+    def get_entries_since(self, cursor: int, limit: int = 50) -> Dict[str, Any]:
+        """
+        Get entries at or after record number `cursor` of a JSON Lines or markdown
+        audit file. Pass the returned next_cursor back to continue reading.
+        """
+        self._indexed_reader()
+        # Records removed by the retention policy are skipped
+        cursor = max(cursor, self._first_record())
+        records = self._read_records(cursor, cursor + max(1, limit))
+        return {
+            "entries": self._decode_records(records),
+            "next_cursor": cursor + len(records)
+        }
+    
+    def _indexed_reader(self) -> AuditFileIndex:
+        """Get the offset index, failing for formats that do not have one"""
+        if self.index is None:
+            raise ValueError(f"Paged reads require audit_format 'jsonl' or 'markdown', not '{self.audit_format}'")
+        return self.index
+    
+    def iter_entries(self, event_type: Optional[str] = None, status: Optional[str] = None,
+                     mode: Optional[str] = None, event_id: Optional[str] = None,
+                     target: Optional[str] = None, since: Optional[str] = None,
+                     until: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Stream entries oldest first that match the filters, for every audit format"""
+        entries = self.iter_entries_after(None, event_type=event_type, status=status, mode=mode,
+                                          event_id=event_id, target=target, since=since, until=until)
+        for _, entry in entries:
+            yield entry
+    
+    def iter_entries_after(self, cursor: Optional[int] = None, event_type: Optional[str] = None,
+                           status: Optional[str] = None, mode: Optional[str] = None,
+                           event_id: Optional[str] = None, target: Optional[str] = None,
+                           since: Optional[str] = None,
+                           until: Optional[str] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Stream (cursor, entry) pairs oldest first that match the filters, for every
+        audit format. Pass the cursor of the last entry received back to resume after it.
+        """
+        filters = {
+            "event_type": event_type,
+            "status": status,
+            "mode": mode,
+            "event_id": event_id,
+            "target": target
+        }
+        
+        if self.store is not None:
+            # SQLite cursors are row ids
+            yield from self.store.iter_rows(**filters, since=since, until=until, after=cursor,
+                                            chunk_size=self.READ_CHUNK_SIZE)
+            return
+        
+        if self.index is None or self._is_legacy_json_file():
+            # JSON array cursors are the number of entries already read
+            entries = enumerate(self._load_json_entries(), start=1)
+            entries = ((position, entry) for position, entry in entries if position > (cursor or 0))
+        else:
+            entries = self._iter_indexed_entries(since, cursor)
+        
+        for position, entry in entries:
+            timestamp = entry.get('timestamp', '')
+            if since is not None and timestamp < since:
+                continue
+            if until is not None and timestamp >= until:
+                # Entries are appended in time order
+                return
+            if self._entry_matches(entry, filters):
+                yield position, entry
+    
+    def _iter_indexed_entries(self, since: Optional[str] = None,
+                              cursor: Optional[int] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Stream (cursor, entry) pairs of a JSON Lines or markdown file, starting near
+        `since` or at record number `cursor`. Each cursor is the number of the next record.
+        """
+        position = max(cursor or 0, self._first_record())
+        total = self._total_records()
+        if since is not None:
+            position = max(position, self._bisect_timestamp(since, position, total))
+        
+        while position < total:
+            records = self._read_records(position, min(position + self.READ_CHUNK_SIZE, total))
+            if not records:
+                return
+            for raw in records:
+                position += 1
+                entry = self._decode_record(raw)
+                if entry is not None:
+                    yield position, entry
+    
+    def _bisect_timestamp(self, timestamp: str, low: int, high: int) -> int:
+        """Find the first record number whose timestamp is not before `timestamp`"""
+        while low < high:
+            middle = (low + high) // 2
+            decoded = self._decode_records(self._read_records(middle, middle + 1))
+            if decoded and decoded[0].get('timestamp', '') < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+    
+    @staticmethod
+    def _entry_matches(entry: Dict[str, Any], filters: Dict[str, Optional[str]]) -> bool:
+        """Check an entry against equality filters"""
+        event_data = entry.get('event_data', {})
+        values = {
+            "event_type": event_data.get('type'),
+            "status": entry.get('result', {}).get('status'),
+            "mode": entry.get('mode'),
+            "event_id": event_data.get('event_id'),
+            "target": entry_target(event_data)
+        }
+        return all(value is None or values[name] == value for name, value in filters.items())
+    
+    def render_report(self, entries: Iterable[Dict[str, Any]]) -> Iterator[str]:
+        """Render entries as a markdown audit report, one action report at a time"""
+        yield self.MARKDOWN_HEADER
+        for entry in entries:
+            yield self._format_markdown(entry)
+    
+    def render_ndjson(self, entries: Iterable[Tuple[int, Dict[str, Any]]]) -> Iterator[str]:
+        """
+        Render (cursor, entry) pairs as NDJSON, one entry per line with its resume
+        cursor, yielding one chunk per READ_CHUNK_SIZE entries
+        """
+        lines = []
+        for cursor, entry in entries:
+            lines.append(codec.dumps({"cursor": cursor, **entry}))
+            if len(lines) >= self.READ_CHUNK_SIZE:
+                yield "\n".join(lines) + "\n"
+                lines = []
+        if lines:
+            yield "\n".join(lines) + "\n"
+    
+    def _first_record(self) -> int:
+        """Global number of the oldest record still stored"""
+        if self.segments is None:
+            return 0
+        segments = self.segments.segments()
+        return segments[0]['first_record'] if segments else self.segments.active_first_record
+    
+    def _total_records(self) -> int:
+        """Global number of records written, including sealed segments"""
+        with self._segment_lock:
+            base = self.segments.active_first_record if self.segments is not None else 0
+            return base + len(self.index)
+    
+    def _read_records(self, start: int, stop: int) -> List[bytes]:
+        """Read raw records [start, stop) across sealed segments and the active file"""
+        if self.segments is None:
+            return self.index.read(start, stop)
+        
+        with self._segment_lock:
+            base = self.segments.active_first_record
+            records = []
+            if start < base:
+                for segment in self.segments.segments():
+                    first = segment['first_record']
+                    last = first + segment['records']
+                    if last <= start or first >= stop:
+                        continue
+                    segment_records = self.segments.read_records(segment)
+                    records.extend(segment_records[max(start, first) - first:min(stop, last) - first])
+            if stop > base:
+                records.extend(self.index.read(max(start, base) - base, stop - base))
+            return records
+    
+    def _decode_records(self, records: List[bytes]) -> List[Dict[str, Any]]:
+        """Turn raw indexed records into structured entries"""
+        entries = (self._decode_record(raw) for raw in records)
+        return [entry for entry in entries if entry is not None]
+    
+    def _decode_record(self, raw: bytes) -> Optional[Dict[str, Any]]:
+        """Turn one raw indexed record into a structured entry (None if it is damaged)"""
+        try:
+            if self.audit_format == 'markdown':
+                return self._parse_markdown(raw.decode('utf-8'))
+            return codec.loads(raw)
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            return None
+    
+    @classmethod
+    def _parse_markdown(cls, text: str) -> Dict[str, Any]:
+        """Rebuild a structured entry from a markdown action report"""
+        lines = text.split("\n")
+        fields, event_data, log, api_responses = cls._parse_markdown_sections(lines[1:])
+        if not event_data:
+            event_data = {
+                "event_id": fields.get('Event ID', 'N/A'),
+                "type": fields.get('Event Type', 'N/A')
+            }
+        return {
+            "timestamp": cls._parse_markdown_header(lines[0]),
+            "mode": fields.get('Mode', '').replace(' ', '_'),
+            "event_data": event_data,
+            "result": {"status": fields.get('Status', 'Unknown'), "log": log},
+            "api_responses": api_responses
+        }
+    
+    @staticmethod
+    def _parse_markdown_header(header: str) -> str:
+        """Turn an '## Action Report - <time> UTC' heading back into an ISO timestamp"""
+        header = header[len("## Action Report - "):].strip()
+        try:
+            return datetime.strptime(header, "%Y-%m-%d %H:%M:%S UTC").isoformat()
+        except ValueError:
+            return header
+    
+    @staticmethod
+    def _parse_markdown_sections(lines: List[str]) -> Tuple[Dict[str, str], Dict[str, Any], List[str], List[Any]]:
+        """
+        Read the **Field:** lines, the Event Details and API Responses JSON blocks and
+        the Processing Log of a markdown action report
+        """
+        fields = {}
+        blocks = {'details': [], 'api': []}
+        log = []
+        sections = {"### Event Details": 'details', "### Processing Log": 'log', "### API Responses": 'api'}
+        section = None
+        block = None
+        
+        for line in lines:
+            if block is not None:
+                if line == "```":
+                    if section in blocks:
+                        blocks[section].append("\n".join(block))
+                    block = None
+                else:
+                    block.append(line)
+            elif line.startswith("```json"):
+                block = []
+            elif line.startswith("**") and ":** " in line:
+                name, value = line[2:].split(":** ", 1)
+                fields[name] = value
+            elif line in sections:
+                section = sections[line]
+            elif section == 'log' and line.startswith("- "):
+                log.append(line[2:])
+        
+        payloads = {name: [payload for payload in map(_loads_or_none, texts) if payload is not None]
+                    for name, texts in blocks.items()}
+        event_data = payloads['details'][-1] if payloads['details'] else {}
+        return fields, event_data, log, payloads['api']
+    
+    def query_entries(self, **filters) -> Dict[str, Any]:
+        """
+        Query entries by type, status, mode, event_id, target and time range
+        with keyset pagination (SQLite format only)
+        """
+        if self.store is None:
+            raise ValueError(f"Filtered queries require audit_format 'sqlite', not '{self.audit_format}'")
+        return self.store.query(**filters)
+    
+    def _is_legacy_json_file(self) -> bool:
+        """Check whether the audit file holds a JSON array written by the 'json' format"""
+        try:
+            with open(self.audit_file, 'rb') as f:
+                head = f.read(64).lstrip()
+        except FileNotFoundError:
+            return False
+        return head.startswith(b"[")
+    
+    def _migrate_legacy_json(self):
+        """Convert a JSON array audit file to JSON Lines in place"""
+        if not self._is_legacy_json_file():
+            return
+        
+        try:
+            with open(self.audit_file, 'r') as f:
+                entries = json.load(f)
+        except json.JSONDecodeError as e:
+            print(f"[Reaper Audit] WARNING: Could not migrate '{self.audit_file}' to JSON Lines: {e}")
+            return
+        
+        tmp_file = f"{self.audit_file}.migrating"
+        with open(tmp_file, 'w') as f:
+            for entry in entries:
+                f.write(self._format_jsonl(entry))
+        os.replace(tmp_file, self.audit_file)
+        print(f"[Reaper Audit] Migrated {len(entries)} JSON entries in '{self.audit_file}' to JSON Lines")
+    
+    def _import_markdown_trail(self, markdown_file: str):
+        """
+        Import the action reports of a markdown audit trail into a new JSON Lines
+        file. The markdown file is renamed to `<markdown_file>.imported` afterwards,
+        so a restart never imports it again, not even once rotation emptied the file
+        """
+        if not os.path.exists(markdown_file):
+            return
+        if os.path.getsize(self.audit_file) > 0 or os.path.exists(f"{self.audit_file}.manifest.json"):
+            print(f"[Reaper Audit] WARNING: Not importing '{markdown_file}': '{self.audit_file}' already has entries")
+            return
+        
+        reports = AuditFileIndex(markdown_file, 'markdown', persist=False)
+        try:
+            records = reports.read(0, len(reports))
+            entries = [self._parse_markdown(raw.decode('utf-8', errors='replace')) for raw in records]
+        finally:
+            reports.close()
+        
+        tmp_file = f"{self.audit_file}.migrating"
+        with open(tmp_file, 'w') as f:
+            for entry in entries:
+                f.write(self._format_jsonl(entry))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.audit_file)
+        os.replace(markdown_file, f"{markdown_file}.imported")
+        print(f"[Reaper Audit] Imported {len(entries)} markdown entries from '{markdown_file}' into '{self.audit_file}'")
+    
     def get_file_info(self) -> Dict[str, Any]:
         """Get audit file information"""
         if os.path.exists(self.audit_file):
             stat = os.stat(self.audit_file)
-            return {
+            info = {
                 "format": self.audit_format,
                 "file": self.audit_file,
                 "size_bytes": stat.st_size,
                 "last_modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
                 "exists": True
             }
+            if self.segments is not None:
+                segments = self.segments.segments()
+                info["segments"] = len(segments)
+                info["segments_bytes"] = sum(segment['bytes'] for segment in segments)
+                info["total_bytes"] = stat.st_size + info["segments_bytes"]
+            return info
         else:
             return {
                 "format": self.audit_format,
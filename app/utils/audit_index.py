@@ -0,0 +1,204 @@
+"""
+Memory-mapped record offset index for append-only audit files
+"""
+import mmap
+import os
+import threading
+from array import array
+from typing import List
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+
+class AuditFileIndex:
+    """
+    Maintains a sidecar index (record number -> byte offset) for an audit file.
+
+    Only bytes appended since the last refresh are scanned, and reads slice
+    records straight out of a memory map, so "last N", "page K" and "since
+    cursor" reads touch only the bytes they return. A record is indexed once it
+    is complete: a JSON Lines record ends with a newline, a markdown action
+    report ends with its '---' separator.
+
+    Several worker processes may index the same file: each keeps its own
+    offsets, appends to the sidecar only what is not there yet, and notices
+    when the file was replaced by a rotation in another process.
+    """
+
+    # (record start marker, record terminator) per format
+    FORMATS = {
+        'jsonl': (b"", b"\n"),
+        'markdown': (b"## Action Report", b"\n---\n\n")
+    }
+
+    def __init__(self, path: str, audit_format: str, persist: bool = True):
+        if audit_format not in self.FORMATS:
+            raise ValueError(f"Offset index is not supported for '{audit_format}' format")
+
+        self.path = path
+        self.index_path = f"{path}.idx"
+        self.start_marker, self.terminator = self.FORMATS[audit_format]
+        # Read-only users (e.g. CLI exports) use the sidecar but never write it
+        self.persist = persist
+
+        self._lock = threading.Lock()
+        self._offsets = array('Q')
+        self._end = 0  # byte offset just past the last complete record
+        self._mmap = None
+        self._mapped_size = 0
+        self._inode = None
+        self._loaded = False
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._offsets)
+
+    def read(self, start: int, stop: int) -> List[bytes]:
+        """Get raw records [start, stop) in file order"""
+        with self._lock:
+            self._refresh()
+            count = len(self._offsets)
+            start = max(0, start)
+            stop = min(stop, count)
+            records = []
+            for i in range(start, stop):
+                end = self._offsets[i + 1] if i + 1 < count else self._end
+                records.append(self._mmap[self._offsets[i]:end])
+            return records
+
+    def reset(self):
+        """Drop the index, e.g. after the audit file was replaced"""
+        with self._lock:
+            self._close_map()
+            self._offsets = array('Q')
+            self._end = 0
+            self._inode = None
+            self._loaded = False
+            if self.persist and os.path.exists(self.index_path):
+                os.remove(self.index_path)
+
+    def close(self):
+        """Release the memory map"""
+        with self._lock:
+            self._close_map()
+
+    def _close_map(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+            self._mapped_size = 0
+
+    def _load(self, size: int):
+        """Load the sidecar index, discarding it if it does not match the file"""
+        self._loaded = True
+        offsets = array('Q')
+        try:
+            with open(self.index_path, 'rb') as f:
+                data = f.read()
+            offsets.frombytes(data[:len(data) - len(data) % offsets.itemsize])
+        except FileNotFoundError:
+            pass
+
+        valid = all(a < b for a, b in zip(offsets, offsets[1:])) and (not offsets or offsets[-1] < size)
+        for offset in (offsets[:1] + offsets[-1:]) if valid else ():
+            # Every record starts with the marker, right after a newline
+            if offset > 0 and self._mmap[offset - 1:offset] != b"\n":
+                valid = False
+            if self._mmap[offset:offset + len(self.start_marker)] != self.start_marker:
+                valid = False
+
+        if not valid:
+            offsets = array('Q')
+
+        # Re-scan from the start of the last indexed record, whose end is not stored
+        if offsets:
+            self._end = offsets.pop()
+        self._offsets = offsets
+        self._rewrite_sidecar()
+
+    def _rewrite_sidecar(self):
+        if not self.persist:
+            return
+        try:
+            with open(self.index_path, 'wb') as f:
+                self._offsets.tofile(f)
+        except OSError:
+            pass
+
+    def _refresh(self):
+        """Index records appended since the last refresh"""
+        try:
+            stat = os.stat(self.path)
+            size, inode = stat.st_size, stat.st_ino
+        except FileNotFoundError:
+            size, inode = 0, None
+
+        if size < self._end or (self._inode is not None and inode != self._inode):
+            # File was truncated or replaced (e.g. rotated by another process); start over
+            self._close_map()
+            self._offsets = array('Q')
+            self._end = 0
+            self._loaded = False
+        self._inode = inode
+
+        if size == 0:
+            self._close_map()
+            return
+
+        if size != self._mapped_size:
+            self._close_map()
+            with open(self.path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped_size = size
+
+        if not self._loaded:
+            self._load(size)
+
+        if size > self._end:
+            self._scan(size)
+
+    def _scan(self, size: int):
+        """Find complete records in the unindexed tail of the file"""
+        data = self._mmap
+        terminator = self.terminator
+
+        last = data.rfind(terminator, self._end, size)
+        if last == -1:
+            return
+        complete_end = last + len(terminator)
+
+        new_offsets = array('Q')
+        if self.start_marker:
+            marker = b"\n" + self.start_marker
+            if self._end == 0 and data[:len(self.start_marker)] == self.start_marker:
+                new_offsets.append(0)
+            pos = data.find(marker, max(0, self._end - 1), complete_end)
+            while pos != -1:
+                new_offsets.append(pos + 1)
+                pos = data.find(marker, pos + 1, complete_end)
+        else:
+            pos = self._end
+            while pos < complete_end:
+                new_offsets.append(pos)
+                pos = data.find(terminator, pos, complete_end) + len(terminator)
+
+        self._offsets.extend(new_offsets)
+        self._end = complete_end
+        self._append_sidecar()
+
+    def _append_sidecar(self):
+        """Append the offsets the sidecar lacks; other processes may have written some already"""
+        if not self.persist:
+            return
+        try:
+            with open(self.index_path, 'ab') as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                stored = f.seek(0, os.SEEK_END) // self._offsets.itemsize
+                self._offsets[stored:].tofile(f)
+        except OSError:
+            pass
@@ -0,0 +1,276 @@
+"""
+Segmented audit log: rotation, background compression and retention
+"""
+import contextlib
+import gzip
+import json
+import lzma
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, ContextManager, Dict, List, Optional
+
+
+class AuditSegmentManager:
+    """
+    Seals the active audit file into numbered segments once it exceeds a size
+    or age bound, and tracks them in a manifest (<audit_file>.manifest.json).
+
+    Sealing is a rename, so it never blocks a request; sealed segments are
+    compressed with gzip or lzma and old ones are removed by the retention
+    policy on a background thread. Records keep global numbers across
+    segments: each segment stores the number of its first record. Manifest
+    updates happen under the audit write lock and every process reloads the
+    manifest when it changes, so several workers can share one audit trail.
+    """
+
+    COMPRESSORS = {
+        'gzip': ('.gz', gzip.open),
+        'lzma': ('.xz', lzma.open),
+        'none': ('', open)
+    }
+
+    _STOP = object()
+
+    def __init__(self, audit_file: str, audit_format: str, max_bytes: int = 0,
+                 max_age_hours: float = 0, compression: str = 'gzip',
+                 retention_days: float = 0, retention_bytes: int = 0, maintenance: bool = True,
+                 lock: Optional[ContextManager] = None):
+        if compression not in self.COMPRESSORS:
+            raise ValueError(f"Unknown audit compression '{compression}'. "
+                             f"Expected one of: {', '.join(self.COMPRESSORS)}")
+
+        self.audit_file = audit_file
+        self.audit_format = audit_format
+        self.manifest_file = f"{audit_file}.manifest.json"
+        self.max_bytes = max_bytes
+        self.max_age = max_age_hours * 3600
+        self.compression = compression
+        self.retention_days = retention_days
+        self.retention_bytes = retention_bytes
+        self.lock = lock or contextlib.nullcontext()
+
+        self._lock = threading.Lock()
+        self._manifest_stamp = None
+        self._manifest = self._load_manifest()
+        self._cache = None  # (seq, records) of the last segment read
+
+        self._jobs = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="reaper-audit-segments", daemon=True)
+        # Read-only users (e.g. CLI exports) leave compression and retention to the agent
+        if not maintenance:
+            return
+        self._thread.start()
+
+        # Resume work interrupted by a restart
+        for segment in self._manifest['segments']:
+            if segment['compressed'] is None and self.compression != 'none':
+                self._jobs.put(segment['seq'])
+        self._jobs.put(None)
+
+    def _manifest_version(self) -> Optional[tuple]:
+        """Identify the manifest file on disk; it is replaced atomically on every save"""
+        try:
+            stat = os.stat(self.manifest_file)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        self._manifest_stamp = self._manifest_version()
+        try:
+            with open(self.manifest_file, 'r') as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            manifest = {"next_seq": 1, "active_first_record": 0, "segments": []}
+        manifest.setdefault('active_since', time.time())
+        return manifest
+
+    def _sync_manifest(self):
+        """Pick up changes saved by another worker process (call with self._lock held)"""
+        if self._manifest_version() != self._manifest_stamp:
+            self._manifest = self._load_manifest()
+
+    def _save_manifest(self):
+        tmp_file = f"{self.manifest_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(self._manifest, f, indent=2)
+        os.replace(tmp_file, self.manifest_file)
+        self._manifest_stamp = self._manifest_version()
+
+    @property
+    def active_first_record(self) -> int:
+        """Global number of the first record in the active file"""
+        with self._lock:
+            self._sync_manifest()
+            return self._manifest['active_first_record']
+
+    def segments(self) -> List[Dict[str, Any]]:
+        """Get the sealed segments, oldest first"""
+        with self._lock:
+            self._sync_manifest()
+            return [dict(segment) for segment in self._manifest['segments']]
+
+    def due(self, size: int) -> bool:
+        """Check whether the active file has reached its size or age bound"""
+        if self.max_bytes and size >= self.max_bytes:
+            return True
+        with self._lock:
+            self._sync_manifest()
+            active_since = self._manifest['active_since']
+        return bool(self.max_age) and time.time() - active_since >= self.max_age
+
+    def seal(self, records: int):
+        """
+        Rename the active file into a new segment and queue it for compression.
+        The caller must hold the audit write lock.
+        """
+        with self._lock:
+            self._sync_manifest()
+            seq = self._manifest['next_seq']
+            path = f"{self.audit_file}.{seq:06d}"
+            os.replace(self.audit_file, path)
+
+            self._manifest['segments'].append({
+                "seq": seq,
+                "file": os.path.basename(path),
+                "first_record": self._manifest['active_first_record'],
+                "records": records,
+                "bytes": os.path.getsize(path),
+                "sealed_at": datetime.now().isoformat(),
+                "compressed": None
+            })
+            self._manifest['next_seq'] = seq + 1
+            self._manifest['active_first_record'] += records
+            self._manifest['active_since'] = time.time()
+            self._save_manifest()
+
+        self._jobs.put(seq)
+
+    def read_records(self, segment: Dict[str, Any]) -> List[bytes]:
+        """Read and split all records of a sealed segment"""
+        seq = segment['seq']
+        with self._lock:
+            if self._cache is not None and self._cache[0] == seq:
+                return self._cache[1]
+
+        # A segment may be swapped for its compressed copy while we read it; retry once
+        for _ in range(2):
+            current = self._find(seq)
+            if current is None:
+                return []
+            opener = self.COMPRESSORS[current['compressed'] or 'none'][1]
+            path = os.path.join(os.path.dirname(self.audit_file), current['file'])
+            try:
+                with opener(path, 'rb') as f:
+                    data = f.read()
+                break
+            except FileNotFoundError:
+                continue
+        else:
+            return []
+
+        records = self.split_records(data, self.audit_format)
+        with self._lock:
+            self._cache = (seq, records)
+        return records
+
+    def _find(self, seq: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._sync_manifest()
+            return next((dict(s) for s in self._manifest['segments'] if s['seq'] == seq), None)
+
+    @staticmethod
+    def split_records(data: bytes, audit_format: str) -> List[bytes]:
+        """Split a whole segment into records"""
+        if audit_format == 'markdown':
+            marker = b"\n## Action Report"
+            starts = [0] if data.startswith(b"## Action Report") else []
+            pos = data.find(marker)
+            while pos != -1:
+                starts.append(pos + 1)
+                pos = data.find(marker, pos + 1)
+            ends = starts[1:] + [len(data)]
+            return [data[start:end] for start, end in zip(starts, ends)]
+        return [line + b"\n" for line in data.split(b"\n") if line.strip()]
+
+    def close(self):
+        """Finish pending compression and retention work"""
+        if self._thread.is_alive():
+            self._jobs.put(self._STOP)
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            seq = self._jobs.get()
+            if seq is self._STOP:
+                return
+            try:
+                if seq is not None:
+                    self._compress(seq)
+                self._apply_retention()
+            except OSError as e:
+                print(f"[Reaper Audit] ERROR: Segment maintenance failed: {e}")
+
+    def _compress(self, seq: int):
+        """Compress a sealed segment and swap it into the manifest"""
+        segment = self._find(seq)
+        if segment is None or segment['compressed'] is not None or self.compression == 'none':
+            return
+
+        suffix, opener = self.COMPRESSORS[self.compression]
+        directory = os.path.dirname(self.audit_file)
+        source = os.path.join(directory, segment['file'])
+        target = f"{source}{suffix}"
+        tmp_file = f"{target}.{os.getpid()}.tmp"
+        try:
+            with open(source, 'rb') as src, opener(tmp_file, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+        except FileNotFoundError:
+            # Another worker process compressed or expired it first
+            return
+
+        with self.lock, self._lock:
+            self._sync_manifest()
+            current = next((s for s in self._manifest['segments'] if s['seq'] == seq), None)
+            if current is None or current['compressed'] is not None:
+                os.remove(tmp_file)
+                return
+            os.replace(tmp_file, target)
+            current['file'] = os.path.basename(target)
+            current['bytes'] = os.path.getsize(target)
+            current['compressed'] = self.compression
+            self._save_manifest()
+            os.remove(source)
+
+    def _apply_retention(self):
+        """Remove the oldest sealed segments beyond the age or total size limit"""
+        if not self.retention_days and not self.retention_bytes:
+            return
+
+        cutoff = datetime.now() - timedelta(days=self.retention_days)
+        expired = []
+        with self.lock, self._lock:
+            self._sync_manifest()
+            segments = self._manifest['segments']
+            total = sum(segment['bytes'] for segment in segments)
+            while segments:
+                oldest = segments[0]
+                too_old = self.retention_days and datetime.fromisoformat(oldest['sealed_at']) < cutoff
+                too_big = self.retention_bytes and total > self.retention_bytes
+                if not (too_old or too_big):
+                    break
+                total -= oldest['bytes']
+                expired.append(segments.pop(0))
+            if expired:
+                self._save_manifest()
+
+        directory = os.path.dirname(self.audit_file)
+        for segment in expired:
+            try:
+                os.remove(os.path.join(directory, segment['file']))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,176 @@
+"""
+Incrementally maintained audit statistics with an on-disk checkpoint
+"""
+import contextlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, ContextManager, Dict, Iterable, Optional
+
+
+class AuditStats:
+    """
+    Running totals of audit entries by event type, status, mode and severity.
+
+    Each logged entry bumps a few counters in memory. Counts are merged into a
+    small JSON checkpoint (<audit_file>.stats.json) every few seconds and on
+    shutdown, so totals survive restarts without rescanning the audit trail.
+    Every process only adds the counts it gathered since its last checkpoint,
+    so several worker processes can share one checkpoint file; snapshot()
+    reloads the file when another process has replaced it.
+    """
+
+    DIMENSIONS = ('event_type', 'status', 'mode', 'severity')
+
+    def __init__(self, path: str, checkpoint_interval: float = 5.0,
+                 lock: Optional[ContextManager] = None):
+        self.path = path
+        self.checkpoint_interval = checkpoint_interval
+        # Held while the checkpoint file is read, merged and replaced
+        self.lock = lock or contextlib.nullcontext()
+
+        self._lock = threading.Lock()
+        self._saved = self._empty()    # totals as of the last checkpoint
+        self._pending = self._empty()  # counted by this process since then
+        self._inflight = self._empty()  # pending counts being merged by checkpoint()
+        self._checkpointed_at = None
+        self._last_checkpoint = time.monotonic()
+        self._loaded_stamp = None  # (inode, mtime) of the checkpoint file as last loaded
+        self._timer: Optional[threading.Timer] = None  # checkpoint of counts recorded since the last one
+
+    @classmethod
+    def _empty(cls) -> Dict[str, Any]:
+        counts = {"total": 0}
+        for dimension in cls.DIMENSIONS:
+            counts[dimension] = {}
+        return counts
+
+    @staticmethod
+    def _keys(entry: Dict[str, Any]) -> Dict[str, str]:
+        """Counter keys of an entry, one per dimension"""
+        event_data = entry.get('event_data', {})
+        return {
+            "event_type": event_data.get('type') or 'unknown',
+            "status": entry.get('result', {}).get('status') or 'unknown',
+            "mode": entry.get('mode') or 'unknown',
+            "severity": event_data.get('severity') or 'unknown'
+        }
+
+    @classmethod
+    def _add(cls, counts: Dict[str, Any], other: Dict[str, Any]):
+        counts['total'] += other.get('total', 0)
+        for dimension in cls.DIMENSIONS:
+            target = counts[dimension]
+            for key, value in other.get(dimension, {}).items():
+                target[key] = target.get(key, 0) + value
+
+    def _count(self, counts: Dict[str, Any], entry: Dict[str, Any]):
+        counts['total'] += 1
+        for dimension, key in self._keys(entry).items():
+            counts[dimension][key] = counts[dimension].get(key, 0) + 1
+
+    def record(self, entry: Dict[str, Any]):
+        """Count a logged entry and checkpoint if the interval has passed"""
+        with self._lock:
+            self._count(self._pending, entry)
+            due = time.monotonic() - self._last_checkpoint >= self.checkpoint_interval
+            if not due and self._timer is None:
+                # Without further entries the counts still reach the checkpoint (and other workers) in time
+                self._timer = threading.Timer(self.checkpoint_interval, self.checkpoint)
+                self._timer.daemon = True
+                self._timer.start()
+        if due:
+            self.checkpoint()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the current totals, including counts other processes have checkpointed"""
+        self._reload_if_changed()
+        with self._lock:
+            counts = self._empty()
+            self._add(counts, self._saved)
+            self._add(counts, self._pending)
+            self._add(counts, self._inflight)
+            counts['checkpointed_at'] = self._checkpointed_at
+        return counts
+
+    def _reload_if_changed(self):
+        """Load the checkpoint if it was replaced (e.g. by another process) since we last read it"""
+        try:
+            info = os.stat(self.path)
+        except OSError:
+            return
+        if (info.st_ino, info.st_mtime_ns) == self._loaded_stamp:
+            return
+        with self.lock:
+            self.load()
+
+    def load(self) -> bool:
+        """Load the checkpoint; returns False if there is none"""
+        try:
+            with open(self.path, 'r') as f:
+                info = os.fstat(f.fileno())
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except json.JSONDecodeError as e:
+            print(f"[Reaper Audit] WARNING: Ignoring corrupt statistics checkpoint '{self.path}': {e}")
+            return False
+
+        counts = self._empty()
+        self._add(counts, data)
+        with self._lock:
+            self._saved = counts
+            self._checkpointed_at = data.get('checkpointed_at')
+            self._loaded_stamp = (info.st_ino, info.st_mtime_ns)
+        return True
+
+    def rebuild(self, entries: Iterable[Dict[str, Any]]):
+        """Count existing entries once, e.g. on the first start with statistics enabled"""
+        counts = self._empty()
+        for entry in entries:
+            self._count(counts, entry)
+        with self._lock:
+            self._saved = counts
+        self._save(counts)
+
+    def checkpoint(self):
+        """Merge the counts gathered since the last checkpoint into the checkpoint file"""
+        with self.lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                pending = self._inflight = self._pending
+                self._pending = self._empty()
+                self._last_checkpoint = time.monotonic()
+
+            # Other worker processes may have added their counts since we last looked
+            self.load()
+            if pending['total'] == 0:
+                return
+            with self._lock:
+                counts = self._empty()
+                self._add(counts, self._saved)
+                self._add(counts, pending)
+            try:
+                self._save(counts)
+            except OSError as e:
+                print(f"[Reaper Audit] ERROR: Could not write statistics checkpoint: {e}")
+                with self._lock:
+                    self._add(self._pending, pending)
+                    self._inflight = self._empty()
+                return
+            with self._lock:
+                self._saved = counts
+                self._inflight = self._empty()
+
+    def _save(self, counts: Dict[str, Any]):
+        checkpointed_at = datetime.now().isoformat()
+        tmp_file = f"{self.path}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump({**counts, "checkpointed_at": checkpointed_at}, f, indent=2)
+        os.replace(tmp_file, self.path)
+        with self._lock:
+            self._checkpointed_at = checkpointed_at
@@ -0,0 +1,175 @@
+"""
+Indexed SQLite audit store
+"""
+import sqlite3
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from . import codec
+
+
+def entry_target(event_data: Dict[str, Any]) -> Optional[str]:
+    """Resource an event acts on (bucket or user), used for per-target lookups"""
+    return event_data.get('bucket_name') or event_data.get('user')
+
+
+class SQLiteAuditStore:
+    """
+    Stores audit entries in SQLite (WAL mode) with indexed lookup columns.
+
+    Implements the same write/flush/close interface as FileAuditSink so it can
+    be used directly or behind the background AuditWriter.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS audit_entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            event_id TEXT,
+            event_type TEXT,
+            status TEXT,
+            mode TEXT,
+            severity TEXT,
+            target TEXT,
+            record TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_audit_event_id ON audit_entries (event_id);
+        CREATE INDEX IF NOT EXISTS idx_audit_event_type ON audit_entries (event_type, id);
+        CREATE INDEX IF NOT EXISTS idx_audit_status ON audit_entries (status, id);
+        CREATE INDEX IF NOT EXISTS idx_audit_mode ON audit_entries (mode, id);
+        CREATE INDEX IF NOT EXISTS idx_audit_target ON audit_entries (target, id);
+        CREATE INDEX IF NOT EXISTS idx_audit_timestamp ON audit_entries (timestamp);
+    """
+
+    # Maps query filter names to indexed columns
+    FILTER_COLUMNS = {
+        "event_type": "event_type",
+        "status": "status",
+        "mode": "mode",
+        "event_id": "event_id",
+        "target": "target"
+    }
+
+    MAX_PAGE_SIZE = 1000
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        # Worker processes share the database; wait for their write transactions
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        self._conn.commit()
+
+    def _row(self, entry: Dict[str, Any]) -> tuple:
+        """Extract the indexed columns from an entry"""
+        event_data = entry.get('event_data', {})
+        return (
+            entry.get('timestamp'),
+            event_data.get('event_id'),
+            event_data.get('type'),
+            entry.get('result', {}).get('status'),
+            entry.get('mode'),
+            event_data.get('severity'),
+            entry_target(event_data),
+            codec.dumps(entry)
+        )
+
+    def write(self, entries: List[Dict[str, Any]]):
+        """Insert a batch of entries in a single transaction"""
+        rows = [self._row(entry) for entry in entries]
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO audit_entries "
+                    "(timestamp, event_id, event_type, status, mode, severity, target, record) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+
+    def flush(self, fsync: bool = False):
+        """Entries are committed per batch, so there is nothing to flush"""
+        pass
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def query(self, event_type: Optional[str] = None, status: Optional[str] = None,
+              mode: Optional[str] = None, event_id: Optional[str] = None,
+              target: Optional[str] = None, since: Optional[str] = None,
+              until: Optional[str] = None, cursor: Optional[int] = None,
+              limit: int = 50, ascending: bool = False) -> Dict[str, Any]:
+        """
+        Query entries newest first (or oldest first) using keyset pagination.
+        Pass the returned next_cursor back as cursor to get the following page.
+        """
+        limit = max(1, min(limit, self.MAX_PAGE_SIZE))
+        rows = self._select(event_type, status, mode, event_id, target, since, until,
+                            cursor, limit + 1, ascending)
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return {
+            "entries": [codec.loads(record) for _, record in rows],
+            "next_cursor": rows[-1][0] if has_more else None
+        }
+
+    def iter_rows(self, event_type: Optional[str] = None, status: Optional[str] = None,
+                  mode: Optional[str] = None, event_id: Optional[str] = None,
+                  target: Optional[str] = None, since: Optional[str] = None,
+                  until: Optional[str] = None, after: Optional[int] = None,
+                  chunk_size: int = 500) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Stream (id, entry) pairs oldest first, reading `chunk_size` rows at a time"""
+        while True:
+            rows = self._select(event_type, status, mode, event_id, target, since, until,
+                                after, chunk_size, True)
+            for row_id, record in rows:
+                yield row_id, codec.loads(record)
+            if len(rows) < chunk_size:
+                return
+            after = rows[-1][0]
+
+    def _select(self, event_type, status, mode, event_id, target, since, until,
+                cursor, limit, ascending) -> List[tuple]:
+        """Fetch (id, record) rows matching the filters, after `cursor` in the given order"""
+        filters = {
+            "event_type": event_type,
+            "status": status,
+            "mode": mode,
+            "event_id": event_id,
+            "target": target
+        }
+        clauses = []
+        params = []
+        for name, value in filters.items():
+            if value is not None:
+                clauses.append(f"{self.FILTER_COLUMNS[name]} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        if cursor is not None:
+            clauses.append("id > ?" if ascending else "id < ?")
+            params.append(cursor)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        order = "ASC" if ascending else "DESC"
+        sql = f"SELECT id, record FROM audit_entries {where} ORDER BY id {order} LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def tail(self, limit: int) -> List[Dict[str, Any]]:
+        """Get the most recent entries in chronological order"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT record FROM audit_entries ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [codec.loads(record) for (record,) in reversed(rows)]
@@ -0,0 +1,266 @@
+"""
+Background audit writer with bounded queue and group commit
+"""
+import contextlib
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, ContextManager, Dict, List, Optional, Tuple
+
+
+class FileAuditSink:
+    """Appends formatted audit entries to a file kept open between batches"""
+
+    def __init__(self, path: str, formatter: Callable[[Dict[str, Any]], str],
+                 lock: Optional[ContextManager] = None,
+                 on_flushed: Optional[Callable[[int], bool]] = None):
+        self.path = path
+        self.formatter = formatter
+        # Held while a batch is written so batches of several processes never interleave
+        self.lock = lock or contextlib.nullcontext()
+        # Called with the file size after each flush; returns True if the file was rotated away
+        self.on_flushed = on_flushed
+        self._handle = None
+
+    def write(self, entries: List[Dict[str, Any]]):
+        """Write a batch of entries and hand it to the OS while holding the lock"""
+        text = "".join(self.formatter(entry) for entry in entries)
+        with self.lock:
+            self._reopen_if_rotated()
+            self._handle.write(text)
+            self._handle.flush()
+
+    def _reopen_if_rotated(self):
+        """Reopen the file if another process rotated it away"""
+        if self._handle is not None:
+            try:
+                current = os.stat(self.path).st_ino
+            except FileNotFoundError:
+                current = None
+            if current == os.fstat(self._handle.fileno()).st_ino:
+                return
+            self.close()
+        self._handle = open(self.path, 'a')
+
+    def flush(self, fsync: bool = False):
+        """Flush buffered data to the OS and optionally to disk"""
+        if self._handle is None:
+            return
+        self._handle.flush()
+        if fsync:
+            os.fsync(self._handle.fileno())
+        if self.on_flushed is not None and self.on_flushed(os.fstat(self._handle.fileno()).st_size):
+            self.close()
+
+    def close(self):
+        """Flush, fsync and close the file handle"""
+        if self._handle is not None:
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+            self._handle.close()
+            self._handle = None
+
+
+class AuditWriter:
+    """
+    Drains audit entries from a bounded queue on a dedicated thread.
+
+    Entries are written in batches with one flush per batch. fsync_policy controls
+    durability: 'always' fsyncs every batch so no written record is left unsynced,
+    'interval' fsyncs at most every fsync_interval_ms, 'count' fsyncs after every
+    fsync_every records and 'none' leaves it to the OS.
+    """
+
+    FSYNC_POLICIES = ('always', 'interval', 'count', 'none')
+
+    _STOP = object()
+
+    def __init__(self, sink, queue_size: int = 10000, batch_size: int = 256,
+                 fsync_policy: str = 'interval', fsync_interval_ms: int = 1000,
+                 fsync_every: int = 100):
+        if fsync_policy not in self.FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy '{fsync_policy}'. "
+                             f"Expected one of: {', '.join(self.FSYNC_POLICIES)}")
+
+        self.sink = sink
+        self.batch_size = max(1, batch_size)
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval_ms / 1000.0
+        self.fsync_every = max(1, fsync_every)
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+        # Entries are numbered in queue order, so a flush can wait for a watermark
+        self._submit_lock = threading.Lock()
+        self._progress = threading.Condition()
+        self._submitted = 0
+        self._processed = 0
+        # Entry ranges (first, last] of batches that could not be written, until a flush reports them
+        self._failed: List[Tuple[int, int]] = []
+
+        self._unsynced = 0
+        self._last_fsync = time.monotonic()
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "batches": 0,
+            "max_batch_size": 0,
+            "last_batch_size": 0,
+            "fsyncs": 0,
+            "blocked_submits": 0,
+            "errors": 0
+        }
+
+    def start(self):
+        """Start the writer thread"""
+        self._thread = threading.Thread(target=self._run, name="reaper-audit-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, entry: Dict[str, Any]):
+        """Enqueue an entry, blocking only while the queue is full"""
+        if self._closed:
+            raise RuntimeError("Audit writer is closed")
+
+        with self._submit_lock:
+            try:
+                self._queue.put_nowait(entry)
+            except queue.Full:
+                with self._lock:
+                    self._stats["blocked_submits"] += 1
+                self._queue.put(entry)
+            self._submitted += 1
+
+        with self._lock:
+            self._stats["enqueued"] += 1
+
+    def watermark(self) -> int:
+        """Number of entries submitted so far; pass it to flush() to wait for just those"""
+        return self._submitted
+
+    def flush(self, upto: Optional[int] = None) -> bool:
+        """
+        Block until every entry submitted so far has been written, or only the
+        first `upto` entries (a watermark()), ignoring entries submitted since.
+        Returns False if some of those entries could not be written; each failed
+        batch is reported by one flush only
+        """
+        upto = self._submitted if upto is None else upto
+        with self._progress:
+            self._progress.wait_for(lambda: self._processed >= upto)
+            lost = [failed for failed in self._failed if failed[0] < upto]
+            if lost:
+                self._failed = [failed for failed in self._failed if failed[0] >= upto]
+        return not lost
+
+    def close(self):
+        """Drain the queue, fsync and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
+        self.sink.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue depth and batching statistics"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["queue_depth"] = self._queue.qsize()
+        stats["queue_capacity"] = self._queue.maxsize
+        stats["avg_batch_size"] = round(stats["written"] / stats["batches"], 2) if stats["batches"] else 0
+        stats["fsync_policy"] = self.fsync_policy
+        return stats
+
+    def _run(self):
+        """Writer loop: wait for an entry, drain a batch, write it, apply fsync policy"""
+        while True:
+            try:
+                item = self._queue.get(timeout=self._wait_timeout())
+            except queue.Empty:
+                self._sync()
+                continue
+
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stopping = any(entry is self._STOP for entry in batch)
+            entries = [entry for entry in batch if entry is not self._STOP]
+
+            written = self._write_batch(entries) if entries else True
+            for _ in batch:
+                self._queue.task_done()
+            with self._progress:
+                if not written:
+                    self._failed.append((self._processed, self._processed + len(entries)))
+                self._processed += len(entries)
+                self._progress.notify_all()
+
+            if stopping and self._queue.empty():
+                return
+
+    def _wait_timeout(self) -> Optional[float]:
+        """How long the loop may idle before an interval fsync is due"""
+        if self.fsync_policy != 'interval' or not self._unsynced:
+            return None
+        return max(0.0, self._last_fsync + self.fsync_interval - time.monotonic())
+
+    def _write_batch(self, entries: List[Dict[str, Any]]) -> bool:
+        """Write one batch and update statistics; returns False if it could not be written"""
+        try:
+            self.sink.write(entries)
+            self._unsynced += len(entries)
+            fsync = self._fsync_due()
+            self.sink.flush(fsync=fsync)
+        except Exception as e:
+            print(f"[Reaper Audit] ERROR: Failed to write {len(entries)} audit entries: {e}")
+            with self._lock:
+                self._stats["errors"] += 1
+            return False
+
+        if fsync:
+            self._mark_synced()
+        with self._lock:
+            self._stats["written"] += len(entries)
+            self._stats["batches"] += 1
+            self._stats["last_batch_size"] = len(entries)
+            self._stats["max_batch_size"] = max(self._stats["max_batch_size"], len(entries))
+        return True
+
+    def _fsync_due(self) -> bool:
+        """Decide whether the batch just written must be fsynced"""
+        if self.fsync_policy == 'always':
+            return True
+        if self.fsync_policy == 'count':
+            return self._unsynced >= self.fsync_every
+        if self.fsync_policy == 'interval':
+            return time.monotonic() - self._last_fsync >= self.fsync_interval
+        return False
+
+    def _sync(self):
+        """fsync outstanding data once the interval has elapsed"""
+        try:
+            self.sink.flush(fsync=True)
+        except OSError as e:
+            print(f"[Reaper Audit] ERROR: Failed to fsync audit file: {e}")
+            self._last_fsync = time.monotonic()
+            with self._lock:
+                self._stats["errors"] += 1
+            return
+        self._mark_synced()
+
+    def _mark_synced(self):
+        """Reset the unsynced counters after an fsync"""
+        self._unsynced = 0
+        self._last_fsync = time.monotonic()
+        with self._lock:
+            self._stats["fsyncs"] += 1
@@ -0,0 +1,83 @@
+"""
+Coalescing of near-simultaneous events that target the same resource
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+
+class _Group:
+    """Events collected for one key during a coalescing window"""
+
+    def __init__(self, event_data: Dict[str, Any]):
+        self.events: List[Dict[str, Any]] = [event_data]
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+
+
+class EventCoalescer:
+    """
+    Merges events for the same key into one execution.
+
+    The first event for a key opens a group and waits `window_ms`; events for
+    that key arriving meanwhile join the group and block. The first event then
+    runs `execute` once with every collected event, and its result is handed
+    back to all of them. Events arriving after execution started open a new group.
+    """
+
+    def __init__(self, window_ms: float = 200):
+        self.window = window_ms / 1000.0
+
+        self._lock = threading.Lock()
+        self._open: Dict[Hashable, _Group] = {}
+        self._stats = {
+            "events": 0,
+            "executions": 0,
+            "coalesced": 0,
+            "max_group_size": 0
+        }
+
+    def submit(self, key: Hashable, event_data: Dict[str, Any],
+               execute: Callable[[List[Dict[str, Any]]], Dict[str, Any]]) -> Dict[str, Any]:
+        """Run an event through its key's group and return the shared result"""
+        with self._lock:
+            self._stats["events"] += 1
+            group = self._open.get(key)
+            if group is None:
+                group = self._open[key] = _Group(event_data)
+                leader = True
+            else:
+                group.events.append(event_data)
+                self._stats["coalesced"] += 1
+                leader = False
+
+        if not leader:
+            group.done.wait()
+            if group.error is not None:
+                raise group.error
+            return dict(group.result)
+
+        time.sleep(self.window)
+        with self._lock:
+            del self._open[key]
+            events = list(group.events)
+            self._stats["executions"] += 1
+            self._stats["max_group_size"] = max(self._stats["max_group_size"], len(events))
+
+        try:
+            group.result = execute(events)
+        except BaseException as e:
+            group.error = e
+            raise
+        finally:
+            group.done.set()
+        return dict(group.result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get event, execution and merge counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["open_groups"] = len(self._open)
+        stats["window_ms"] = round(self.window * 1000, 2)
+        return stats
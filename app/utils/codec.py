@@ -0,0 +1,121 @@
+"""
+JSON codec shared by request parsing, the audit trail, the action log and responses
+"""
+import json
+from typing import Any, Dict, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - the stdlib codec is used
+    orjson = None
+
+
+class JSONCodec:
+    """Compact JSON with the standard library; values it cannot encode are written as strings"""
+
+    name = 'json'
+
+    def dumps(self, value: Any) -> str:
+        return json.dumps(value, separators=(',', ':'), default=str)
+
+    def dumpb(self, value: Any) -> bytes:
+        return self.dumps(value).encode('utf-8')
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    """
+    orjson: several times faster than the standard library. Values orjson
+    cannot encode (integers beyond 64 bits, non-string keys) are encoded by
+    JSONCodec; when parsing, such integers are read as floats
+    """
+
+    name = 'orjson'
+
+    def dumpb(self, value: Any) -> bytes:
+        try:
+            return orjson.dumps(value, default=str)
+        except TypeError:
+            return JSONCodec.dumps(self, value).encode('utf-8')
+
+    def dumps(self, value: Any) -> str:
+        return self.dumpb(value).decode('utf-8')
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return orjson.loads(data)
+
+
+CODECS = {'json': JSONCodec, 'orjson': OrjsonCodec}
+
+_codec: JSONCodec = OrjsonCodec() if orjson is not None else JSONCodec()
+
+
+def select_codec(name: str = 'auto') -> JSONCodec:
+    """
+    Select the codec used by dumps/dumpb/loads: 'json', 'orjson', or 'auto'
+    for orjson when it is installed. Falls back to 'json' if orjson is missing
+    """
+    global _codec
+    if name != 'auto' and name not in CODECS:
+        raise ValueError(f"Unknown JSON codec '{name}'. Options: auto, {', '.join(CODECS)}")
+    if name == 'auto':
+        name = 'orjson' if orjson is not None else 'json'
+    elif name == 'orjson' and orjson is None:
+        print("[Reaper Codec] WARNING: orjson is not installed, using the standard library json module")
+        name = 'json'
+    if _codec.name != name:
+        _codec = CODECS[name]()
+    return _codec
+
+
+def current_codec() -> JSONCodec:
+    return _codec
+
+
+def dumps(value: Any) -> str:
+    """Serialize to a compact JSON string"""
+    return _codec.dumps(value)
+
+
+def dumpb(value: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes"""
+    return _codec.dumpb(value)
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Parse JSON text or bytes; raises ValueError if it is malformed"""
+    return _codec.loads(data)
+
+
+class EncodedResult:
+    """
+    An event result serialized at most once, whichever sink needs it first.
+    The action log, the HTTP response and NDJSON lines all reuse the same bytes
+    """
+
+    __slots__ = ('value', '_data', '_text')
+
+    def __init__(self, value: Dict[str, Any]):
+        self.value = value
+        self._data: Optional[bytes] = None
+        self._text: Optional[str] = None
+
+    @property
+    def data(self) -> bytes:
+        if self._data is None:
+            self._data = dumpb(self.value)
+        return self._data
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self.data.decode('utf-8')
+        return self._text
+
+    def with_index(self, index: int) -> bytes:
+        """The result as {"index": index, ...} without serializing it again"""
+        if not self.value:
+            return b'{"index":%d}' % index
+        return b'{"index":%d,' % index + self.data[1:]
@@ -172,9 +172,9 @@ class DashboardGenerator:
                 <small>{{ ', '.join(status.modules) }}</small>
             </div>
             <div class="status-card">
-                <h3>Recent Events</h3>
+                <h3>Audited Events</h3>
                 <div class="status-value">{{ events_count }}</div>
-                <small>Last 24 hours</small>
+                <small>{% for status, count in status_counts.items() %}{{ status }}: {{ count }}{% if not loop.last %}, {% endif %}{% endfor %}</small>
             </div>
         </div>
         
@@ -200,8 +200,16 @@ class DashboardGenerator:
             <div class="endpoint method-get">GET /</div>
             <div class="endpoint method-get">GET /config</div>
             <div class="endpoint method-get">GET /audit</div>
+            <div class="endpoint method-get">GET /audit/report.md</div>
+            <div class="endpoint method-get">GET /audit/export</div>
+            <div class="endpoint method-get">GET /audit/writer</div>
+            <div class="endpoint method-get">GET /stats</div>
+            <div class="endpoint method-get">GET /jobs</div>
+            <div class="endpoint method-get">GET /jobs/&lt;id&gt;</div>
+            <div class="endpoint method-get">GET /queue</div>
             <div class="endpoint method-get">GET /openapi.json</div>
             <div class="endpoint method-post">POST /event</div>
+            <div class="endpoint method-post">POST /events</div>
             <div class="endpoint method-post">POST /toggle-dry-run</div>
             <p style="margin-top: 15px;">
                 <a href="/openapi.json" target="_blank">📄 View OpenAPI Specification</a>
@@ -216,33 +224,22 @@ class DashboardGenerator:
     def generate_dashboard_data(agent, audit_manager) -> Dict[str, Any]:
         """Generate data for dashboard"""
         try:
-            # Get recent events from audit trail
+            # Recent events come from the audit manager's in-memory buffer (every format)
             recent_events = []
-            events_count = 0
+            entries = audit_manager.get_recent_entries(5)
+            for entry in reversed(entries):
+                event_data = entry.get('event_data', {})
+                result = entry.get('result', {})
+                recent_events.append({
+                    'event_id': event_data.get('event_id', 'Unknown'),
+                    'type': event_data.get('type', 'Unknown'),
+                    'severity': event_data.get('severity', 'medium'),
+                    'timestamp': entry.get('timestamp', ''),
+                    'summary': f"Status: {result.get('status', 'unknown')} | Mode: {entry.get('mode', 'unknown')}"
+                })
             
-            if audit_manager.audit_format == 'json':
-                entries = audit_manager.get_recent_entries(5)
-                for entry in entries:
-                    recent_events.append({
-                        'event_id': entry.get('event_id', 'Unknown'),
-                        'type': entry.get('event_type', 'Unknown'),
-                        'severity': entry.get('event_data', {}).get('severity', 'medium'),
-                        'timestamp': entry.get('timestamp', ''),
-                        'summary': f"Status: {entry.get('status', 'unknown')} | Mode: {entry.get('mode', 'unknown')}"
-                    })
-                events_count = len(entries)
-            else:
-                # For markdown format, provide basic info
-                file_info = audit_manager.get_file_info()
-                if file_info.get('exists'):
-                    recent_events.append({
-                        'event_id': 'See audit file',
-                        'type': 'Multiple',
-                        'severity': 'info',
-                        'timestamp': file_info.get('last_modified', ''),
-                        'summary': f"View {audit_manager.audit_file} for detailed audit trail"
-                    })
-                    events_count = file_info.get('size', 0) // 1000  # Rough estimate
+            # Totals are maintained incrementally, so this never scans the audit trail
+            stats = audit_manager.get_stats()
             
             return {
                 'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC'),
@@ -252,7 +249,8 @@ class DashboardGenerator:
                     'modules': list(agent.modules_map.keys())
                 },
                 'recent_events': recent_events,
-                'events_count': events_count
+                'events_count': stats['total'],
+                'status_counts': stats['status']
             }
         except Exception as e:
             return {
@@ -264,6 +262,7 @@ class DashboardGenerator:
                 },
                 'recent_events': [],
                 'events_count': 0,
+                'status_counts': {},
                 'error': str(e)
             }
     
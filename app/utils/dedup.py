@@ -0,0 +1,164 @@
+"""
+Event deduplication by event_id
+"""
+import hashlib
+import math
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class BloomFilter:
+    """
+    Memory-bounded Bloom filter over strings.
+
+    Two generations are kept: once the current one holds `capacity` items it
+    becomes the previous generation and a fresh one is started, so the filter
+    remembers between one and two capacities of recent ids at a fixed size.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.0001):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.bits = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.bits / self.capacity * math.log(2)))
+
+        self._current = bytearray((self.bits + 7) // 8)
+        self._previous = None
+        self._count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    @staticmethod
+    def _contains(bits: bytearray, positions) -> bool:
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in positions)
+
+    def __contains__(self, item: str) -> bool:
+        positions = self._positions(item)
+        if self._contains(self._current, positions):
+            return True
+        return self._previous is not None and self._contains(self._previous, positions)
+
+    def add(self, item: str):
+        """Add an item, starting a new generation when the current one is full"""
+        if self._count >= self.capacity:
+            self._previous = self._current
+            self._current = bytearray(len(self._current))
+            self._count = 0
+        for p in self._positions(item):
+            self._current[p >> 3] |= 1 << (p & 7)
+        self._count += 1
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self._current) * (2 if self._previous is not None else 1)
+
+
+class EventDeduplicator:
+    """
+    Recognizes events whose event_id was already seen.
+
+    Recent ids are kept in an exact TTL/LRU cache together with a pointer to
+    the original result; older ids are remembered by a Bloom filter for a
+    longer horizon at a fixed memory cost. Reserving an id before processing
+    makes concurrent resends of the same event count as duplicates too.
+    """
+
+    # Results that should not block a resend from being processed again
+    RETRYABLE_STATUSES = ('error',)
+
+    def __init__(self, ttl_seconds: float = 3600, cache_size: int = 100000,
+                 filter_capacity: int = 1000000, filter_error_rate: float = 0.0001):
+        self.ttl = ttl_seconds
+        self.cache_size = max(1, cache_size)
+        self.filter = BloomFilter(filter_capacity, filter_error_rate) if filter_capacity else None
+
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # event_id -> original result pointer
+        self._stats = {
+            "checked": 0,
+            "cache_hits": 0,
+            "filter_hits": 0,
+            "misses": 0,
+            "evictions": 0
+        }
+
+    def check(self, event_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Check an event id and reserve it if it is new.
+        Returns a pointer to the original result for a duplicate, otherwise None
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._stats["checked"] += 1
+            original = self._cache.get(event_id)
+            if original is not None and original["_expires"] > now:
+                self._cache.move_to_end(event_id)
+                self._stats["cache_hits"] += 1
+                return self._public(original)
+            if original is not None:
+                del self._cache[event_id]
+
+            if self.filter is not None and event_id in self.filter:
+                self._stats["filter_hits"] += 1
+                return {"event_id": event_id, "status": "unknown", "source": "filter"}
+
+            self._stats["misses"] += 1
+            self._cache[event_id] = {
+                "event_id": event_id,
+                "status": "in_progress",
+                "first_seen": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "source": "cache",
+                "_expires": now + self.ttl
+            }
+            self._evict()
+            return None
+
+    def record(self, event_id: str, result: Dict[str, Any], audited_as: Optional[str] = None):
+        """
+        Attach the original result to a reserved id, or release it if the event may be retried.
+        `audited_as` is the event id the audit entry was written under, if different
+        """
+        status = result.get("status")
+        with self._lock:
+            original = self._cache.get(event_id)
+            if status in self.RETRYABLE_STATUSES:
+                self._cache.pop(event_id, None)
+                return
+            if original is not None:
+                original["status"] = status
+                if audited_as and audited_as != event_id:
+                    original["audited_as"] = audited_as
+            if self.filter is not None:
+                self.filter.add(event_id)
+
+    def _evict(self):
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    @staticmethod
+    def _public(original: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: value for key, value in original.items() if not key.startswith('_')}
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and the memory footprint"""
+        with self._lock:
+            stats = dict(self._stats)
+            entries = len(self._cache)
+            # Estimated from the newest entry so reporting stays O(1)
+            sample = next(reversed(self._cache.items()), None)
+            per_entry = sum(sys.getsizeof(part) for part in sample) if sample is not None else 0
+            cache_bytes = sys.getsizeof(self._cache) + entries * per_entry
+        stats["cache_entries"] = entries
+        stats["cache_bytes"] = cache_bytes
+        stats["filter_bytes"] = self.filter.memory_bytes if self.filter is not None else 0
+        stats["filter_hashes"] = self.filter.hashes if self.filter is not None else 0
+        stats["memory_bytes"] = stats["cache_bytes"] + stats["filter_bytes"]
+        return stats
@@ -0,0 +1,217 @@
+"""
+Durable on-disk queue of accepted events
+"""
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from . import codec
+
+
+class _Ticket:
+    """Completion signal for events waiting on a group commit"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.ids: List[int] = []
+        self.error: Optional[Exception] = None
+
+
+class DurableEventQueue:
+    """
+    Persists accepted events in SQLite until they have been processed.
+
+    enqueue() returns once the event is committed with a full fsync, so an
+    acknowledged event survives a crash; complete() removes it after processing.
+    A committer thread groups concurrent enqueues and completions into one
+    transaction (group commit), so fsyncs are batched under load. Events still
+    pending at startup are handed back by pending() for replay. Every event is
+    owned by the process that accepted it, so the events of one exited worker
+    process can be claimed and replayed while the other workers keep theirs.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS pending_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            enqueued_at TEXT NOT NULL,
+            event TEXT NOT NULL,
+            owner INTEGER
+        );
+    """
+
+    def __init__(self, path: str, commit_delay_ms: float = 2,
+                 before_complete: Optional[Callable[[Optional[int]], None]] = None,
+                 watermark: Optional[Callable[[], int]] = None):
+        self.path = path
+        # Extra time the committer waits for more work to share an fsync
+        self.commit_delay = commit_delay_ms / 1000.0
+        # Called before completions are committed, e.g. to flush the audit writer. It gets the
+        # highest `watermark()` taken when those events were completed (None without a watermark),
+        # so it only waits for audit entries written before them, not for later unrelated ones.
+        # If it returns False or raises, those events stay pending and are replayed after a restart
+        self.before_complete = before_complete
+        self.watermark = watermark
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(self.SCHEMA)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(pending_events)")]
+        if 'owner' not in columns:
+            # Queues written before events had owners
+            self._conn.execute("ALTER TABLE pending_events ADD COLUMN owner INTEGER")
+        self._conn.commit()
+
+        self._db_lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._inserts: List[Tuple[List[str], _Ticket]] = []
+        self._completions: List[int] = []
+        self._completion_mark: Optional[int] = None
+        self._closed = False
+        self._stats = {
+            "enqueued": 0,
+            "completed": 0,
+            "commits": 0,
+            "max_commit_size": 0,
+            "errors": 0
+        }
+        self._thread = threading.Thread(target=self._run, name="reaper-event-queue", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, event_data: Dict[str, Any]) -> int:
+        """Persist an event and return its queue id once it is durable"""
+        return self.enqueue_many([event_data])[0]
+
+    def enqueue_many(self, events: List[Dict[str, Any]]) -> List[int]:
+        """Persist events in one commit and return their queue ids once they are durable"""
+        if not events:
+            return []
+
+        payloads = [codec.dumps(event) for event in events]
+        ticket = _Ticket()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Event queue is closed")
+            self._inserts.append((payloads, ticket))
+            self._cond.notify()
+        ticket.done.wait()
+        if ticket.error is not None:
+            raise ticket.error
+        return ticket.ids
+
+    def complete(self, queue_ids: Iterable[int]):
+        """Mark events as processed; they are removed with the next commit"""
+        mark = self.watermark() if self.watermark is not None else None
+        with self._cond:
+            self._completions.extend(queue_ids)
+            if mark is not None:
+                self._completion_mark = max(mark, self._completion_mark or 0)
+            self._cond.notify()
+
+    def pending(self, owner: Optional[int] = None) -> List[Tuple[int, Dict[str, Any]]]:
+        """Get events accepted but not completed (only those of process `owner` if given), oldest first"""
+        with self._db_lock:
+            if owner is None:
+                rows = self._conn.execute("SELECT id, event FROM pending_events ORDER BY id").fetchall()
+            else:
+                rows = self._conn.execute("SELECT id, event FROM pending_events WHERE owner = ? ORDER BY id",
+                                          (owner,)).fetchall()
+        return [(queue_id, codec.loads(event)) for queue_id, event in rows]
+    
+    def claim(self, owner: int, new_owner: Optional[int] = None) -> int:
+        """Take over the pending events of process `owner` (for this process by default); returns the count"""
+        new_owner = os.getpid() if new_owner is None else new_owner
+        with self._db_lock:
+            with self._conn:
+                cursor = self._conn.execute("UPDATE pending_events SET owner = ? WHERE owner = ?", (new_owner, owner))
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        """Get enqueue, completion and group commit counters"""
+        with self._db_lock:
+            stats = dict(self._stats)
+            depth = self._conn.execute("SELECT COUNT(*) FROM pending_events").fetchone()[0]
+        stats["pending"] = depth
+        stats["avg_commit_size"] = (round((stats["enqueued"] + stats["completed"]) / stats["commits"], 2)
+                                    if stats["commits"] else 0)
+        return stats
+
+    def close(self):
+        """Commit outstanding work and stop the committer thread"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        with self._db_lock:
+            self._conn.close()
+
+    def _ready_to_complete(self, mark: Optional[int]) -> bool:
+        """Run the pre-completion hook; False if completed events must stay pending"""
+        if self.before_complete is None:
+            return True
+        try:
+            return self.before_complete(mark) is not False
+        except Exception as e:
+            print(f"[Reaper Queue] WARNING: Pre-completion hook failed: {e}")
+            return False
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                while not (self._inserts or self._completions or self._closed):
+                    self._cond.wait()
+                if self._closed and not (self._inserts or self._completions):
+                    return
+
+            # Let concurrent callers join this commit
+            if self.commit_delay:
+                time.sleep(self.commit_delay)
+
+            with self._cond:
+                inserts, self._inserts = self._inserts, []
+                completions, self._completions = self._completions, []
+                mark, self._completion_mark = self._completion_mark, None
+            self._commit(inserts, completions, mark)
+
+    def _commit(self, inserts: List[Tuple[List[str], _Ticket]], completions: List[int],
+                mark: Optional[int] = None):
+        if completions and not self._ready_to_complete(mark):
+            print(f"[Reaper Queue] WARNING: Keeping {len(completions)} processed events queued for replay")
+            completions = []
+
+        enqueued_at = datetime.now().isoformat()
+        owner = os.getpid()
+        try:
+            with self._db_lock:
+                with self._conn:
+                    for payloads, ticket in inserts:
+                        for payload in payloads:
+                            cursor = self._conn.execute(
+                                "INSERT INTO pending_events (enqueued_at, event, owner) VALUES (?, ?, ?)",
+                                (enqueued_at, payload, owner)
+                            )
+                            ticket.ids.append(cursor.lastrowid)
+                    self._conn.executemany("DELETE FROM pending_events WHERE id = ?",
+                                           [(queue_id,) for queue_id in completions])
+                enqueued = sum(len(payloads) for payloads, _ in inserts)
+                self._stats["enqueued"] += enqueued
+                self._stats["completed"] += len(completions)
+                self._stats["commits"] += 1
+                self._stats["max_commit_size"] = max(self._stats["max_commit_size"],
+                                                     enqueued + len(completions))
+        except sqlite3.Error as e:
+            print(f"[Reaper Queue] ERROR: Could not commit event queue: {e}")
+            with self._db_lock:
+                self._stats["errors"] += 1
+            # Enqueues fail; uncommitted completions are simply replayed after a restart
+            for _, ticket in inserts:
+                ticket.ids = []
+                ticket.error = e
+
+        for _, ticket in inserts:
+            ticket.done.set()
@@ -0,0 +1,200 @@
+"""
+Asynchronous event jobs run by a worker pool
+"""
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from .scheduler import PriorityScheduler
+
+
+class JobQueueFull(Exception):
+    """Raised when a job cannot be accepted because the queue is at capacity"""
+    pass
+
+
+class JobManager:
+    """
+    Runs submitted events on a pool of worker threads.
+
+    submit() only enqueues and returns a job id; workers call the handler and
+    store its result on the job. Queued jobs are served by event severity with
+    aging (see PriorityScheduler). Finished jobs are kept for lookup until
+    `retain` newer jobs have finished. Queue depth, in-flight count and
+    queue/run latencies, overall and per priority, are tracked for monitoring.
+    """
+
+    # Recent job latencies kept for percentiles
+    LATENCY_WINDOW = 1000
+
+    def __init__(self, handler: Callable[[Dict[str, Any]], Dict[str, Any]], workers: int = 4,
+                 queue_size: int = 1000, retain: int = 10000, aging_seconds: float = 30.0):
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.retain = max(1, retain)
+
+        self._queue = PriorityScheduler(maxsize=queue_size, aging_seconds=aging_seconds)
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._finished = OrderedDict()  # job ids in completion order, for eviction
+        self._in_flight = 0
+        self._closed = False
+
+        self._queue_ms = deque(maxlen=self.LATENCY_WINDOW)
+        self._run_ms = deque(maxlen=self.LATENCY_WINDOW)
+        self._priority_ms = {priority: deque(maxlen=self.LATENCY_WINDOW)
+                             for priority in PriorityScheduler.PRIORITIES}
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0
+        }
+
+    def start(self):
+        """Start the worker threads"""
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"reaper-job-worker-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, event_data: Dict[str, Any],
+               handler: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Enqueue an event and return its job record. `handler` overrides the default for this job"""
+        if self._closed:
+            raise RuntimeError("Job manager is closed")
+
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "event_id": event_data.get('event_id'),
+            "priority": self._queue.priority_of(event_data.get('severity')),
+            "status": "queued",
+            "submitted_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "queue_ms": None,
+            "run_ms": None,
+            "result": None,
+            "_submitted": time.monotonic()
+        }
+        with self._lock:
+            self._jobs[job["job_id"]] = job
+        try:
+            self._queue.put_nowait((job, event_data, handler or self.handler), job["priority"])
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job["job_id"]]
+                self._stats["rejected"] += 1
+            raise JobQueueFull(f"Job queue is full ({self._queue.maxsize} jobs)")
+
+        with self._lock:
+            self._stats["submitted"] += 1
+        return self._public(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job's status and result, or None if it is unknown or expired"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._public(job) if job is not None else None
+
+    def wait(self):
+        """Block until every submitted job has finished"""
+        self._queue.join()
+
+    def close(self):
+        """Finish queued jobs and stop the workers"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.close()
+        for thread in self._threads:
+            thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue depth, in-flight count and latency statistics, overall and per priority"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = self._in_flight
+            queue_ms = sorted(self._queue_ms)
+            run_ms = sorted(self._run_ms)
+            priority_ms = {priority: sorted(samples) for priority, samples in self._priority_ms.items()}
+        depths = self._queue.depths()
+        stats["queue_depth"] = sum(depths.values())
+        stats["queue_capacity"] = self._queue.maxsize
+        stats["workers"] = self.workers
+        stats["queue_latency_ms"] = self._summarize(queue_ms)
+        stats["run_latency_ms"] = self._summarize(run_ms)
+        # Time from submit to finish, so per-severity SLOs can be checked under backlog
+        stats["priorities"] = {
+            priority: {
+                "queue_depth": depths[priority],
+                "completed": len(samples),
+                "latency_ms": self._summarize(samples)
+            }
+            for priority, samples in priority_ms.items()
+        }
+        stats["aging_seconds"] = self._queue.aging_seconds
+        return stats
+
+    @staticmethod
+    def _summarize(samples: List[float]) -> Dict[str, float]:
+        if not samples:
+            return {"avg": 0, "p50": 0, "p95": 0, "max": 0}
+        return {
+            "avg": round(sum(samples) / len(samples), 2),
+            "p50": round(samples[len(samples) // 2], 2),
+            "p95": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 2),
+            "max": round(samples[-1], 2)
+        }
+
+    @staticmethod
+    def _public(job: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: value for key, value in job.items() if not key.startswith('_')}
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            try:
+                self._execute(*item[0])
+            finally:
+                self._queue.task_done()
+
+    def _execute(self, job: Dict[str, Any], event_data: Dict[str, Any],
+                 handler: Callable[[Dict[str, Any]], Dict[str, Any]]):
+        started = time.monotonic()
+        with self._lock:
+            self._in_flight += 1
+            job["status"] = "running"
+            job["started_at"] = datetime.now().isoformat()
+            job["queue_ms"] = round((started - job["_submitted"]) * 1000, 2)
+
+        try:
+            result = handler(event_data)
+            status = "completed"
+        except Exception as e:
+            result = {"status": "error", "log": [f"Job failed: {e}"]}
+            status = "failed"
+
+        run_ms = round((time.monotonic() - started) * 1000, 2)
+        with self._lock:
+            self._in_flight -= 1
+            job["status"] = status
+            job["result"] = result
+            job["finished_at"] = datetime.now().isoformat()
+            job["run_ms"] = run_ms
+            self._stats[status] += 1
+            self._queue_ms.append(job["queue_ms"])
+            self._run_ms.append(run_ms)
+            self._priority_ms[job["priority"]].append(job["queue_ms"] + run_ms)
+
+            self._finished[job["job_id"]] = None
+            while len(self._finished) > self.retain:
+                expired, _ = self._finished.popitem(last=False)
+                self._jobs.pop(expired, None)
@@ -0,0 +1,267 @@
+"""
+Locking primitives shared by threads and worker processes
+"""
+import asyncio
+import errno
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Hashable, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms only get thread safety
+    fcntl = None
+
+
+class InterProcessLock:
+    """
+    Exclusive advisory lock (flock) on a lock file.
+
+    Re-entrant within a thread, serializes threads of one process and, where
+    fcntl is available, every process that locks the same path. The lock file
+    is reopened after a fork so parent and child never share a lock.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+        self._pid = None
+
+        if hasattr(os, 'register_at_fork'):
+            ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._reset_after_fork())
+
+    def _reset_after_fork(self):
+        """A thread of the parent may have held the lock while forking"""
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        try:
+            if self._depth == 0:
+                self._acquire_file_lock()
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._depth -= 1
+        try:
+            if self._depth == 0 and fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            self._thread_lock.release()
+
+    def _acquire_file_lock(self):
+        if self._fd is None or self._pid != os.getpid():
+            # An inherited descriptor would share the lock with the parent process
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._pid = os.getpid()
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+
+
+class FileRangeLocks:
+    """
+    Exclusive POSIX record locks on single bytes of one lock file, so worker
+    processes can share many locks through one file. Record locks belong to the
+    process, not the thread: callers serialize their own threads first. The file
+    is reopened after a fork, since a child never inherits its parent's locks.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._open_lock = threading.Lock()
+        self._fd = None
+        self._pid = None
+
+    def _descriptor(self) -> int:
+        with self._open_lock:
+            if self._fd is None or self._pid != os.getpid():
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                self._pid = os.getpid()
+            return self._fd
+
+    def acquire(self, offset: int, blocking: bool = True) -> bool:
+        if fcntl is None:
+            return True
+        try:
+            fcntl.lockf(self._descriptor(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB), 1, offset)
+        except OSError as e:
+            if e.errno in (errno.EACCES, errno.EAGAIN):
+                return False
+            raise
+        return True
+
+    def release(self, offset: int):
+        if fcntl is not None:
+            fcntl.lockf(self._descriptor(), fcntl.LOCK_UN, 1, offset)
+
+
+class OwnedLock:
+    """
+    Re-entrant lock held by an owner token (a thread id or an asyncio task)
+    rather than by the acquiring thread, so an event loop can acquire it from a
+    helper thread and release it from the loop's thread. With `process_locks`,
+    the outermost acquisition also takes byte `offset` of the shared lock file.
+    """
+
+    def __init__(self, process_locks: Optional[FileRangeLocks] = None, offset: int = 0):
+        self._lock = threading.Lock()
+        self._owner = None
+        self._depth = 0
+        self._process_locks = process_locks
+        self._offset = offset
+
+    def acquire(self, owner: Hashable, blocking: bool = True) -> bool:
+        # Only the owner itself can find its own token here, so reading it unlocked is safe
+        if self._owner is not None and self._owner == owner:
+            self._depth += 1
+            return True
+        if not self._lock.acquire(blocking):
+            return False
+        if self._process_locks is not None and not self._process_locks.acquire(self._offset, blocking):
+            self._lock.release()
+            return False
+        self._owner = owner
+        self._depth = 1
+        return True
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            self._owner = None
+            try:
+                if self._process_locks is not None:
+                    self._process_locks.release(self._offset)
+            finally:
+                self._lock.release()
+
+
+class KeyedLockManager:
+    """
+    Striped locks keyed by resource, e.g. the bucket or user a module acts on.
+
+    Each key maps to one of `stripes` re-entrant locks, so the same key is always
+    serialized while different keys run in parallel (unless they share a stripe).
+    Time spent waiting is recorded per key for the `tracked_keys` most recently
+    used keys, so hot targets show up in stats(). hold_async() takes the same
+    stripes for asyncio tasks, so threads and tasks of any event loop exclude
+    each other; a contended stripe is waited for on a helper thread. With a
+    `lock_file`, every stripe is also a record lock in that file, so worker
+    processes sharing the file serialize the same keys too.
+    """
+
+    # Threads waiting for contended stripes on behalf of asyncio tasks
+    ASYNC_WAITERS = 32
+
+    def __init__(self, stripes: int = 256, tracked_keys: int = 1000, lock_file: Optional[str] = None):
+        process_locks = FileRangeLocks(lock_file) if lock_file else None
+        self._stripes = [OwnedLock(process_locks, offset) for offset in range(max(1, stripes))]
+        self.lock_file = lock_file
+        self.tracked_keys = max(1, tracked_keys)
+
+        self._waiters: Optional[ThreadPoolExecutor] = None
+        self._waiters_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._keys = OrderedDict()  # key -> wait counters
+        self._totals = {
+            "acquisitions": 0,
+            "contended": 0,
+            "wait_ms": 0.0,
+            "max_wait_ms": 0.0
+        }
+
+    def _stripe(self, key: Hashable) -> OwnedLock:
+        return self._stripes[hash(key) % len(self._stripes)]
+
+    @contextmanager
+    def hold(self, key: Hashable) -> Iterator[float]:
+        """Hold the lock for `key`; yields the milliseconds spent waiting for it"""
+        lock = self._stripe(key)
+        owner = threading.get_ident()
+        contended = not lock.acquire(owner, blocking=False)
+        wait_ms = 0.0
+        if contended:
+            started = time.monotonic()
+            lock.acquire(owner)
+            wait_ms = (time.monotonic() - started) * 1000
+        try:
+            self._record(key, contended, wait_ms)
+            yield wait_ms
+        finally:
+            lock.release()
+
+    @asynccontextmanager
+    async def hold_async(self, key: Hashable) -> AsyncIterator[float]:
+        """Hold the lock for `key` from the running asyncio task; yields the milliseconds waited"""
+        lock = self._stripe(key)
+        owner = asyncio.current_task()
+        contended = not lock.acquire(owner, blocking=False)
+        wait_ms = 0.0
+        if contended:
+            started = time.monotonic()
+            # A dedicated pool, so waiters never hold up blocking modules in the default executor
+            waiting = self._waiter_pool().submit(lock.acquire, owner)
+            try:
+                await asyncio.shield(asyncio.wrap_future(waiting))
+            except asyncio.CancelledError:
+                # The helper thread still gets the lock (even after the loop is closed); give it back once it does
+                waiting.add_done_callback(lambda _: lock.release())
+                raise
+            wait_ms = (time.monotonic() - started) * 1000
+        try:
+            self._record(key, contended, wait_ms)
+            yield wait_ms
+        finally:
+            lock.release()
+
+    def _waiter_pool(self) -> ThreadPoolExecutor:
+        with self._waiters_lock:
+            if self._waiters is None:
+                self._waiters = ThreadPoolExecutor(max_workers=self.ASYNC_WAITERS, thread_name_prefix='reaper-lock-wait')
+            return self._waiters
+
+    def _record(self, key: Hashable, contended: bool, wait_ms: float):
+        with self._stats_lock:
+            for counters in (self._totals, self._key_counters(key)):
+                counters["acquisitions"] += 1
+                counters["contended"] += contended
+                counters["wait_ms"] += wait_ms
+                counters["max_wait_ms"] = max(counters["max_wait_ms"], wait_ms)
+
+    def _key_counters(self, key: Hashable) -> Dict[str, Any]:
+        counters = self._keys.get(key)
+        if counters is None:
+            counters = self._keys[key] = {"acquisitions": 0, "contended": 0, "wait_ms": 0.0, "max_wait_ms": 0.0}
+            if len(self._keys) > self.tracked_keys:
+                self._keys.popitem(last=False)
+        else:
+            self._keys.move_to_end(key)
+        return counters
+
+    def stats(self, top: int = 10) -> Dict[str, Any]:
+        """Get total acquisitions and wait time, and the `top` keys by time waited"""
+        with self._stats_lock:
+            stats = dict(self._totals)
+            hot = sorted(self._keys.items(), key=lambda item: item[1]["wait_ms"], reverse=True)[:top]
+            hot = [{"key": str(key), **counters} for key, counters in hot if counters["contended"]]
+        stats["stripes"] = len(self._stripes)
+        stats["shared_by_workers"] = self.lock_file is not None
+        for counters in [stats] + hot:
+            counters["wait_ms"] = round(counters["wait_ms"], 2)
+            counters["max_wait_ms"] = round(counters["max_wait_ms"], 2)
+        stats["hot_keys"] = hot
+        return stats
@@ -0,0 +1,105 @@
+"""
+Severity-aware priority scheduling of queued work
+"""
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional, Tuple
+
+
+class PriorityScheduler:
+    """
+    Bounded queue that hands out the most severe item first.
+
+    Items wait in one FIFO per priority level. To prevent starvation, an item
+    gains one level for every `aging_seconds` it has waited, so a low-severity
+    event queued long enough is eventually served ahead of fresh critical ones.
+    Implements the subset of queue.Queue used by the job pool: put_nowait, get,
+    task_done, join and qsize.
+    """
+
+    # Most urgent first; unknown or missing severities are scheduled as `default`
+    PRIORITIES = ('critical', 'high', 'medium', 'low')
+
+    def __init__(self, maxsize: int = 1000, aging_seconds: float = 30.0, default: str = 'medium'):
+        self.maxsize = maxsize
+        self.aging_seconds = aging_seconds
+        self.default = default if default in self.PRIORITIES else 'medium'
+
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._all_done = threading.Condition(self._lock)
+        self._levels = {priority: deque() for priority in self.PRIORITIES}
+        self._size = 0
+        self._unfinished = 0
+        self._closed = False
+
+    def priority_of(self, severity: Optional[str]) -> str:
+        """Priority level for an event severity"""
+        return severity if severity in self._levels else self.default
+
+    def put_nowait(self, item: Any, severity: Optional[str] = None) -> str:
+        """Queue an item and return its priority level; raises queue.Full at capacity"""
+        priority = self.priority_of(severity)
+        with self._cond:
+            if 0 < self.maxsize <= self._size:
+                raise queue.Full
+            self._levels[priority].append((time.monotonic(), item))
+            self._size += 1
+            self._unfinished += 1
+            self._cond.notify()
+        return priority
+
+    def get(self) -> Optional[Tuple[Any, str]]:
+        """Wait for the next (item, priority); returns None once closed and drained"""
+        with self._cond:
+            while not self._size:
+                if self._closed:
+                    return None
+                self._cond.wait()
+            priority = self._next_level(time.monotonic())
+            _, item = self._levels[priority].popleft()
+            self._size -= 1
+            return item, priority
+
+    def _next_level(self, now: float) -> str:
+        """Level whose oldest item has the best aged rank (lower is more urgent)"""
+        best, best_rank = None, None
+        for rank, priority in enumerate(self.PRIORITIES):
+            level = self._levels[priority]
+            if not level:
+                continue
+            if self.aging_seconds > 0:
+                rank -= (now - level[0][0]) / self.aging_seconds
+            if best_rank is None or rank < best_rank:
+                best, best_rank = priority, rank
+        return best
+
+    def task_done(self):
+        """Mark an item returned by get() as finished"""
+        with self._cond:
+            self._unfinished -= 1
+            if self._unfinished <= 0:
+                self._all_done.notify_all()
+
+    def join(self):
+        """Block until every queued item has been finished"""
+        with self._cond:
+            while self._unfinished > 0:
+                self._all_done.wait()
+
+    def close(self):
+        """Let consumers finish: get() returns None once the queue is empty"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def qsize(self) -> int:
+        with self._cond:
+            return self._size
+
+    def depths(self) -> Dict[str, int]:
+        """Queued items per priority level"""
+        with self._cond:
+            return {priority: len(level) for priority, level in self._levels.items()}
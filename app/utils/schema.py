@@ -1,9 +1,9 @@
 """
 API schema validation using JSON Schema
 """
-import json
-from typing import Dict, Any, Tuple
-from jsonschema import validate, ValidationError, Draft7Validator
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .schema_compiler import compile_schema
 
 
 class APISchemaValidator:
@@ -99,6 +99,28 @@ class APISchemaValidator:
         "additionalProperties": True
     }
     
+    # Validation functions compiled from the schemas by compile_schemas()
+    _base_validator = None
+    _type_validators: Dict[str, Callable[[Any], Optional[str]]] = {}
+    
+    @classmethod
+    def event_schemas(cls) -> Dict[str, Dict[str, Any]]:
+        """Schema for each supported event type"""
+        return {
+            "unauthorized_saas_access": cls.SAAS_ACCESS_SCHEMA,
+            "open_s3_bucket": cls.S3_BUCKET_SCHEMA
+        }
+    
+    @classmethod
+    def compile_schemas(cls, check_formats: bool = False):
+        """
+        Compile the base and event type schemas into validation functions: once at
+        import, and again by the app if the validate_formats setting enables formats
+        """
+        cls._base_validator = compile_schema(cls.BASE_EVENT_SCHEMA, check_formats)
+        cls._type_validators = {event_type: compile_schema(schema, check_formats)
+                                for event_type, schema in cls.event_schemas().items()}
+    
     @classmethod
     def validate_event(cls, event_data: Dict[str, Any]) -> Tuple[bool, str]:
         """
@@ -107,25 +129,21 @@ class APISchemaValidator:
         """
         try:
             # First validate against base schema
-            validator = Draft7Validator(cls.BASE_EVENT_SCHEMA)
-            validator.validate(event_data)
+            error = cls._base_validator(event_data)
+            if error is not None:
+                return False, f"Schema validation failed: {error}"
             
             # Then validate against specific event type schema
             event_type = event_data.get("type")
-            
-            if event_type == "unauthorized_saas_access":
-                validator = Draft7Validator(cls.SAAS_ACCESS_SCHEMA)
-                validator.validate(event_data)
-            elif event_type == "open_s3_bucket":
-                validator = Draft7Validator(cls.S3_BUCKET_SCHEMA)
-                validator.validate(event_data)
-            else:
+            validator = cls._type_validators.get(event_type)
+            if validator is None:
                 return False, f"Unknown event type: {event_type}"
             
+            error = validator(event_data)
+            if error is not None:
+                return False, f"Schema validation failed: {error}"
             return True, "Validation successful"
             
-        except ValidationError as e:
-            return False, f"Schema validation failed: {e.message}"
         except Exception as e:
             return False, f"Validation error: {str(e)}"
     
@@ -161,7 +179,10 @@ class APISchemaValidator:
                                                 "status": {"type": "string"},
                                                 "service": {"type": "string"},
                                                 "mode": {"type": "string"},
-                                                "modules": {"type": "array"}
+                                                "modules": {"type": "array"},
+                                                "worker_pid": {"type": "integer"},
+                                                "workers": {"type": "integer"},
+                                                "admission": {"type": "object"}
                                             }
                                         }
                                     }
@@ -213,15 +234,59 @@ class APISchemaValidator:
                             "200": {
                                 "description": "Event processed successfully"
                             },
+                            "202": {
+                                "description": "Event accepted as an async job (async_events mode)"
+                            },
                             "400": {
                                 "description": "Invalid event data"
                             },
+                            "429": {
+                                "description": "Agent at capacity or shedding this severity; retry after the "
+                                               "Retry-After header's seconds"
+                            },
                             "500": {
                                 "description": "Processing error"
                             }
                         }
                     }
                 },
+                "/events": {
+                    "post": {
+                        "summary": "Process a batch of security events",
+                        "description": "Submit events as a JSON array or NDJSON stream. Every event is validated "
+                                       "and processed independently; results are returned in order, or streamed "
+                                       "as NDJSON when the client accepts application/x-ndjson.",
+                        "requestBody": {
+                            "required": True,
+                            "content": {
+                                "application/json": {
+                                    "schema": {
+                                        "type": "array",
+                                        "items": {
+                                            "oneOf": [
+                                                cls.SAAS_ACCESS_SCHEMA,
+                                                cls.S3_BUCKET_SCHEMA
+                                            ]
+                                        }
+                                    }
+                                },
+                                "application/x-ndjson": {
+                                    "schema": {
+                                        "type": "string"
+                                    }
+                                }
+                            }
+                        },
+                        "responses": {
+                            "200": {
+                                "description": "Per-event results in request order"
+                            },
+                            "400": {
+                                "description": "Body is not a JSON array or NDJSON"
+                            }
+                        }
+                    }
+                },
                 "/config": {
                     "get": {
                         "summary": "Get configuration",
@@ -247,7 +312,18 @@ class APISchemaValidator:
                 "/audit": {
                     "get": {
                         "summary": "Get audit trail",
-                        "description": "Retrieve audit trail information",
+                        "description": "Retrieve audit trail entries. JSON Lines and markdown files support "
+                                       "page and cursor reads; with the sqlite audit format, entries can also "
+                                       "be filtered.",
+                        "parameters": [
+                            {"name": name, "in": "query", "required": False, "schema": {"type": kind}}
+                            for name, kind in [
+                                ("type", "string"), ("status", "string"), ("mode", "string"),
+                                ("event_id", "string"), ("target", "string"),
+                                ("since", "string"), ("until", "string"),
+                                ("limit", "integer"), ("cursor", "integer"), ("page", "integer")
+                            ]
+                        ],
                         "responses": {
                             "200": {
                                 "description": "Audit trail data"
@@ -255,6 +331,111 @@ class APISchemaValidator:
                         }
                     }
                 },
+                "/audit/report.md": {
+                    "get": {
+                        "summary": "Get markdown audit report",
+                        "description": "Render audit entries matching the same filters as /audit as a markdown report",
+                        "responses": {
+                            "200": {
+                                "description": "Markdown report",
+                                "content": {
+                                    "text/markdown": {
+                                        "schema": {
+                                            "type": "string"
+                                        }
+                                    }
+                                }
+                            }
+                        }
+                    }
+                },
+                "/audit/export": {
+                    "get": {
+                        "summary": "Export audit trail",
+                        "description": "Stream audit entries matching the same filters as /audit as chunked "
+                                       "NDJSON, oldest first. Each line carries a cursor; pass the last one back "
+                                       "as cursor to resume. Gzip-encoded when the client accepts it.",
+                        "responses": {
+                            "200": {
+                                "description": "NDJSON stream of audit entries",
+                                "content": {
+                                    "application/x-ndjson": {
+                                        "schema": {
+                                            "type": "string"
+                                        }
+                                    }
+                                }
+                            },
+                            "400": {
+                                "description": "Invalid filter or cursor"
+                            }
+                        }
+                    }
+                },
+                "/audit/writer": {
+                    "get": {
+                        "summary": "Get audit writer statistics",
+                        "description": "Retrieve queue depth, batch sizes and fsync counts of the background audit writer",
+                        "responses": {
+                            "200": {
+                                "description": "Audit writer statistics"
+                            }
+                        }
+                    }
+                },
+                "/jobs": {
+                    "get": {
+                        "summary": "Get job statistics",
+                        "description": "Retrieve async job queue depth, in-flight count and queue/run latencies, "
+                                       "overall and per severity priority",
+                        "responses": {
+                            "200": {
+                                "description": "Job statistics"
+                            }
+                        }
+                    }
+                },
+                "/jobs/{job_id}": {
+                    "get": {
+                        "summary": "Get job status",
+                        "description": "Retrieve the status and result log of an async event job",
+                        "parameters": [
+                            {"name": "job_id", "in": "path", "required": True, "schema": {"type": "string"}}
+                        ],
+                        "responses": {
+                            "200": {
+                                "description": "Job status and result"
+                            },
+                            "404": {
+                                "description": "Unknown or expired job"
+                            }
+                        }
+                    }
+                },
+                "/queue": {
+                    "get": {
+                        "summary": "Get durable event queue statistics",
+                        "description": "Retrieve pending events and group commit counters of the durable event queue",
+                        "responses": {
+                            "200": {
+                                "description": "Event queue statistics"
+                            }
+                        }
+                    }
+                },
+                "/stats": {
+                    "get": {
+                        "summary": "Get audit statistics",
+                        "description": "Retrieve total audit entries and counts by event type, status, mode and "
+                                       "severity, duplicate/coalesced event counters, per-target lock wait times "
+                                       "and action log counters",
+                        "responses": {
+                            "200": {
+                                "description": "Audit statistics"
+                            }
+                        }
+                    }
+                },
                 "/openapi.json": {
                     "get": {
                         "summary": "OpenAPI specification",
@@ -275,3 +456,6 @@ class APISchemaValidator:
                 }
             }
         }
+
+
+APISchemaValidator.compile_schemas()
@@ -0,0 +1,172 @@
+"""
+Compiles JSON schemas once into plain Python validation functions
+"""
+import re
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from jsonschema import Draft7Validator, FormatChecker
+
+# Returns the message of the first error, or None if the instance is valid
+Check = Callable[[Any], Optional[str]]
+
+TYPES = {
+    "string": str,
+    "object": dict,
+    "array": list,
+    "boolean": bool,
+    "null": type(None)
+}
+
+RFC3339_DATE_TIME = re.compile(
+    r'^(\d{4})-(\d{2})-(\d{2})[Tt ](\d{2}):(\d{2}):(\d{2})(?:\.\d+)?(?:[Zz]|[+-](\d{2}):(\d{2}))$'
+)
+
+
+def is_email(value: str) -> bool:
+    # The same check jsonschema applies to the email format
+    return "@" in value
+
+
+def is_date_time(value: str) -> bool:
+    """RFC 3339 date-time with an explicit offset (Z or +hh:mm) on a real calendar day"""
+    match = RFC3339_DATE_TIME.match(value)
+    if match is None:
+        return False
+    year, month, day, hour, minute, second, offset_hour, offset_minute = match.groups()
+    try:
+        date(int(year), int(month), int(day))
+    except ValueError:
+        return False
+    return (int(hour) < 24 and int(minute) < 60 and int(second) < 61
+            and (offset_hour is None or (int(offset_hour) < 24 and int(offset_minute) < 60)))
+
+
+FORMATS: Dict[str, Callable[[str], bool]] = {
+    "email": is_email,
+    "date-time": is_date_time
+}
+
+# Object keywords compile_schema handles; schemas using others are left to jsonschema
+OBJECT_KEYWORDS = {"type", "properties", "required", "additionalProperties"}
+
+
+def _type_check(name: str) -> Check:
+    expected = TYPES[name]
+    if expected is bool or expected is type(None):
+        return lambda value: None if type(value) is expected else f"{value!r} is not of type {name!r}"
+    return lambda value: None if isinstance(value, expected) else f"{value!r} is not of type {name!r}"
+
+
+def _enum_check(options: List[Any]) -> Check:
+    allowed = frozenset(options)
+
+    def check(value):
+        try:
+            if value in allowed:
+                return None
+        except TypeError:
+            pass
+        return f"{value!r} is not one of {options!r}"
+    return check
+
+
+def _pattern_check(pattern: str) -> Check:
+    search = re.compile(pattern).search
+    return lambda value: None if not isinstance(value, str) or search(value) else f"{value!r} does not match {pattern!r}"
+
+
+def _min_length_check(minimum: int) -> Check:
+    # Worded as the pinned jsonschema 4.19 words it (later versions say "should be non-empty" for 1)
+    return lambda value: None if not isinstance(value, str) or len(value) >= minimum else f"{value!r} is too short"
+
+
+def _max_length_check(maximum: int) -> Check:
+    return lambda value: None if not isinstance(value, str) or len(value) <= maximum else f"{value!r} is too long"
+
+
+def _format_check(name: str) -> Check:
+    conforms = FORMATS[name]
+    return lambda value: None if not isinstance(value, str) or conforms(value) else f"{value!r} is not a {name!r}"
+
+
+# Property keyword -> builder of its check; properties using other keywords are left to jsonschema
+PROPERTY_BUILDERS: Dict[str, Callable[[Any], Check]] = {
+    "type": _type_check,
+    "enum": _enum_check,
+    "pattern": _pattern_check,
+    "minLength": _min_length_check,
+    "maxLength": _max_length_check,
+    "format": _format_check
+}
+
+
+def _compile_property(schema: Dict[str, Any], check_formats: bool) -> List[Check]:
+    """Checks for one property, in the order of its keywords (as jsonschema reports them)"""
+    return [PROPERTY_BUILDERS[keyword](value) for keyword, value in schema.items()
+            if keyword != "format" or check_formats]
+
+
+def _is_compilable(schema: Dict[str, Any], check_formats: bool) -> bool:
+    if not set(schema) <= OBJECT_KEYWORDS or schema.get("type") != "object":
+        return False
+    if schema.get("additionalProperties", True) is not True:
+        return False
+    for spec in schema.get("properties", {}).values():
+        if not set(spec) <= PROPERTY_BUILDERS.keys():
+            return False
+        if "type" in spec and spec["type"] not in TYPES:
+            return False
+        if check_formats and "format" in spec and spec["format"] not in FORMATS:
+            return False
+        try:
+            frozenset(spec.get("enum", ()))
+        except TypeError:
+            return False
+    return True
+
+
+def compile_schema(schema: Dict[str, Any], check_formats: bool = False) -> Check:
+    """
+    Compile an object schema into a function returning the first error message
+    (worded as jsonschema words it) or None. Patterns are compiled and enums
+    become frozensets. Like a plain Draft7Validator, "format" is only an
+    annotation unless `check_formats` is set; then the email and date-time
+    formats are checked directly. Schemas using other keywords get a
+    Draft7Validator built once instead
+    """
+    if not _is_compilable(schema, check_formats):
+        return _jsonschema_check(schema, check_formats)
+
+    properties = tuple((name, tuple(_compile_property(spec, check_formats)))
+                       for name, spec in schema.get("properties", {}).items())
+    return _object_check(properties, tuple(schema.get("required", ())))
+
+
+def _jsonschema_check(schema: Dict[str, Any], check_formats: bool) -> Check:
+    """First error of a Draft7Validator built once, for schemas the compiler does not handle"""
+    validator = Draft7Validator(schema, format_checker=FormatChecker() if check_formats else None)
+
+    def validate_with_jsonschema(instance):
+        error = next(validator.iter_errors(instance), None)
+        return None if error is None else error.message
+    return validate_with_jsonschema
+
+
+def _object_check(properties: Tuple[Tuple[str, Tuple[Check, ...]], ...], required: Tuple[str, ...]) -> Check:
+    """Run the compiled checks of each present property, then the required properties"""
+    def validate(instance):
+        if not isinstance(instance, dict):
+            return f"{instance!r} is not of type 'object'"
+        for name, checks in properties:
+            if name in instance:
+                value = instance[name]
+                for check in checks:
+                    error = check(value)
+                    if error is not None:
+                        return error
+        for name in required:
+            if name not in instance:
+                return f"{name!r} is a required property"
+        return None
+    return validate
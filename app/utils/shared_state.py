@@ -0,0 +1,127 @@
+"""
+Mutable agent state shared by the worker processes of one server
+"""
+import mmap
+import os
+import struct
+import threading
+from typing import Any, Dict, Optional
+
+from . import codec
+from .locks import InterProcessLock
+
+
+class LocalState:
+    """Agent state of a single process"""
+
+    def __init__(self, initial: Optional[Dict[str, Any]] = None):
+        self._lock = threading.Lock()
+        self._data = dict(initial or {})
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._data.get(key, default)
+
+    def update(self, **values):
+        """Set several keys at once"""
+        with self._lock:
+            self._data.update(values)
+
+    def toggle(self, key: str) -> bool:
+        """Flip a boolean key and return its new value"""
+        with self._lock:
+            self._data[key] = not self._data.get(key, False)
+            return self._data[key]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._data)
+
+    def close(self):
+        pass
+
+
+class SharedState(LocalState):
+    """
+    Small JSON document in a memory-mapped file, shared by worker processes.
+
+    Every process maps the same file, so an update made by one worker is seen by
+    the others on their next read, without any messaging. The header holds a
+    version that writers make odd while they rewrite the payload (under an flock
+    on <path>.lock) and even when done; readers retry while it is odd or changes
+    under them, and reuse their decoded copy while it is unchanged, so a read is
+    usually a single 12-byte header check.
+    """
+
+    SIZE = 64 * 1024
+    HEADER = struct.Struct('<QI')  # version, payload length
+
+    def __init__(self, path: str, initial: Optional[Dict[str, Any]] = None):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.lock = InterProcessLock(f"{path}.lock")
+        self._lock = threading.Lock()
+        self._version = None
+        self._data: Dict[str, Any] = {}
+
+        with self.lock:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if os.fstat(fd).st_size != self.SIZE:
+                    os.ftruncate(fd, self.SIZE)
+                self._map = mmap.mmap(fd, self.SIZE)
+            finally:
+                os.close(fd)
+            if initial is not None:
+                self._write(dict(initial))
+
+    def _read(self) -> Dict[str, Any]:
+        while True:
+            version, length = self.HEADER.unpack_from(self._map, 0)
+            if version == self._version:
+                return self._data
+            if version % 2:
+                # A writer is in the middle of an update
+                os.sched_yield()
+                continue
+            payload = self._map[self.HEADER.size:self.HEADER.size + length]
+            if self.HEADER.unpack_from(self._map, 0)[0] != version:
+                continue
+            with self._lock:
+                self._data = codec.loads(payload) if length else {}
+                self._version = version
+                return self._data
+
+    def _write(self, data: Dict[str, Any]):
+        """Replace the document; the caller holds the file lock"""
+        payload = codec.dumpb(data)
+        if len(payload) > self.SIZE - self.HEADER.size:
+            raise ValueError(f"Shared state exceeds {self.SIZE} bytes")
+        version, _ = self.HEADER.unpack_from(self._map, 0)
+        version += 1 if version % 2 == 0 else 0
+        self.HEADER.pack_into(self._map, 0, version, 0)
+        self._map[self.HEADER.size:self.HEADER.size + len(payload)] = payload
+        self.HEADER.pack_into(self._map, 0, version + 1, len(payload))
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._read().get(key, default)
+
+    def update(self, **values):
+        """Set several keys at once, visible to every process on its next read"""
+        with self.lock:
+            data = dict(self._read())
+            data.update(values)
+            self._write(data)
+
+    def toggle(self, key: str) -> bool:
+        """Flip a boolean key atomically across processes and return its new value"""
+        with self.lock:
+            data = dict(self._read())
+            data[key] = not data.get(key, False)
+            self._write(data)
+            return data[key]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return dict(self._read())
+
+    def close(self):
+        self._map.close()
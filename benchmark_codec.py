@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Per-event JSON serialization cost: the four separate json.dumps calls each
+result used to go through, against one serialization shared by the action log
+and the response plus the audit line, with each available codec
+"""
+import argparse
+import json
+import sys
+import timeit
+
+from app.utils import codec
+from app.utils.codec import CODECS, EncodedResult
+
+
+EVENT = {
+    "type": "open_s3_bucket",
+    "event_id": "bench-0001",
+    "bucket_name": "my-public-bucket",
+    "region": "us-east-1",
+    "severity": "high",
+    "timestamp": "2024-01-01T12:00:00Z"
+}
+RESULT = {
+    "status": "processed",
+    "log": [
+        "--- Event ID: bench-0001 | Module: S3VisibilityReaper | Mode: LIVE ---",
+        "[Validate] SUCCESS: Required fields 'bucket_name' and 'region' are present.",
+        "[Execute]  ACTION: Restricted public permissions on S3 bucket 'my-public-bucket'.",
+        "[Report]   LIVE: Public access block applied to 'my-public-bucket'"
+    ]
+}
+ENTRY = {
+    "timestamp": "2024-01-01T12:00:00.123456",
+    "mode": "LIVE",
+    "event_data": EVENT,
+    "result": RESULT,
+    "api_responses": [{"ResponseMetadata": {"HTTPStatusCode": 200}, "Bucket": "my-public-bucket"}]
+}
+
+
+def before():
+    """Console print, action log, audit line and response, each serialized on its own"""
+    json.dumps(RESULT, indent=2)
+    json.dumps(RESULT)
+    json.dumps(ENTRY, separators=(',', ':'), default=str)
+    json.dumps(RESULT, separators=(',', ':'))
+
+
+def after():
+    """One encoding shared by the action log and the response, plus the audit line"""
+    encoded = EncodedResult(RESULT)
+    encoded.text
+    encoded.data
+    codec.dumps(ENTRY)
+
+
+def measure(function, number: int) -> float:
+    """Best of five runs, in microseconds per event"""
+    return min(timeit.repeat(function, number=number, repeat=5)) / number * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark per-event JSON serialization")
+    parser.add_argument("--events", "-n", type=int, default=20000, help="Events per run")
+    args = parser.parse_args()
+
+    baseline = measure(before, args.events)
+    print(f"{'before (stdlib json, 4 dumps)':<36} {baseline:8.2f} us/event")
+    for name in CODECS:
+        if name == 'orjson' and codec.orjson is None:
+            print(f"{'after (orjson)':<36} not installed")
+            continue
+        codec.select_codec(name)
+        cost = measure(after, args.events)
+        print(f"{f'after ({name}, 1 dumps + audit)':<36} {cost:8.2f} us/event  {baseline / cost:5.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,14 @@
+"""
+Event builders shared by the tests
+"""
+
+
+def make_s3_event(event_id, bucket=None):
+    """Build a valid open_s3_bucket event, by default on a bucket of its own"""
+    return {
+        "type": "open_s3_bucket",
+        "event_id": event_id,
+        "bucket_name": bucket or f"{event_id}-bucket",
+        "region": "us-east-1",
+        "timestamp": "2024-01-01T12:00:00Z"
+    }
@@ -0,0 +1,69 @@
+"""
+Action log tests
+"""
+import json
+
+from app.utils.action_log import ActionLog, get_action_log
+
+
+def read_lines(path):
+    with open(path) as f:
+        return [json.loads(line.split(' - ', 1)[1]) for line in f]
+
+
+PROCESSED = {"status": "processed", "log": ["--- Event ID: evt-1 ---", "[Report]   LIVE: Public access block applied"]}
+IGNORED = {"status": "ignored", "log": ["No response module found for event type 'unknown'."]}
+
+
+class TestActionLog:
+    """Test the queued action log"""
+
+    def test_results_are_written_as_json_lines(self, tmp_path):
+        """Every result reaches the file once the listener has drained the queue"""
+        action_log = ActionLog(str(tmp_path / "actions.log"), console='off')
+        for _ in range(3):
+            assert action_log.log(PROCESSED)
+        action_log.close()
+        assert read_lines(tmp_path / "actions.log") == [PROCESSED] * 3
+        assert action_log.stats()['logged'] == 3
+
+    def test_sampled_statuses(self, tmp_path):
+        """One in every 1/rate results of a sampled status is logged, tagged with the rate"""
+        action_log = ActionLog(str(tmp_path / "actions.log"), console='off', sample_rates={"ignored": 0.25})
+        logged = [action_log.log(IGNORED) for _ in range(8)]
+        action_log.log(PROCESSED)
+        action_log.close()
+
+        assert logged.count(True) == 2
+        lines = read_lines(tmp_path / "actions.log")
+        assert [line['status'] for line in lines] == ['ignored', 'ignored', 'processed']
+        assert lines[0]['sample_rate'] == 0.25 and 'sample_rate' not in lines[2]
+        assert action_log.stats()['sampled_out'] == 6
+
+    def test_console_modes(self, tmp_path, capsys):
+        """summary prints one line per result, full prints the JSON line, off prints nothing"""
+        for console in ActionLog.CONSOLE_MODES:
+            action_log = ActionLog(str(tmp_path / f"{console}.log"), console=console)
+            action_log.log(PROCESSED)
+            action_log.close()
+            output = capsys.readouterr().out.strip()
+            if console == 'summary':
+                assert output == "[Reaper] processed: [Report]   LIVE: Public access block applied"
+            elif console == 'full':
+                assert json.loads(output) == PROCESSED
+            else:
+                assert output == ""
+
+    def test_setup_is_idempotent(self, tmp_path):
+        """Setting up the same file again reuses the log instead of duplicating writes"""
+        path = str(tmp_path / "actions.log")
+        first = get_action_log(path, console='off')
+        second = get_action_log(path, console='off', sample_rates={"ignored": 0.5})
+        assert first is second and second.sample_rates == {"ignored": 0.5}
+
+        first.log(PROCESSED)
+        first.close()
+        assert len(read_lines(path)) == 1
+        reopened = get_action_log(path, console='off')
+        assert reopened is not first
+        reopened.close()
@@ -0,0 +1,124 @@
+"""
+Admission control tests
+"""
+import json
+import threading
+
+import pytest
+
+from app.utils.admission import AdmissionController, AdmissionRejected
+
+
+class TestAdmissionController:
+    """Test bounded admission, shedding and Retry-After estimates"""
+
+    def test_rejects_at_capacity_until_released(self):
+        """Events beyond max_pending are rejected until a slot is released"""
+        admission = AdmissionController(max_pending=2, shed_severities=())
+        admission.admit("high")
+        admission.admit("low")
+        with pytest.raises(AdmissionRejected) as rejected:
+            admission.admit("critical")
+        assert not rejected.value.shed
+        assert admission.state() == "rejecting"
+
+        admission.release()
+        admission.admit("critical")
+        stats = admission.stats()
+        assert stats['admitted'] == 3 and stats['rejected'] == 1 and stats['pending'] == 2
+
+    def test_sheds_low_severity_first(self):
+        """Above the shed threshold only shed severities are turned away"""
+        admission = AdmissionController(max_pending=4, shed_threshold=0.5)
+        admission.admit("low")
+        admission.admit("low")
+        assert admission.state() == "shedding"
+        with pytest.raises(AdmissionRejected) as rejected:
+            admission.admit("low")
+        assert rejected.value.shed
+        admission.admit("critical")
+        admission.admit(None)
+        assert admission.stats()['shed'] == 1
+
+    def test_retry_after_follows_drain_rate(self):
+        """Retry-After is the time to drain the excess at the recent completion rate"""
+        admission = AdmissionController(max_pending=1, shed_severities=(), max_retry_after=30)
+        admission.admit()
+        with pytest.raises(AdmissionRejected) as rejected:
+            admission.admit()
+        assert rejected.value.retry_after == 30  # nothing has completed yet
+
+        admission.release()
+        for _ in range(19):
+            admission.admit()
+            admission.release()
+        admission.admit()
+        with pytest.raises(AdmissionRejected) as rejected:
+            admission.admit()
+        assert rejected.value.retry_after == 1  # 2 events/s drain the single excess event
+
+
+class TestAdmissionEndpoint:
+    """Test 429 responses and the admission state on the health endpoint"""
+
+    @pytest.fixture
+    def busy_client(self, monkeypatch):
+        """Async client with one worker blocked in the S3 module"""
+        from app import main
+        from app.modules import S3VisibilityReaper
+        release = threading.Event()
+        started = threading.Event()
+        original = S3VisibilityReaper.execute
+
+        def execute(self):
+            started.set()
+            release.wait(5)
+            return original(self)
+        monkeypatch.setattr(S3VisibilityReaper, 'execute', execute)
+
+        original_load = main.load_module_map_from_config
+
+        def load_config(config_path='config.yaml'):
+            modules, config = original_load(config_path)
+            config['settings'].update({
+                'async_events': True,
+                'job_workers': 1,
+                'admission_max_pending': 2,
+                'admission_shed_threshold': 0.5,
+                'admission_shed_severities': ['low']
+            })
+            return modules, config
+        monkeypatch.setattr(main, 'load_module_map_from_config', load_config)
+        yield main.create_app().test_client(), started
+        release.set()
+
+    @staticmethod
+    def make_event(event_id, severity):
+        return {
+            "type": "open_s3_bucket",
+            "event_id": event_id,
+            "bucket_name": f"{event_id}-bucket",
+            "region": "us-east-1",
+            "timestamp": "2024-01-01T12:00:00Z",
+            "severity": severity
+        }
+
+    def test_overload_answers_429_with_retry_after(self, busy_client):
+        """Low severity is shed first, then everything is rejected with Retry-After"""
+        client, started = busy_client
+        assert client.post('/event', json=self.make_event("adm-1", "critical")).status_code == 202
+        started.wait(5)
+
+        response = client.post('/event', json=self.make_event("adm-2", "low"))
+        assert response.status_code == 429
+        assert json.loads(response.data)['status'] == 'shed'
+        assert int(response.headers['Retry-After']) >= 1
+
+        assert client.post('/event', json=self.make_event("adm-3", "high")).status_code == 202
+        response = client.post('/event', json=self.make_event("adm-4", "critical"))
+        assert response.status_code == 429
+        assert json.loads(response.data)['status'] == 'rejected'
+
+        admission = json.loads(client.get('/').data)['admission']
+        assert admission['state'] == 'rejecting'
+        assert admission['pending'] == 2 and admission['shed'] == 1 and admission['rejected'] == 1
@@ -1,7 +1,14 @@
 """
 API endpoint tests
 """
+import gzip
 import json
+import os
+import time
+
+import pytest
+
+from tests.helpers import make_s3_event
 
 
 class TestHealthEndpoints:
@@ -37,6 +44,77 @@ class TestHealthEndpoints:
         assert 'dry_run_mode' in data
         assert 'message' in data
 
+    def test_audit_endpoint(self, client):
+        """Test audit endpoint returns recent entries and pages"""
+        event = make_s3_event("test-audit-001", bucket="audit-bucket")
+        client.post('/event', data=json.dumps(event), content_type='application/json')
+        
+        response = client.get('/audit?limit=1')
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['entries'][-1]['event_data']['event_id'] == 'test-audit-001'
+        
+        response = client.get('/audit?page=0&limit=2')
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert len(data['entries']) <= 2
+        assert data['total'] >= 1
+        
+        response = client.get('/audit/report.md?event_id=test-audit-001')
+        assert response.status_code == 200
+        assert b'**Event ID:** test-audit-001' in response.data
+    
+    def test_audit_export_endpoint(self, client):
+        """Test export streams NDJSON, gzip-encoded on request"""
+        event = make_s3_event("test-export-001", bucket="export-bucket")
+        client.post('/event', json=event)
+        
+        response = client.get('/audit/export?event_id=test-export-001')
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        lines = [json.loads(line) for line in response.data.decode().splitlines()]
+        assert lines[-1]['event_data']['event_id'] == 'test-export-001'
+        
+        response = client.get(f"/audit/export?cursor={lines[-1]['cursor']}&event_id=test-export-001",
+                              headers={'Accept-Encoding': 'gzip'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(response.data) == b''
+        
+        response = client.get('/audit/export?cursor=abc')
+        assert response.status_code == 400
+        
+        # A UTC 'Z' suffix is accepted on every supported Python version
+        response = client.get('/audit/export?event_id=test-export-001&since=2000-01-01T00:00:00Z')
+        assert response.status_code == 200
+        assert json.loads(response.data.decode().splitlines()[-1])['event_data']['event_id'] == 'test-export-001'
+    
+    def test_resent_event_is_duplicate(self, client):
+        """Test a resent event_id is answered from the dedup cache without re-auditing"""
+        event = make_s3_event("test-dedup-001", bucket="dedup-bucket")
+        assert json.loads(client.post('/event', json=event).data)['status'] == 'processed'
+        total = json.loads(client.get('/stats').data)['total']
+        
+        data = json.loads(client.post('/event', json=event).data)
+        assert data['status'] == 'duplicate'
+        assert data['original']['status'] == 'processed'
+        assert data['original']['audit_url'] == '/audit/export?event_id=test-dedup-001'
+        
+        stats = json.loads(client.get('/stats').data)
+        assert stats['total'] == total
+        assert stats['dedup']['cache_hits'] == 1
+    
+    def test_stats_endpoint(self, client):
+        """Test stats endpoint counts processed events"""
+        before = json.loads(client.get('/stats').data)
+        event = make_s3_event("test-stats-001", bucket="stats-bucket")
+        client.post('/event', json=event)
+        
+        response = client.get('/stats')
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['total'] == before['total'] + 1
+        assert data['event_type']['open_s3_bucket'] >= 1
+
 
 class TestEventProcessing:
     """Test event processing endpoints"""
@@ -62,13 +140,7 @@ class TestEventProcessing:
     
     def test_s3_bucket_event(self, client):
         """Test S3 bucket event processing"""
-        event = {
-            "type": "open_s3_bucket",
-            "event_id": "test-002",
-            "bucket_name": "test-bucket",
-            "region": "us-east-1",
-            "timestamp": "2024-01-01T12:00:00Z"
-        }
+        event = make_s3_event("test-002", bucket="test-bucket")
         
         response = client.post('/event',
                              data=json.dumps(event),
@@ -180,3 +252,221 @@ class TestValidation:
         
         data = json.loads(response.data)
         assert data['status'] == 'validation_error'
+
+
+class TestBatchEvents:
+    """Test batch event ingestion"""
+    
+    def test_json_array_batch(self, client):
+        """Test per-event results come back in order with a summary"""
+        events = [make_s3_event("batch-001"), {"type": "unknown_event"}, make_s3_event("batch-002")]
+        response = client.post('/events', json=events)
+        assert response.status_code == 200
+        
+        data = json.loads(response.data)
+        assert data['total'] == 3
+        assert [r['status'] for r in data['results']] == ['processed', 'validation_error', 'processed']
+        assert [r['index'] for r in data['results']] == [0, 1, 2]
+        assert data['summary'] == {'processed': 2, 'validation_error': 1}
+    
+    def test_ndjson_batch_streams_results(self, client):
+        """Test NDJSON in and out, with a malformed line reported in place"""
+        body = "\n".join([json.dumps(make_s3_event("batch-101")), "{not json",
+                          json.dumps(make_s3_event("batch-102"))]) + "\n"
+        response = client.post('/events', data=body, content_type='application/x-ndjson',
+                               headers={'Accept': 'application/x-ndjson'})
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        
+        results = [json.loads(line) for line in response.data.decode().splitlines()]
+        assert [r['status'] for r in results] == ['processed', 'validation_error', 'processed']
+        assert 'line 2' in results[1]['log'][0]
+    
+    def test_module_error_does_not_abort_batch(self, client, monkeypatch):
+        """Test an exception in one event leaves the rest of the batch processed"""
+        from app.modules import S3VisibilityReaper
+        original = S3VisibilityReaper.execute
+        
+        def execute(self):
+            if self.event['event_id'] == 'batch-boom':
+                raise RuntimeError("S3 API unavailable")
+            return original(self)
+        monkeypatch.setattr(S3VisibilityReaper, 'execute', execute)
+        
+        events = [make_s3_event("batch-201"), make_s3_event("batch-boom"), make_s3_event("batch-202")]
+        data = json.loads(client.post('/events', json=events).data)
+        assert [r['status'] for r in data['results']] == ['processed', 'error', 'processed']
+        assert 'S3 API unavailable' in data['results'][1]['log'][0]
+        
+        response = client.get('/audit/export?event_id=batch-boom')
+        assert json.loads(response.data.decode().splitlines()[-1])['result']['status'] == 'error'
+    
+    def test_rejects_non_array_json(self, client):
+        """Test a JSON object body is rejected"""
+        response = client.post('/events', json=make_s3_event("batch-301"))
+        assert response.status_code == 400
+
+
+@pytest.fixture
+def async_client(monkeypatch):
+    """Client for an app running events as async jobs"""
+    from app import main
+    original = main.load_module_map_from_config
+    
+    def load_async_config(config_path='config.yaml'):
+        modules, config = original(config_path)
+        config['settings']['async_events'] = True
+        return modules, config
+    monkeypatch.setattr(main, 'load_module_map_from_config', load_async_config)
+    return main.create_app().test_client()
+
+
+class TestAsyncJobs:
+    """Test async job mode"""
+    
+    def test_event_returns_job_and_result(self, async_client):
+        """Test /event answers 202 and /jobs/<id> reports the result"""
+        event = make_s3_event("test-job-001", bucket="job-bucket")
+        response = async_client.post('/event', json=event)
+        assert response.status_code == 202
+        job = json.loads(response.data)
+        assert response.headers['Location'] == f"/jobs/{job['job_id']}"
+        
+        for _ in range(200):
+            data = json.loads(async_client.get(job['status_url']).data)
+            if data['status'] == 'completed':
+                break
+            time.sleep(0.01)
+        assert data['status'] == 'completed'
+        assert data['result']['status'] == 'processed'
+        
+        stats = json.loads(async_client.get('/jobs').data)
+        assert stats['enabled'] and stats['completed'] >= 1
+        assert async_client.get('/jobs/unknown').status_code == 404
+    
+    def test_invalid_event_is_rejected_before_enqueue(self, async_client):
+        """Test schema validation still answers 400 synchronously"""
+        response = async_client.post('/event', json={"type": "unknown_event"})
+        assert response.status_code == 400
+
+
+class TestDurableQueue:
+    """Test durable acceptance and replay of events"""
+    
+    def test_pending_events_are_replayed_on_startup(self, tmp_path, monkeypatch):
+        """Test create_app processes events left in the queue by a crash"""
+        from app import main
+        from app.utils.event_queue import DurableEventQueue
+        queue_file = str(tmp_path / "event_queue.db")
+        original = main.load_module_map_from_config
+        
+        def load_config(config_path='config.yaml'):
+            modules, config = original(config_path)
+            config['settings']['event_queue_enabled'] = True
+            config['settings']['event_queue_file'] = queue_file
+            return modules, config
+        monkeypatch.setattr(main, 'load_module_map_from_config', load_config)
+        
+        crashed = DurableEventQueue(queue_file)
+        crashed.enqueue(make_s3_event("test-replay-001", bucket="replay-bucket"))
+        crashed.close()
+        
+        client = main.create_app().test_client()
+        response = client.get('/audit/export?event_id=test-replay-001')
+        assert json.loads(response.data.decode().splitlines()[-1])['result']['status'] == 'processed'
+        
+        for _ in range(200):
+            stats = json.loads(client.get('/queue').data)
+            if stats['pending'] == 0:
+                break
+            time.sleep(0.01)
+        assert stats['enabled'] and stats['pending'] == 0
+
+    def test_replacement_worker_replays_events_of_the_exited_one(self, tmp_path, monkeypatch):
+        """Test a worker started with replay_owner replays only the events that worker accepted"""
+        from app import main
+        from app.utils.event_queue import DurableEventQueue
+        queue_file = str(tmp_path / "event_queue.db")
+        original = main.load_module_map_from_config
+        
+        def load_config(config_path='config.yaml'):
+            modules, config = original(config_path)
+            config['settings']['event_queue_enabled'] = True
+            config['settings']['event_queue_file'] = queue_file
+            return modules, config
+        monkeypatch.setattr(main, 'load_module_map_from_config', load_config)
+        
+        exited_worker, live_worker = 4242, 4343
+        workers = DurableEventQueue(queue_file)
+        workers.enqueue(make_s3_event("test-respawn-001"))
+        workers.claim(os.getpid(), new_owner=exited_worker)
+        live_id = workers.enqueue(make_s3_event("test-respawn-002"))
+        workers.claim(os.getpid(), new_owner=live_worker)
+        workers.close()
+        
+        client = main.create_app(replay=False, replay_owner=exited_worker).test_client()
+        response = client.get('/audit/export?event_id=test-respawn-001')
+        assert json.loads(response.data.decode().splitlines()[-1])['result']['status'] == 'processed'
+        
+        for _ in range(200):
+            stats = json.loads(client.get('/queue').data)
+            if stats['pending'] == 1:
+                break
+            time.sleep(0.01)
+        assert stats['pending'] == 1
+        remaining = DurableEventQueue(queue_file)
+        assert [queue_id for queue_id, _ in remaining.pending()] == [live_id]
+        remaining.close()
+
+    def test_failed_event_stays_queued(self, tmp_path, monkeypatch):
+        """Test an event whose processing raised is not completed, so it is replayed after a restart"""
+        from app import main
+        from app.agent import ReaperAgent
+        queue_file = str(tmp_path / "event_queue.db")
+        original = main.load_module_map_from_config
+        
+        def load_config(config_path='config.yaml'):
+            modules, config = original(config_path)
+            config['settings']['event_queue_enabled'] = True
+            config['settings']['event_queue_file'] = queue_file
+            return modules, config
+        monkeypatch.setattr(main, 'load_module_map_from_config', load_config)
+        
+        def fail(self, event_data):
+            raise RuntimeError("module crashed")
+        monkeypatch.setattr(ReaperAgent, 'process_event', fail)
+        client = main.create_app().test_client()
+        response = client.post('/event', json=make_s3_event("test-failed-001", bucket="failed-bucket"))
+        assert response.status_code == 500
+        
+        time.sleep(0.1)
+        assert json.loads(client.get('/queue').data)['pending'] == 1
+        monkeypatch.undo()
+        monkeypatch.setattr(main, 'load_module_map_from_config', load_config)
+        restarted = main.create_app().test_client()
+        response = restarted.get('/audit/export?event_id=test-failed-001')
+        assert json.loads(response.data.decode().splitlines()[-1])['result']['status'] == 'processed'
+    
+    def test_replay_before_workers_start(self, tmp_path, monkeypatch):
+        """Test replay_pending_events drains the queue once and workers skip replay"""
+        from app import main
+        from app.utils.event_queue import DurableEventQueue
+        queue_file = str(tmp_path / "event_queue.db")
+        original = main.load_module_map_from_config
+        
+        def load_config(config_path='config.yaml'):
+            modules, config = original(config_path)
+            config['settings']['event_queue_enabled'] = True
+            config['settings']['event_queue_file'] = queue_file
+            return modules, config
+        monkeypatch.setattr(main, 'load_module_map_from_config', load_config)
+        
+        crashed = DurableEventQueue(queue_file)
+        crashed.enqueue(make_s3_event("test-replay-002", bucket="replay-bucket"))
+        crashed.close()
+        
+        assert main.replay_pending_events(*main.load_module_map_from_config()) == 1
+        assert main.replay_pending_events(*main.load_module_map_from_config()) == 0
+        client = main.create_app(replay=False).test_client()
+        response = client.get('/audit/export?event_id=test-replay-002')
+        assert json.loads(response.data.decode().splitlines()[-1])['result']['status'] == 'processed'
@@ -0,0 +1,199 @@
+"""
+asyncio dispatch tests
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.agent import ReaperAgent
+from app.modules import BaseReaperModule, S3VisibilityReaper, SaaSAccessReaper
+from app.sdks import AsyncMockAWSS3
+from tests.helpers import make_s3_event
+
+
+class BlockingReaper(BaseReaperModule):
+    """Module with only a blocking execute()"""
+
+    threads = set()
+
+    @classmethod
+    def target(cls, event):
+        return event.get("resource")
+
+    def validate(self) -> str:
+        return "[Validate] SUCCESS: ok"
+
+    def execute(self) -> str:
+        BlockingReaper.threads.add(threading.current_thread().name)
+        time.sleep(0.01)
+        return "[Execute]  ACTION: done"
+
+    def report(self) -> str:
+        return "[Report]   done"
+
+
+@pytest.fixture
+def agent(tmp_path):
+    modules = {
+        'open_s3_bucket': S3VisibilityReaper,
+        'unauthorized_saas_access': SaaSAccessReaper,
+        'blocking': BlockingReaper
+    }
+    config = {"settings": {
+        "audit_format": "jsonl",
+        "audit_file": str(tmp_path / "audit.jsonl"),
+        "dedup_enabled": True
+    }}
+    return ReaperAgent(modules, config)
+
+
+class TestAsyncDispatch:
+    """Test the asyncio execution path"""
+
+    def test_native_async_modules_overlap(self, agent, monkeypatch):
+        """Hundreds of remediations with async SDK calls are in flight at once"""
+        monkeypatch.setattr(AsyncMockAWSS3, 'latency_seconds', 0.05)
+        events = [make_s3_event(f"async-{i}") for i in range(200)]
+
+        started = time.monotonic()
+        results = asyncio.run(agent.process_events_async(events, concurrency=200))
+        elapsed = time.monotonic() - started
+
+        assert [result['status'] for result in results] == ['processed'] * 200
+        assert "Restricted public permissions" in results[0]['log'][2]
+        assert elapsed < 2  # 200 events x 2 calls x 50ms would take 20s one at a time
+        assert agent.audit_manager.get_stats()['total'] == 200
+
+    def test_sync_modules_run_in_threads(self, agent):
+        """A module without execute_async runs execute() in the executor"""
+        BlockingReaper.threads.clear()
+        result = asyncio.run(agent.process_event_async({"type": "blocking", "event_id": "blk-1", "resource": "r1"}))
+        assert result['status'] == 'processed'
+        assert threading.main_thread().name not in BlockingReaper.threads
+
+    def test_results_match_sync_processing(self, agent):
+        """Validation, dedup, unknown types and missing types behave like process_events"""
+        events = [make_s3_event("same-1"), {"type": "unknown_event", "event_id": "unk-1"},
+                  {"event_id": "no-type"}, make_s3_event("same-1"), "not an event"]
+
+        def validate(event):
+            return event != "not an event", "bad event"
+        results = asyncio.run(agent.process_events_async(events, validate=validate))
+        assert [result['status'] for result in results] == [
+            'processed', 'ignored', 'error', 'duplicate', 'validation_error']
+
+    def test_same_target_is_serialized_across_tasks(self, agent, monkeypatch):
+        """Tasks for one bucket run the module one at a time, other buckets overlap"""
+        active = {}
+        overlaps = []
+
+        async def execute_async(self):
+            bucket = self.event['bucket_name']
+            active[bucket] = active.get(bucket, 0) + 1
+            overlaps.append((bucket, active[bucket], len([b for b, n in active.items() if n])))
+            await asyncio.sleep(0.01)
+            active[bucket] -= 1
+            return "[Execute]  ACTION: done"
+        monkeypatch.setattr(S3VisibilityReaper, 'execute_async', execute_async)
+
+        events = [make_s3_event(f"ser-{i}", bucket="hot-bucket" if i % 2 else f"cold-{i}") for i in range(10)]
+        asyncio.run(agent.process_events_async(events))
+        assert max(count for bucket, count, _ in overlaps if bucket == "hot-bucket") == 1
+        assert max(buckets for _, _, buckets in overlaps) > 1
+        assert agent.target_locks.stats()['hot_keys'][0]['key'] == "s3:hot-bucket"
+
+    def test_same_target_is_serialized_across_loops_and_threads(self, agent, monkeypatch):
+        """Batches on separate event loops and a sync caller never remediate one bucket at once"""
+        guard = threading.Lock()
+        active = []
+        overlaps = []
+
+        def enter():
+            with guard:
+                active.append(1)
+                overlaps.append(len(active))
+
+        def leave():
+            with guard:
+                active.pop()
+
+        async def execute_async(self):
+            enter()
+            await asyncio.sleep(0.02)
+            leave()
+            return "[Execute]  ACTION: done"
+
+        def execute(self):
+            enter()
+            time.sleep(0.02)
+            leave()
+            return "[Execute]  ACTION: done"
+        monkeypatch.setattr(S3VisibilityReaper, 'execute_async', execute_async)
+        monkeypatch.setattr(S3VisibilityReaper, 'execute', execute)
+
+        def run_loop(prefix):
+            events = [make_s3_event(f"{prefix}-{i}", bucket="shared-bucket") for i in range(3)]
+            asyncio.run(agent.process_events_async(events))
+
+        def run_sync():
+            for i in range(3):
+                agent.process_event(make_s3_event(f"sync-{i}", bucket="shared-bucket"))
+
+        threads = [threading.Thread(target=run_loop, args=("loop-a",)), threading.Thread(target=run_loop, args=("loop-b",)),
+                   threading.Thread(target=run_sync)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(overlaps) == 9 and max(overlaps) == 1
+        assert agent.target_locks.stats()['contended'] >= 1
+
+
+class TestAsyncBatchEndpoint:
+    """Test POST /events with async_dispatch"""
+
+    def test_batch_runs_on_event_loop(self, monkeypatch):
+        """Results come back in order with async dispatch enabled"""
+        from app import main
+        original = main.load_module_map_from_config
+
+        def load_config(config_path='config.yaml'):
+            modules, config = original(config_path)
+            config['settings']['async_dispatch'] = True
+            return modules, config
+        monkeypatch.setattr(main, 'load_module_map_from_config', load_config)
+        client = main.create_app().test_client()
+
+        events = [make_s3_event("loop-1"), {"type": "unknown_event"}, make_s3_event("loop-2")]
+        data = client.post('/events', json=events).get_json()
+        assert [r['status'] for r in data['results']] == ['processed', 'validation_error', 'processed']
+
+    def test_concurrency_above_the_chunk_size_is_used(self, monkeypatch):
+        """A batch is handed to the event loop in chunks of async_concurrency, not of BATCH_CHUNK_SIZE"""
+        from app import main
+        from app.agent import ReaperAgent
+        original = main.load_module_map_from_config
+
+        def load_config(config_path='config.yaml'):
+            modules, config = original(config_path)
+            config['settings']['async_dispatch'] = True
+            config['settings']['async_concurrency'] = 150
+            return modules, config
+        monkeypatch.setattr(main, 'load_module_map_from_config', load_config)
+
+        sizes = []
+        process_events_async = ReaperAgent.process_events_async
+
+        async def record_size(self, events, *args, **kwargs):
+            sizes.append(len(events))
+            return await process_events_async(self, events, *args, **kwargs)
+        monkeypatch.setattr(ReaperAgent, 'process_events_async', record_size)
+        client = main.create_app().test_client()
+
+        events = [make_s3_event(f"wide-{i}") for i in range(200)]
+        data = client.post('/events', json=events).get_json()
+        assert data['summary'] == {"processed": 200}
+        assert sizes == [150, 50]
@@ -0,0 +1,645 @@
+"""
+Audit trail tests
+"""
+import json
+import multiprocessing
+import os
+import threading
+import time
+
+from app.utils.audit import AuditTrailManager
+from app.utils.event_queue import DurableEventQueue
+
+
+def make_manager(tmp_path, audit_format='jsonl', filename='audit_trail.jsonl', **settings):
+    """Create an audit manager writing into a temporary directory"""
+    config = {
+        'settings': {
+            'audit_format': audit_format,
+            'audit_file': str(tmp_path / filename),
+            **settings
+        }
+    }
+    return AuditTrailManager(config)
+
+
+def make_event(index, event_type='open_s3_bucket'):
+    """Build a minimal event payload"""
+    return {
+        "type": event_type,
+        "event_id": f"evt-{index:04d}",
+        "bucket_name": "test-bucket",
+        "region": "us-east-1",
+        "timestamp": "2024-01-01T12:00:00Z"
+    }
+
+
+class TestJSONLinesAudit:
+    """Test the JSON Lines audit backend"""
+
+    def test_appends_one_record_per_line(self, tmp_path):
+        """Each logged action is one compact JSON line"""
+        manager = make_manager(tmp_path)
+        for i in range(3):
+            manager.log_action(make_event(i), {"status": "processed", "log": []}, dry_run=True)
+
+        with open(manager.audit_file) as f:
+            lines = f.read().splitlines()
+        assert len(lines) == 3
+        record = json.loads(lines[0])
+        assert record['event_data']['event_id'] == 'evt-0000'
+        assert record['mode'] == 'DRY_RUN'
+        assert ', ' not in lines[0]
+
+    def test_recent_entries_read_from_tail(self, tmp_path):
+        """Recent entries come from the end of the file"""
+        manager = make_manager(tmp_path)
+        for i in range(50):
+            manager.log_action(make_event(i), {"status": "processed", "log": ["x" * 40]})
+
+        entries = manager.get_recent_entries(7)
+        assert [e['event_data']['event_id'] for e in entries] == [f"evt-{i:04d}" for i in range(43, 50)]
+        assert len(manager.get_recent_entries(500)) == 50
+
+    def test_legacy_json_array_is_migrated(self, tmp_path):
+        """An existing JSON array file stays readable and is converted to JSON Lines"""
+        legacy = make_manager(tmp_path, audit_format='json')
+        legacy.log_action(make_event(1), {"status": "processed", "log": []})
+        legacy.log_action(make_event(2), {"status": "ignored", "log": []})
+
+        manager = make_manager(tmp_path)
+        manager.log_action(make_event(3), {"status": "processed", "log": []})
+
+        entries = manager.get_recent_entries(10)
+        assert [e['event_data']['event_id'] for e in entries] == ['evt-0001', 'evt-0002', 'evt-0003']
+        with open(manager.audit_file) as f:
+            assert len(f.read().splitlines()) == 3
+
+    def test_markdown_trail_is_imported_once(self, tmp_path):
+        """The former markdown trail is imported into a new JSON Lines file, and only once"""
+        legacy = make_manager(tmp_path, audit_format='markdown', filename='audit_trail.md')
+        legacy.log_action(make_event(1), {"status": "processed", "log": ["done"]}, api_responses=[{"ok": True}])
+        legacy.log_action(make_event(2), {"status": "ignored", "log": []}, dry_run=True)
+        legacy.close()
+
+        markdown_file = str(tmp_path / 'audit_trail.md')
+        manager = make_manager(tmp_path, audit_import_markdown=markdown_file)
+        manager.log_action(make_event(3), {"status": "processed", "log": []})
+        manager.close()
+
+        entries = make_manager(tmp_path, audit_import_markdown=markdown_file).get_recent_entries(10)
+        assert [e['event_data']['event_id'] for e in entries] == ['evt-0001', 'evt-0002', 'evt-0003']
+        assert entries[0]['result'] == {"status": "processed", "log": ["done"]}
+        assert entries[0]['api_responses'] == [{"ok": True}]
+        assert entries[1]['mode'] == 'DRY_RUN'
+        assert manager.get_stats()['total'] == 3
+        assert not os.path.exists(markdown_file)
+        assert os.path.exists(f"{markdown_file}.imported")
+
+    def test_markdown_trail_is_not_imported_again_after_rotation(self, tmp_path):
+        """Rotation empties the active file; a restart must not take that for a new trail"""
+        legacy = make_manager(tmp_path, audit_format='markdown', filename='audit_trail.md')
+        for i in range(3):
+            legacy.log_action(make_event(i), {"status": "processed", "log": []})
+        legacy.close()
+
+        settings = {'audit_import_markdown': str(tmp_path / 'audit_trail.md'), 'audit_segment_max_bytes': 100}
+        manager = make_manager(tmp_path, **settings)
+        manager.log_action(make_event(3), {"status": "processed", "log": []})
+        manager.segments.close()
+        manager.close()
+        assert os.path.getsize(manager.audit_file) == 0
+
+        restarted = make_manager(tmp_path, **settings)
+        entries = restarted.get_entries_since(0, limit=100)['entries']
+        assert [e['event_data']['event_id'] for e in entries] == [f"evt-{i:04d}" for i in range(4)]
+        restarted.segments.close()
+
+
+class TestBackgroundWriter:
+    """Test the asynchronous audit writer"""
+
+    def test_entries_written_in_order_after_flush(self, tmp_path):
+        """Queued entries reach the file in submission order"""
+        manager = make_manager(tmp_path, audit_async=True, audit_fsync_policy='count', audit_fsync_every=10)
+        for i in range(100):
+            manager.log_action(make_event(i), {"status": "processed", "log": []})
+        manager.flush()
+
+        entries = manager.get_recent_entries(100)
+        assert [e['event_data']['event_id'] for e in entries] == [f"evt-{i:04d}" for i in range(100)]
+
+        stats = manager.get_writer_stats()
+        assert stats['enabled'] is True
+        assert stats['written'] == 100
+        assert stats['queue_depth'] == 0
+        assert stats['batches'] >= 1
+        manager.close()
+
+    def test_flush_up_to_watermark(self, tmp_path):
+        """A flush to a watermark does not wait for entries submitted after it"""
+        manager = make_manager(tmp_path, audit_async=True, audit_batch_size=1)
+        written = manager.writer.sink.write
+        release = threading.Event()
+
+        def write(entries):
+            if entries[0]['event_data']['event_id'] != 'evt-0000':
+                release.wait(5)
+            written(entries)
+        manager.writer.sink.write = write
+
+        manager.log_action(make_event(0), {"status": "processed", "log": []})
+        mark = manager.audit_watermark()
+        for i in range(1, 4):
+            manager.log_action(make_event(i), {"status": "processed", "log": []})
+
+        flushed = threading.Thread(target=manager.flush, args=(mark,))
+        flushed.start()
+        flushed.join(1)
+        assert not flushed.is_alive()
+        assert manager.get_writer_stats()['written'] == 1
+        release.set()
+        manager.flush()
+        assert manager.get_writer_stats()['written'] == 4
+        manager.close()
+
+    def test_failed_write_keeps_events_queued(self, tmp_path):
+        """A batch that could not be written fails the flush, so its events are not completed"""
+        manager = make_manager(tmp_path, audit_async=True, audit_batch_size=1)
+        written = manager.writer.sink.write
+
+        def write(entries):
+            if entries[0]['event_data']['event_id'] == 'evt-0001':
+                raise OSError(28, "No space left on device")
+            written(entries)
+        manager.writer.sink.write = write
+
+        event_queue = DurableEventQueue(str(tmp_path / "queue.db"), commit_delay_ms=0,
+                                        before_complete=manager.flush, watermark=manager.audit_watermark)
+        queue_ids = event_queue.enqueue_many([make_event(i) for i in range(3)])
+        for i, queue_id in enumerate(queue_ids):
+            commits = event_queue.stats()['commits']
+            manager.log_action(make_event(i), {"status": "processed", "log": []})
+            event_queue.complete([queue_id])
+            while event_queue.stats()['commits'] == commits:
+                time.sleep(0.01)
+        event_queue.close()
+        manager.close()
+
+        assert manager.get_writer_stats()['errors'] == 1
+        reopened = DurableEventQueue(str(tmp_path / "queue.db"))
+        assert [event['event_id'] for _, event in reopened.pending()] == ['evt-0001']
+        reopened.close()
+
+    def test_close_drains_queue(self, tmp_path):
+        """Closing the manager writes everything still queued"""
+        manager = make_manager(tmp_path, filename='audit_trail.md', audit_format='markdown',
+                               audit_async=True, audit_fsync_policy='always')
+        for i in range(20):
+            manager.log_action(make_event(i), {"status": "processed", "log": ["done"]})
+        manager.close()
+
+        with open(manager.audit_file) as f:
+            assert f.read().count("## Action Report") == 20
+
+    def test_json_format_stays_synchronous(self, tmp_path):
+        """The JSON array format cannot be appended and falls back to synchronous writes"""
+        manager = make_manager(tmp_path, audit_format='json', filename='audit_trail.json', audit_async=True)
+        assert manager.get_writer_stats() == {"enabled": False}
+
+
+class TestSQLiteAudit:
+    """Test the indexed SQLite audit store"""
+
+    def test_filters_and_keyset_pagination(self, tmp_path):
+        """Entries can be filtered and paged newest first"""
+        manager = make_manager(tmp_path, audit_format='sqlite', filename='audit_trail.db')
+        for i in range(25):
+            status = "processed" if i % 2 == 0 else "validation_failed"
+            manager.log_action(make_event(i), {"status": status, "log": []})
+        manager.log_action(make_event(99, 'unauthorized_saas_access'), {"status": "processed", "log": []})
+
+        page = manager.query_entries(event_type='open_s3_bucket', status='processed', limit=5)
+        ids = [e['event_data']['event_id'] for e in page['entries']]
+        assert ids == ['evt-0024', 'evt-0022', 'evt-0020', 'evt-0018', 'evt-0016']
+        assert page['next_cursor'] is not None
+
+        seen = list(ids)
+        while page['next_cursor'] is not None:
+            page = manager.query_entries(event_type='open_s3_bucket', status='processed',
+                                         limit=5, cursor=page['next_cursor'])
+            seen.extend(e['event_data']['event_id'] for e in page['entries'])
+        assert len(seen) == 13
+
+        by_id = manager.query_entries(event_id='evt-0099')
+        assert by_id['entries'][0]['event_data']['type'] == 'unauthorized_saas_access'
+        assert manager.query_entries(target='test-bucket', since='2999-01-01')['entries'] == []
+        assert len(manager.get_recent_entries(3)) == 3
+        manager.close()
+
+    def test_background_writer_commits_batches(self, tmp_path):
+        """The store is usable as the background writer sink"""
+        manager = make_manager(tmp_path, audit_format='sqlite', filename='audit_trail.db', audit_async=True)
+        for i in range(40):
+            manager.log_action(make_event(i), {"status": "processed", "log": []})
+        manager.flush()
+
+        assert manager.get_writer_stats()['written'] == 40
+        assert len(manager.query_entries(limit=100)['entries']) == 40
+        manager.close()
+
+
+class TestOffsetIndex:
+    """Test mmap/offset-index reads over audit files"""
+
+    def test_pages_and_cursor_reads(self, tmp_path):
+        """Page K and since-cursor reads return the right slices"""
+        manager = make_manager(tmp_path)
+        for i in range(30):
+            manager.log_action(make_event(i), {"status": "processed", "log": []})
+
+        page = manager.get_entries_page(2, page_size=10)
+        assert page['total'] == 30
+        assert [e['event_data']['event_id'] for e in page['entries']][0] == 'evt-0020'
+
+        batch = manager.get_entries_since(25, limit=10)
+        assert len(batch['entries']) == 5
+        assert batch['next_cursor'] == 30
+        assert manager.get_entries_since(30)['entries'] == []
+
+    def test_sidecar_index_survives_restart(self, tmp_path):
+        """A new manager reuses the sidecar index and only scans appended bytes"""
+        manager = make_manager(tmp_path)
+        for i in range(5):
+            manager.log_action(make_event(i), {"status": "processed", "log": []})
+        assert len(manager.get_recent_entries(10)) == 5
+        manager.close()
+
+        restarted = make_manager(tmp_path)
+        restarted.log_action(make_event(5), {"status": "processed", "log": []})
+        entries = restarted.get_recent_entries(10)
+        assert [e['event_data']['event_id'] for e in entries] == [f"evt-{i:04d}" for i in range(6)]
+
+    def test_incomplete_record_is_not_indexed(self, tmp_path):
+        """A record still being written is ignored until it is complete"""
+        manager = make_manager(tmp_path)
+        manager.log_action(make_event(0), {"status": "processed", "log": []})
+        with open(manager.audit_file, 'a') as f:
+            f.write('{"timestamp":"2024')
+        assert len(manager.get_recent_entries(10)) == 1
+
+    def test_markdown_sections_are_parsed(self, tmp_path):
+        """Markdown action reports are read back as structured entries"""
+        manager = make_manager(tmp_path, audit_format='markdown', filename='audit_trail.md')
+        for i in range(4):
+            manager.log_action(make_event(i), {"status": "processed", "log": ["step one", "step two"]},
+                               api_responses=[{"success": True}], dry_run=True)
+
+        entries = manager.get_recent_entries(2)
+        assert [e['event_data']['event_id'] for e in entries] == ['evt-0002', 'evt-0003']
+        assert entries[0]['mode'] == 'DRY_RUN'
+        assert entries[0]['result'] == {"status": "processed", "log": ["step one", "step two"]}
+        assert entries[0]['api_responses'] == [{"success": True}]
+        assert manager.get_entries_page(1, page_size=3)['entries'][0]['event_data']['event_id'] == 'evt-0003'
+
+
+class TestSegmentedAudit:
+    """Test rotation of the audit file into compressed segments"""
+
+    def test_rotation_compression_and_reads_span_segments(self, tmp_path):
+        """Sealed segments are compressed and readers span them transparently"""
+        manager = make_manager(tmp_path, audit_segment_max_bytes=1000, audit_compression='gzip')
+        for i in range(40):
+            manager.log_action(make_event(i), {"status": "processed", "log": []})
+        manager.segments.close()
+
+        segments = manager.segments.segments()
+        assert len(segments) > 1
+        assert all(segment['compressed'] == 'gzip' for segment in segments)
+        assert all(segment['file'].endswith('.gz') for segment in segments)
+
+        entries = manager.get_recent_entries(40)
+        assert [e['event_data']['event_id'] for e in entries] == [f"evt-{i:04d}" for i in range(40)]
+        assert manager.get_entries_since(3, limit=2)['entries'][0]['event_data']['event_id'] == 'evt-0003'
+        assert manager.get_entries_page(0, page_size=40)['total'] == 40
+
+        info = manager.get_file_info()
+        assert info['segments'] == len(segments)
+        assert info['total_bytes'] > info['size_bytes']
+
+    def test_retention_by_total_bytes(self, tmp_path):
+        """The oldest segments are dropped once sealed data exceeds the retention limit"""
+        manager = make_manager(tmp_path, audit_segment_max_bytes=600, audit_compression='none',
+                               audit_retention_max_bytes=1500)
+        for i in range(60):
+            manager.log_action(make_event(i), {"status": "processed", "log": []})
+        manager.segments.close()
+
+        segments = manager.segments.segments()
+        assert sum(segment['bytes'] for segment in segments) <= 1500
+        assert segments[0]['first_record'] > 0
+
+        remaining = manager.get_entries_since(0, limit=100)
+        assert remaining['entries'][0]['event_data']['event_id'] == f"evt-{segments[0]['first_record']:04d}"
+        assert remaining['entries'][-1]['event_data']['event_id'] == 'evt-0059'
+
+    def test_background_writer_rotates_markdown(self, tmp_path):
+        """Rotation also happens on the background writer path"""
+        manager = make_manager(tmp_path, audit_format='markdown', filename='audit_trail.md',
+                               audit_async=True, audit_batch_size=1,
+                               audit_segment_max_bytes=2000, audit_compression='lzma')
+        for i in range(15):
+            manager.log_action(make_event(i), {"status": "processed", "log": ["done"]})
+        manager.close()
+
+        assert any(segment['compressed'] == 'lzma' for segment in manager.segments.segments())
+        entries = manager.get_recent_entries(15)
+        assert [e['event_data']['event_id'] for e in entries] == [f"evt-{i:04d}" for i in range(15)]
+
+
+class TestMarkdownReports:
+    """Test filtered iteration and on-demand markdown rendering"""
+
+    def log_mixed_events(self, manager):
+        """Log S3 and SaaS events with alternating statuses"""
+        for i in range(20):
+            event = make_event(i, 'open_s3_bucket' if i % 2 == 0 else 'unauthorized_saas_access')
+            if i % 2:
+                del event['bucket_name'], event['region']
+                event['user'] = 'jane@example.com'
+            status = "processed" if i % 4 < 2 else "validation_failed"
+            manager.log_action(event, {"status": status, "log": [f"step {i}"]})
+
+    def test_iter_entries_filters_every_format(self, tmp_path):
+        """Filters behave the same for JSON Lines, markdown, JSON and SQLite storage"""
+        formats = [('jsonl', 'a.jsonl'), ('markdown', 'a.md'), ('json', 'a.json'), ('sqlite', 'a.db')]
+        for audit_format, filename in formats:
+            manager = make_manager(tmp_path, audit_format=audit_format, filename=filename)
+            self.log_mixed_events(manager)
+
+            ids = [e['event_data']['event_id']
+                   for e in manager.iter_entries(event_type='open_s3_bucket', status='processed')]
+            assert ids == ['evt-0000', 'evt-0004', 'evt-0008', 'evt-0012', 'evt-0016'], audit_format
+            assert len(list(manager.iter_entries(target='jane@example.com'))) == 10, audit_format
+            manager.close()
+
+    def test_time_range_uses_bisect(self, tmp_path):
+        """A since/until range returns only entries inside it"""
+        manager = make_manager(tmp_path)
+        manager.READ_CHUNK_SIZE = 3
+        self.log_mixed_events(manager)
+        entries = manager.get_recent_entries(20)
+        since, until = entries[5]['timestamp'], entries[9]['timestamp']
+
+        ids = [e['event_data']['event_id'] for e in manager.iter_entries(since=since, until=until)]
+        assert ids == ['evt-0005', 'evt-0006', 'evt-0007', 'evt-0008']
+
+    def test_render_report(self, tmp_path):
+        """Structured entries render as markdown action reports"""
+        manager = make_manager(tmp_path)
+        self.log_mixed_events(manager)
+
+        report = "".join(manager.render_report(manager.iter_entries(event_id='evt-0003')))
+        assert report.startswith("# Reaper Agent Audit Trail")
+        assert report.count("## Action Report") == 1
+        assert "**Event ID:** evt-0003" in report
+        assert "- step 3" in report
+
+    def test_cli_report_export(self, tmp_path):
+        """python -m app report writes a filtered markdown report"""
+        import yaml
+        from app.__main__ import cli
+
+        manager = make_manager(tmp_path)
+        self.log_mixed_events(manager)
+        config_file = tmp_path / 'config.yaml'
+        config_file.write_text(yaml.safe_dump({'settings': {
+            'audit_format': 'jsonl', 'audit_file': manager.audit_file}}))
+        output = tmp_path / 'report.md'
+
+        assert cli(['report', '--config', str(config_file), '--type', 'open_s3_bucket',
+                    '-o', str(output)]) == 0
+        assert output.read_text().count("## Action Report") == 10
+        assert not (tmp_path / 'audit_trail.jsonl.idx').exists()
+
+
+def _write_from_worker(config, worker, count):
+    """Log actions from a separate worker process"""
+    manager = AuditTrailManager(config)
+    for i in range(count):
+        event = make_event(i)
+        event['event_id'] = f"w{worker}-{i:04d}"
+        manager.log_action(event, {"status": "processed", "log": ["x" * (i % 50)]})
+    manager.close()
+
+
+class TestMultiProcessWrites:
+    """Stress test several worker processes appending to one audit trail"""
+
+    WORKERS = 4
+    PER_WORKER = 150
+
+    def run_workers(self, tmp_path, audit_format='jsonl', filename='audit_trail.jsonl', **settings):
+        """Run the workers to completion and return a fresh reader"""
+        ctx = multiprocessing.get_context('fork')
+        config = {'settings': {'audit_format': audit_format, 'audit_file': str(tmp_path / filename), **settings}}
+        processes = [ctx.Process(target=_write_from_worker, args=(config, w, self.PER_WORKER))
+                     for w in range(self.WORKERS)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(timeout=60)
+            assert process.exitcode == 0
+        return AuditTrailManager(config)
+
+    def assert_complete(self, manager):
+        """Every record parses and every worker's entries are present exactly once"""
+        ids = [entry['event_data']['event_id'] for entry in manager.iter_entries()]
+        expected = {f"w{w}-{i:04d}" for w in range(self.WORKERS) for i in range(self.PER_WORKER)}
+        assert len(ids) == len(expected)
+        assert set(ids) == expected
+
+    def test_sync_jsonl_writes(self, tmp_path):
+        """Synchronous appends never interleave"""
+        manager = self.run_workers(tmp_path)
+        with open(manager.audit_file) as f:
+            for line in f:
+                json.loads(line)
+        self.assert_complete(manager)
+
+    def test_background_writer_batches(self, tmp_path):
+        """Group-committed batches from several processes stay intact"""
+        manager = self.run_workers(tmp_path, audit_async=True, audit_batch_size=16)
+        self.assert_complete(manager)
+
+    def test_markdown_writes(self, tmp_path):
+        """Markdown action reports from several processes stay intact"""
+        manager = self.run_workers(tmp_path, audit_format='markdown', filename='audit_trail.md')
+        self.assert_complete(manager)
+
+    def test_shared_rotation(self, tmp_path):
+        """Processes agree on one segment manifest while rotating concurrently"""
+        manager = self.run_workers(tmp_path, audit_segment_max_bytes=8000, audit_compression='gzip')
+        assert len(manager.segments.segments()) > 1
+        self.assert_complete(manager)
+
+    def test_statistics_are_merged(self, tmp_path):
+        """Every process adds its counts to the shared checkpoint"""
+        manager = self.run_workers(tmp_path)
+        assert manager.get_stats()['total'] == self.WORKERS * self.PER_WORKER
+
+    def test_audit_directory_is_created(self, tmp_path):
+        """The lock file is opened only after its missing directory is created"""
+        for audit_format, filename in (('jsonl', 'newdir/audit.jsonl'), ('markdown', 'other/nested/audit.md')):
+            manager = make_manager(tmp_path, audit_format=audit_format, filename=filename)
+            manager.log_action(make_event(1), {"status": "processed", "log": []})
+            assert os.path.exists(tmp_path / f"{filename}.lock")
+            assert manager.get_stats()['total'] == 1
+
+
+class TestRecentBuffer:
+    """Test the in-memory ring buffer of recent entries"""
+
+    def test_recent_entries_come_from_memory(self, tmp_path):
+        """Recent reads do not touch the audit file"""
+        manager = make_manager(tmp_path, audit_recent_buffer_size=10)
+        for i in range(15):
+            manager.log_action(make_event(i), {"status": "processed", "log": []})
+        os.remove(manager.audit_file)
+
+        entries = manager.get_recent_entries(5)
+        assert [e['event_data']['event_id'] for e in entries] == [f"evt-{i:04d}" for i in range(10, 15)]
+        assert len(manager.get_recent_entries(10)) == 10
+        assert not manager.is_buffered(11)
+
+    def test_buffer_is_seeded_from_markdown_tail(self, tmp_path):
+        """A restarted markdown manager serves the previous entries from memory"""
+        manager = make_manager(tmp_path, audit_format='markdown', filename='audit_trail.md')
+        for i in range(8):
+            manager.log_action(make_event(i), {"status": "processed", "log": []})
+
+        restarted = make_manager(tmp_path, audit_format='markdown', filename='audit_trail.md',
+                                 audit_recent_buffer_size=5)
+        entries = restarted.get_recent_entries(5)
+        assert [e['event_data']['event_id'] for e in entries] == [f"evt-{i:04d}" for i in range(3, 8)]
+        assert entries[-1]['result']['status'] == 'processed'
+
+    def test_disabled_buffer_reads_the_file(self, tmp_path):
+        """A zero-sized buffer falls back to reading the file"""
+        manager = make_manager(tmp_path, audit_recent_buffer_size=0)
+        manager.log_action(make_event(1), {"status": "processed", "log": []})
+        assert not manager.is_buffered(1)
+        assert manager.get_recent_entries(1)[0]['event_data']['event_id'] == 'evt-0001'
+
+    def test_shared_managers_see_each_others_entries(self, tmp_path):
+        """Managers of several workers read recent entries and statistics written by the others"""
+        config = {'settings': {'audit_format': 'jsonl', 'audit_file': str(tmp_path / 'audit_trail.jsonl')}}
+        first = AuditTrailManager(config, shared=True)
+        second = AuditTrailManager(config, shared=True)
+        for i in range(3):
+            first.log_action(make_event(i), {"status": "processed", "log": []})
+        first.stats.checkpoint()
+
+        assert not second.is_buffered(1)
+        assert [e['event_data']['event_id'] for e in second.get_recent_entries(10)] == ['evt-0000', 'evt-0001', 'evt-0002']
+        second.log_action(make_event(3), {"status": "processed", "log": []})
+        assert second.get_stats()['total'] == 4
+
+
+class TestAuditStats:
+    """Test incrementally maintained audit statistics"""
+
+    def test_counts_by_dimension(self, tmp_path):
+        """Counters track event type, status, mode and severity"""
+        manager = make_manager(tmp_path)
+        for i in range(4):
+            event = make_event(i, 'open_s3_bucket' if i % 2 else 'unauthorized_saas_access')
+            event['severity'] = 'high'
+            manager.log_action(event, {"status": "processed", "log": []}, dry_run=i == 0)
+
+        stats = manager.get_stats()
+        assert stats['total'] == 4
+        assert stats['event_type'] == {'unauthorized_saas_access': 2, 'open_s3_bucket': 2}
+        assert stats['status'] == {'processed': 4}
+        assert stats['mode'] == {'DRY_RUN': 1, 'LIVE': 3}
+        assert stats['severity'] == {'high': 4}
+
+    def test_checkpoint_survives_restart(self, tmp_path):
+        """A restarted manager picks up the checkpointed counts without rescanning"""
+        manager = make_manager(tmp_path)
+        for i in range(3):
+            manager.log_action(make_event(i), {"status": "processed", "log": []})
+        manager.close()
+        os.truncate(manager.audit_file, 0)
+
+        restarted = make_manager(tmp_path)
+        assert restarted.get_stats()['total'] == 3
+        assert restarted.get_stats()['checkpointed_at'] is not None
+
+    def test_existing_trail_is_counted_once(self, tmp_path):
+        """Without a checkpoint the existing trail is counted on startup"""
+        manager = make_manager(tmp_path, audit_format='markdown', filename='audit_trail.md')
+        for i in range(5):
+            manager.log_action(make_event(i), {"status": "failed", "log": []})
+        os.remove(manager.stats.path)
+
+        restarted = make_manager(tmp_path, audit_format='markdown', filename='audit_trail.md')
+        assert restarted.get_stats()['total'] == 5
+        assert restarted.get_stats()['status'] == {'failed': 5}
+
+
+class TestAuditExport:
+    """Test resumable NDJSON exports"""
+
+    def export(self, manager, cursor=None, **filters):
+        """Export to NDJSON and parse the lines back"""
+        text = "".join(manager.render_ndjson(manager.iter_entries_after(cursor, **filters)))
+        return [json.loads(line) for line in text.splitlines()]
+
+    def test_resume_from_cursor_every_format(self, tmp_path):
+        """An export resumed from any line's cursor continues right after it"""
+        for audit_format, filename in (('jsonl', 'a.jsonl'), ('markdown', 'a.md'),
+                                       ('json', 'a.json'), ('sqlite', 'a.db')):
+            manager = make_manager(tmp_path, audit_format=audit_format, filename=filename)
+            for i in range(12):
+                manager.log_action(make_event(i), {"status": "processed", "log": []})
+
+            lines = self.export(manager)
+            assert [line['event_data']['event_id'] for line in lines] == [f"evt-{i:04d}" for i in range(12)]
+            resumed = self.export(manager, cursor=lines[4]['cursor'])
+            assert [line['event_data']['event_id'] for line in resumed] == [f"evt-{i:04d}" for i in range(5, 12)]
+
+    def test_filters_and_damaged_records(self, tmp_path):
+        """Filters apply and damaged lines do not shift the cursors"""
+        manager = make_manager(tmp_path)
+        for i in range(6):
+            manager.log_action(make_event(i, 'open_s3_bucket' if i % 2 else 'other'),
+                               {"status": "processed", "log": []})
+        with open(manager.audit_file, 'a') as f:
+            f.write("{not json\n")
+        manager.log_action(make_event(7), {"status": "processed", "log": []})
+
+        lines = self.export(manager, event_type='open_s3_bucket')
+        assert [line['event_data']['event_id'] for line in lines] == ['evt-0001', 'evt-0003', 'evt-0005', 'evt-0007']
+        assert lines[-1]['cursor'] == 8
+
+
+class TestBatchedWrites:
+    """Test grouping audit writes with batch()"""
+
+    def test_batch_writes_once(self, tmp_path, monkeypatch):
+        """Entries logged inside a batch reach the file in one write"""
+        manager = make_manager(tmp_path)
+        writes = []
+        original = manager._write_entries
+        monkeypatch.setattr(manager, '_write_entries', lambda entries: (writes.append(len(entries)), original(entries)))
+
+        with manager.batch():
+            for i in range(5):
+                manager.log_action(make_event(i), {"status": "processed", "log": []})
+            with manager.batch():
+                manager.log_action(make_event(5), {"status": "processed", "log": []})
+            assert writes == []
+
+        assert writes == [6]
+        assert len(manager.get_entries_page(0, 10)['entries']) == 6
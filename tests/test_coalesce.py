@@ -0,0 +1,128 @@
+"""
+Event coalescing tests
+"""
+import threading
+
+import pytest
+
+from app.agent import ReaperAgent
+from app.modules import S3VisibilityReaper, SaaSAccessReaper
+from app.utils.coalesce import EventCoalescer
+from tests.helpers import make_s3_event
+
+# Events of the bursts below all target this bucket
+BUCKET = "burst-bucket"
+
+
+def run_concurrently(target, args_list):
+    results = [None] * len(args_list)
+
+    def run(index, args):
+        results[index] = target(*args)
+    threads = [threading.Thread(target=run, args=(index, args)) for index, args in enumerate(args_list)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class TestEventCoalescer:
+    """Test merging of events by key within a window"""
+
+    def test_concurrent_events_share_one_execution(self):
+        """Events for one key within the window run once and all get the result"""
+        coalescer = EventCoalescer(window_ms=200)
+        calls = []
+
+        def execute(events):
+            calls.append([event['event_id'] for event in events])
+            return {"status": "processed", "log": []}
+
+        results = run_concurrently(coalescer.submit, [("bucket", {"event_id": f"evt-{i}"}, execute)
+                                                      for i in range(5)])
+        assert len(calls) == 1 and sorted(calls[0]) == [f"evt-{i}" for i in range(5)]
+        assert all(result == {"status": "processed", "log": []} for result in results)
+
+        stats = coalescer.stats()
+        assert stats['executions'] == 1 and stats['coalesced'] == 4 and stats['max_group_size'] == 5
+        assert stats['open_groups'] == 0
+
+    def test_different_keys_run_separately(self):
+        """Events for different keys are never merged"""
+        coalescer = EventCoalescer(window_ms=50)
+
+        def execute(events):
+            return {"status": "processed", "count": len(events)}
+        results = run_concurrently(coalescer.submit, [(f"bucket-{i}", {"event_id": str(i)}, execute)
+                                                      for i in range(3)])
+        assert [result['count'] for result in results] == [1, 1, 1]
+
+    def test_errors_reach_every_event(self):
+        """An execution error is raised for all events of the group"""
+        coalescer = EventCoalescer(window_ms=100)
+
+        def execute(events):
+            raise RuntimeError("S3 API unavailable")
+
+        def submit(event_id):
+            try:
+                coalescer.submit("bucket", {"event_id": event_id}, execute)
+            except RuntimeError as e:
+                return str(e)
+        assert run_concurrently(submit, [("a",), ("b",)]) == ["S3 API unavailable"] * 2
+
+
+class TestAgentCoalescing:
+    """Test coalescing in the agent's dispatch"""
+
+    @pytest.fixture
+    def agent(self, tmp_path):
+        modules = {'open_s3_bucket': S3VisibilityReaper, 'unauthorized_saas_access': SaaSAccessReaper}
+        config = {"settings": {
+            "audit_format": "jsonl",
+            "audit_file": str(tmp_path / "audit.jsonl"),
+            "coalesce_window_ms": 150,
+            "dedup_enabled": True
+        }}
+        return ReaperAgent(modules, config)
+
+    def test_module_targets(self):
+        """Modules declare the resource their events act on"""
+        assert S3VisibilityReaper.target(make_s3_event("evt-1", bucket=BUCKET)) == "s3:burst-bucket"
+        assert SaaSAccessReaper.target({"user": "a@b.com", "source": "slack"}) == "slack:a@b.com"
+        assert S3VisibilityReaper.target({"bucket_name": "no-region"}) is None
+
+    def test_burst_is_remediated_and_audited_once(self, agent, monkeypatch):
+        """A burst for one bucket calls S3 once and is audited in one entry with every id"""
+        calls = []
+        original = S3VisibilityReaper.execute
+
+        def execute(self):
+            calls.append(self.event['event_id'])
+            return original(self)
+        monkeypatch.setattr(S3VisibilityReaper, 'execute', execute)
+
+        results = run_concurrently(agent.process_event, [(make_s3_event(f"burst-{i}", bucket=BUCKET),) for i in range(4)])
+        assert len(calls) == 1
+        assert all(result['status'] == 'processed' for result in results)
+        assert sorted(results[0]['coalesced_event_ids']) == [f"burst-{i}" for i in range(4)]
+
+        entries = list(agent.audit_manager.iter_entries())
+        assert len(entries) == 1
+        assert entries[0]['result']['coalesced_event_ids'] == results[0]['coalesced_event_ids']
+
+        # Resends of any contributing event point at the shared audit entry
+        duplicate = agent.process_event(make_s3_event("burst-3", bucket=BUCKET))
+        audited_as = entries[0]['event_data']['event_id']
+        assert duplicate['original']['audit_url'] == f"/audit/export?event_id={audited_as}"
+
+    def test_batch_groups_events_by_target(self, agent):
+        """Events of one batch for the same target are remediated together, results in order"""
+        events = [make_s3_event("batch-1", bucket=BUCKET), make_s3_event("batch-2", bucket="other-bucket"),
+                  make_s3_event("batch-3", bucket=BUCKET), make_s3_event("batch-1", bucket=BUCKET)]
+        results = list(agent.process_events(events))
+        assert [result['status'] for result in results] == ['processed', 'processed', 'processed', 'duplicate']
+        assert results[0]['coalesced_event_ids'] == ["batch-1", "batch-3"]
+        assert 'coalesced_event_ids' not in results[1]
+        assert len(list(agent.audit_manager.iter_entries())) == 2
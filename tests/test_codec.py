@@ -0,0 +1,76 @@
+"""
+JSON codec tests
+"""
+import json
+from decimal import Decimal
+
+import pytest
+
+from app.utils import codec
+from app.utils.codec import CODECS, EncodedResult, JSONCodec, OrjsonCodec
+
+
+RESULT = {"status": "processed", "log": ["[Execute]  ACTION: Restricted public permissions on S3 bucket 'bücket'."]}
+
+
+@pytest.fixture
+def restore_codec():
+    yield
+    codec.select_codec('auto')
+
+
+class TestCodecs:
+    """Test the stdlib and accelerated codecs"""
+
+    @pytest.mark.parametrize("name", sorted(CODECS))
+    def test_round_trip(self, name):
+        """Both codecs write compact JSON the other can read"""
+        if name == 'orjson' and codec.orjson is None:
+            pytest.skip("orjson is not installed")
+        instance = CODECS[name]()
+        data = instance.dumpb({**RESULT, "count": 3})
+        assert data.endswith(b'"],"count":3}')
+        assert json.loads(data) == {**RESULT, "count": 3}
+        assert instance.loads(data.decode('utf-8')) == instance.loads(data) == {**RESULT, "count": 3}
+
+    def test_unencodable_values_become_strings(self):
+        """Values without a JSON type are written as strings, as with default=str"""
+        for instance in (JSONCodec(), codec.current_codec()):
+            assert instance.loads(instance.dumps({"value": Decimal("1.50")})) == {"value": "1.50"}
+        if codec.orjson is not None:
+            # orjson rejects integers beyond 64 bits; the stdlib codec handles them
+            assert json.loads(OrjsonCodec().dumps({"big": 2 ** 70})) == {"big": 2 ** 70}
+
+    def test_malformed_json_raises_value_error(self):
+        """Parse errors are ValueErrors whichever codec is selected"""
+        for instance in (JSONCodec(), codec.current_codec()):
+            with pytest.raises(ValueError):
+                instance.loads('{"status": ')
+
+    def test_select_codec(self, restore_codec):
+        """The codec is selected by name; unknown names are rejected"""
+        assert codec.select_codec('json').name == 'json'
+        assert codec.dumps({"a": 1}) == '{"a":1}'
+        assert codec.select_codec('auto').name == ('orjson' if codec.orjson is not None else 'json')
+        with pytest.raises(ValueError):
+            codec.select_codec('yaml')
+
+
+class TestEncodedResult:
+    """Test serializing a result once for several sinks"""
+
+    def test_serialized_once(self, monkeypatch):
+        """data, text and indexed lines share one serialization"""
+        calls = []
+        original = codec.dumpb
+        monkeypatch.setattr(codec, 'dumpb', lambda value: calls.append(value) or original(value))
+
+        encoded = EncodedResult(RESULT)
+        assert json.loads(encoded.data) == RESULT
+        assert json.loads(encoded.text) == RESULT
+        assert json.loads(encoded.with_index(7)) == {"index": 7, **RESULT}
+        assert len(calls) == 1
+
+    def test_empty_result_with_index(self):
+        """An empty result still gives a valid indexed line"""
+        assert json.loads(EncodedResult({}).with_index(0)) == {"index": 0}
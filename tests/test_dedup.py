@@ -0,0 +1,65 @@
+"""
+Event deduplication tests
+"""
+from app.utils.dedup import BloomFilter, EventDeduplicator
+
+
+class TestBloomFilter:
+    """Test the two-generation Bloom filter"""
+
+    def test_added_items_are_found(self):
+        """Added ids are always reported as present"""
+        bloom = BloomFilter(capacity=1000, error_rate=0.001)
+        for i in range(1000):
+            bloom.add(f"evt-{i}")
+        assert all(f"evt-{i}" in bloom for i in range(1000))
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+        assert false_positives < 50
+
+    def test_generations_bound_memory(self):
+        """Old ids age out after two generations while memory stays fixed"""
+        bloom = BloomFilter(capacity=100, error_rate=0.001)
+        bloom.add("oldest")
+        for i in range(150):
+            bloom.add(f"evt-{i}")
+        assert "oldest" in bloom
+        size = bloom.memory_bytes
+        for i in range(150, 400):
+            bloom.add(f"evt-{i}")
+        assert "oldest" not in bloom
+        assert bloom.memory_bytes == size
+
+
+class TestEventDeduplicator:
+    """Test the TTL/LRU cache and filter based deduplicator"""
+
+    def test_duplicate_points_to_original(self):
+        """A resent id is a cache hit carrying the original status"""
+        dedup = EventDeduplicator(filter_capacity=0)
+        assert dedup.check("evt-1") is None
+        assert dedup.check("evt-1")['status'] == 'in_progress'
+        dedup.record("evt-1", {"status": "processed"})
+
+        original = dedup.check("evt-1")
+        assert original['status'] == 'processed' and original['source'] == 'cache'
+        stats = dedup.stats()
+        assert stats['misses'] == 1 and stats['cache_hits'] == 2
+
+    def test_errors_release_the_id(self):
+        """An event that failed with an error can be resent"""
+        dedup = EventDeduplicator()
+        dedup.check("evt-1")
+        dedup.record("evt-1", {"status": "error"})
+        assert dedup.check("evt-1") is None
+
+    def test_filter_covers_evicted_and_expired_ids(self):
+        """Ids gone from the cache are still recognized by the filter"""
+        dedup = EventDeduplicator(ttl_seconds=0, cache_size=2, filter_capacity=1000)
+        for i in range(3):
+            dedup.check(f"evt-{i}")
+            dedup.record(f"evt-{i}", {"status": "processed"})
+
+        assert dedup.check("evt-0") == {"event_id": "evt-0", "status": "unknown", "source": "filter"}
+        stats = dedup.stats()
+        assert stats['filter_hits'] == 1 and stats['evictions'] >= 1
+        assert stats['memory_bytes'] >= stats['filter_bytes'] > 0
@@ -0,0 +1,243 @@
+"""
+Async job tests
+"""
+import os
+import threading
+
+import pytest
+
+from app.utils.event_queue import DurableEventQueue
+from app.utils.jobs import JobManager, JobQueueFull
+from app.utils.scheduler import PriorityScheduler
+
+
+class TestJobManager:
+    """Test the async event job worker pool"""
+
+    def test_jobs_run_and_report_results(self):
+        """Submitted events are processed by the workers and their results kept"""
+        manager = JobManager(lambda event: {"status": "processed", "log": [event['event_id']]}, workers=2)
+        manager.start()
+        jobs = [manager.submit({"event_id": f"job-{i}"}) for i in range(10)]
+        assert all(job['status'] == 'queued' for job in jobs)
+        manager.wait()
+
+        job = manager.get(jobs[3]['job_id'])
+        assert job['status'] == 'completed'
+        assert job['result'] == {"status": "processed", "log": ["job-3"]}
+        assert job['run_ms'] is not None and job['queue_ms'] is not None
+
+        stats = manager.stats()
+        assert stats['submitted'] == stats['completed'] == 10
+        assert stats['queue_depth'] == 0 and stats['in_flight'] == 0
+        assert stats['run_latency_ms']['max'] >= stats['run_latency_ms']['p50']
+        manager.close()
+
+    def test_handler_errors_fail_the_job(self):
+        """An exception in the handler marks only that job as failed"""
+        def handler(event):
+            if event['event_id'] == 'bad':
+                raise RuntimeError("boom")
+            return {"status": "processed", "log": []}
+
+        manager = JobManager(handler, workers=1)
+        manager.start()
+        bad = manager.submit({"event_id": "bad"})
+        good = manager.submit({"event_id": "good"})
+        manager.wait()
+
+        assert manager.get(bad['job_id'])['status'] == 'failed'
+        assert 'boom' in manager.get(bad['job_id'])['result']['log'][0]
+        assert manager.get(good['job_id'])['status'] == 'completed'
+        manager.close()
+
+    def test_full_queue_rejects_and_in_flight_is_tracked(self):
+        """A full queue rejects new jobs while running jobs count as in flight"""
+        release = threading.Event()
+        started = threading.Event()
+
+        def handler(event):
+            started.set()
+            release.wait(5)
+            return {"status": "processed", "log": []}
+
+        manager = JobManager(handler, workers=1, queue_size=1)
+        manager.start()
+        manager.submit({"event_id": "running"})
+        started.wait(5)
+        manager.submit({"event_id": "queued"})
+        with pytest.raises(JobQueueFull):
+            manager.submit({"event_id": "rejected"})
+
+        stats = manager.stats()
+        assert stats['in_flight'] == 1 and stats['queue_depth'] == 1 and stats['rejected'] == 1
+        release.set()
+        manager.close()
+
+    def test_finished_jobs_are_evicted(self):
+        """Only the most recent finished jobs are retained"""
+        manager = JobManager(lambda event: {"status": "processed", "log": []}, workers=1, retain=3)
+        manager.start()
+        jobs = [manager.submit({"event_id": f"job-{i}"}) for i in range(5)]
+        manager.wait()
+
+        assert manager.get(jobs[0]['job_id']) is None
+        assert manager.get(jobs[4]['job_id'])['status'] == 'completed'
+        manager.close()
+
+
+class TestPriorityScheduler:
+    """Test severity ordering with aging"""
+
+    def test_most_severe_first_fifo_within_level(self):
+        """Critical items jump the backlog; equal severities keep arrival order"""
+        scheduler = PriorityScheduler(aging_seconds=0)
+        for item, severity in [("low-1", "low"), ("med-1", None), ("crit-1", "critical"),
+                               ("low-2", "low"), ("high-1", "high"), ("crit-2", "critical")]:
+            scheduler.put_nowait(item, severity)
+        assert scheduler.depths() == {"critical": 2, "high": 1, "medium": 1, "low": 2}
+
+        order = [scheduler.get()[0] for _ in range(6)]
+        assert order == ["crit-1", "crit-2", "high-1", "med-1", "low-1", "low-2"]
+
+    def test_aging_prevents_starvation(self, monkeypatch):
+        """A low item that waited long enough is served before a fresh critical one"""
+        from app.utils import scheduler as scheduler_module
+        now = [1000.0]
+        monkeypatch.setattr(scheduler_module.time, 'monotonic', lambda: now[0])
+        scheduler = PriorityScheduler(aging_seconds=10)
+        scheduler.put_nowait("old-low", "low")
+        now[0] += 35
+        scheduler.put_nowait("new-critical", "critical")
+        assert scheduler.get() == ("old-low", "low")
+
+    def test_capacity_and_close(self):
+        """A full scheduler raises queue.Full; a closed one drains, then returns None"""
+        import queue
+        scheduler = PriorityScheduler(maxsize=1)
+        scheduler.put_nowait("only", "high")
+        with pytest.raises(queue.Full):
+            scheduler.put_nowait("overflow", "critical")
+        scheduler.close()
+        assert scheduler.get() == ("only", "high")
+        assert scheduler.get() is None
+
+    def test_job_manager_reports_latency_per_priority(self):
+        """Jobs carry their priority and latencies are summarized per severity"""
+        release = threading.Event()
+        started = threading.Event()
+        order = []
+
+        def handler(event):
+            started.set()
+            release.wait(5)
+            order.append(event['event_id'])
+            return {"status": "processed", "log": []}
+
+        manager = JobManager(handler, workers=1)
+        manager.start()
+        manager.submit({"event_id": "blocker", "severity": "low"})
+        started.wait(5)
+        for i in range(3):
+            manager.submit({"event_id": f"low-{i}", "severity": "low"})
+        job = manager.submit({"event_id": "crit", "severity": "critical"})
+        assert job['priority'] == 'critical'
+        release.set()
+        manager.wait()
+
+        assert order[:2] == ["blocker", "crit"]
+        stats = manager.stats()
+        assert stats['priorities']['critical']['completed'] == 1
+        assert stats['priorities']['low']['completed'] == 4
+        assert stats['priorities']['low']['latency_ms']['max'] >= stats['priorities']['critical']['latency_ms']['max']
+        manager.close()
+
+
+class TestDurableEventQueue:
+    """Test the durable on-disk event queue"""
+
+    def test_pending_events_survive_reopen(self, tmp_path):
+        """Events not completed before close are handed back after reopening"""
+        path = str(tmp_path / "queue.db")
+        event_queue = DurableEventQueue(path)
+        first = event_queue.enqueue({"event_id": "q-1"})
+        second, third = event_queue.enqueue_many([{"event_id": "q-2"}, {"event_id": "q-3"}])
+        event_queue.complete([second])
+        event_queue.close()
+
+        reopened = DurableEventQueue(path)
+        assert reopened.pending() == [(first, {"event_id": "q-1"}), (third, {"event_id": "q-3"})]
+        reopened.close()
+
+    def test_concurrent_enqueues_share_commits(self, tmp_path):
+        """Enqueues from many threads are grouped into fewer fsynced commits"""
+        event_queue = DurableEventQueue(str(tmp_path / "queue.db"), commit_delay_ms=5)
+
+        def enqueue(worker):
+            for i in range(25):
+                event_queue.enqueue({"event_id": f"w{worker}-{i}"})
+
+        threads = [threading.Thread(target=enqueue, args=(w,)) for w in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = event_queue.stats()
+        assert stats['enqueued'] == stats['pending'] == 200
+        assert stats['commits'] < 200
+        assert stats['max_commit_size'] > 1
+        event_queue.close()
+
+    def test_events_of_an_exited_process_can_be_claimed(self, tmp_path):
+        """Only the claimed process's events move to the new owner"""
+        event_queue = DurableEventQueue(str(tmp_path / "queue.db"))
+        first, second = event_queue.enqueue_many([{"event_id": "q-1"}, {"event_id": "q-2"}])
+        assert event_queue.claim(os.getpid(), new_owner=4242) == 2
+        third = event_queue.enqueue({"event_id": "q-3"})
+
+        assert event_queue.claim(4242, new_owner=4343) == 2
+        assert event_queue.pending(owner=4343) == [(first, {"event_id": "q-1"}), (second, {"event_id": "q-2"})]
+        assert event_queue.pending(owner=os.getpid()) == [(third, {"event_id": "q-3"})]
+        assert event_queue.claim(4242) == 0
+        event_queue.close()
+
+    def test_completion_waits_for_hook(self, tmp_path):
+        """The pre-completion hook runs before completions are committed"""
+        calls = []
+        event_queue = DurableEventQueue(str(tmp_path / "queue.db"), before_complete=calls.append)
+        queue_id = event_queue.enqueue({"event_id": "q-1"})
+        assert calls == []
+        event_queue.complete([queue_id])
+        event_queue.close()
+        assert calls == [None]
+
+    def test_failed_hook_keeps_events_pending(self, tmp_path):
+        """Events whose pre-completion hook failed are handed back after reopening"""
+        path = str(tmp_path / "queue.db")
+        results = iter([False, True])
+        event_queue = DurableEventQueue(path, commit_delay_ms=0, before_complete=lambda mark: next(results))
+        first, second = event_queue.enqueue_many([{"event_id": "q-1"}, {"event_id": "q-2"}])
+        event_queue.complete([first])
+        event_queue.close()
+
+        reopened = DurableEventQueue(path, before_complete=lambda mark: next(results))
+        assert reopened.pending() == [(first, {"event_id": "q-1"}), (second, {"event_id": "q-2"})]
+        reopened.complete([second])
+        reopened.close()
+
+        final = DurableEventQueue(path)
+        assert final.pending() == [(first, {"event_id": "q-1"})]
+        final.close()
+
+    def test_completion_passes_watermark(self, tmp_path):
+        """The hook gets the highest watermark taken when the events were completed"""
+        calls = []
+        marks = iter([3, 7])
+        event_queue = DurableEventQueue(str(tmp_path / "queue.db"), commit_delay_ms=50,
+                                        before_complete=calls.append, watermark=lambda: next(marks))
+        first, second = event_queue.enqueue_many([{"event_id": "q-1"}, {"event_id": "q-2"}])
+        event_queue.complete([first])
+        event_queue.complete([second])
+        event_queue.close()
+        assert calls == [7]
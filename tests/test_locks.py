@@ -0,0 +1,152 @@
+"""
+Keyed lock tests
+"""
+import asyncio
+import multiprocessing
+import threading
+import time
+
+import pytest
+
+from app.agent import ReaperAgent
+from app.modules import S3VisibilityReaper
+from app.utils.locks import KeyedLockManager
+
+
+def hold_in_child(lock_file, log_file, worker):
+    """Hold one key a few times from another process, logging when each hold starts and ends"""
+    locks = KeyedLockManager(stripes=16, lock_file=lock_file)
+    for _ in range(3):
+        with locks.hold("s3:shared-bucket"):
+            with open(log_file, 'a') as f:
+                f.write(f"start {worker} {time.monotonic()}\n")
+            time.sleep(0.02)
+            with open(log_file, 'a') as f:
+                f.write(f"end {worker} {time.monotonic()}\n")
+
+
+class TestKeyedLockManager:
+    """Test striped per-key locks and their wait instrumentation"""
+
+    def test_same_key_is_serialized(self):
+        """Holders of one key never overlap and the waits are recorded for that key"""
+        locks = KeyedLockManager(stripes=16)
+        active = []
+        overlaps = []
+
+        def work():
+            with locks.hold("s3:hot-bucket"):
+                active.append(1)
+                overlaps.append(len(active))
+                time.sleep(0.02)
+                active.pop()
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert max(overlaps) == 1
+        stats = locks.stats()
+        assert stats['acquisitions'] == 4 and stats['contended'] >= 1
+        assert stats['hot_keys'][0]['key'] == "s3:hot-bucket"
+        assert stats['hot_keys'][0]['wait_ms'] > 0
+
+    def test_different_keys_run_in_parallel(self):
+        """A held key does not block other keys on other stripes"""
+        locks = KeyedLockManager(stripes=1024)
+        keys = [f"s3:bucket-{i}" for i in range(100)]
+        other = next(key for key in keys[1:] if locks._stripe(key) is not locks._stripe(keys[0]))
+        with locks.hold(keys[0]):
+            acquired = threading.Event()
+
+            def work():
+                with locks.hold(other):
+                    acquired.set()
+            thread = threading.Thread(target=work)
+            thread.start()
+            assert acquired.wait(1)
+            thread.join()
+        assert locks.stats()['contended'] == 0
+
+    def test_lock_is_reentrant(self):
+        """A thread may take a key it already holds"""
+        locks = KeyedLockManager(stripes=1)
+        with locks.hold("slack:a@b.com"):
+            with locks.hold("s3:bucket"):
+                pass
+        assert locks.stats()['acquisitions'] == 2
+
+    def test_lock_file_serializes_processes(self, tmp_path):
+        """Worker processes sharing a lock file never hold one key at the same time"""
+        lock_file = str(tmp_path / "targets.lock")
+        log_file = str(tmp_path / "holds.log")
+        context = multiprocessing.get_context('fork')
+        processes = [context.Process(target=hold_in_child, args=(lock_file, log_file, w)) for w in range(3)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(timeout=30)
+            assert process.exitcode == 0
+
+        with open(log_file) as f:
+            events = [line.split() for line in f]
+        assert len(events) == 18
+        # Holds are strictly alternating start/end pairs of the same worker
+        for start, end in zip(events[::2], events[1::2]):
+            assert start[0] == 'start' and end[0] == 'end' and start[1] == end[1]
+
+    def test_cancelled_async_waiter_does_not_keep_the_lock(self):
+        """A task cancelled while waiting gives the stripe back once its helper thread gets it"""
+        locks = KeyedLockManager(stripes=1)
+
+        async def wait_then_cancel():
+            async def hold():
+                async with locks.hold_async("s3:bucket"):
+                    pass
+            task = asyncio.create_task(hold())
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        with locks.hold("s3:bucket"):
+            asyncio.run(wait_then_cancel())
+        time.sleep(0.05)
+        acquired = []
+        thread = threading.Thread(target=lambda: acquired.append(locks._stripe("s3:bucket").acquire("other", blocking=False)))
+        thread.start()
+        thread.join()
+        assert acquired == [True]
+
+
+class TestAgentTargetLocks:
+    """Test dispatch serializes remediations of one target"""
+
+    def test_parallel_events_for_one_bucket_do_not_interleave(self, tmp_path, monkeypatch):
+        """Concurrent events for one bucket run the module one at a time"""
+        config = {"settings": {"audit_format": "jsonl", "audit_file": str(tmp_path / "audit.jsonl")}}
+        agent = ReaperAgent({'open_s3_bucket': S3VisibilityReaper}, config)
+        active = []
+        overlaps = []
+        original = S3VisibilityReaper.execute
+
+        def execute(self):
+            active.append(1)
+            overlaps.append(len(active))
+            time.sleep(0.01)
+            active.pop()
+            return original(self)
+        monkeypatch.setattr(S3VisibilityReaper, 'execute', execute)
+
+        events = [{"type": "open_s3_bucket", "event_id": f"lock-{i}", "bucket_name": "locked-bucket",
+                   "region": "us-east-1"} for i in range(5)]
+        threads = [threading.Thread(target=agent.process_event, args=(event,)) for event in events]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert overlaps == [1] * 5
+        assert agent.target_locks.stats()['acquisitions'] == 5
@@ -0,0 +1,102 @@
+"""
+Offline replay tests
+"""
+import io
+import json
+
+import pytest
+import yaml
+
+from app.__main__ import cli
+from app.replay import EventReplayer, format_report
+
+
+def make_event(index):
+    if index % 2:
+        return {"type": "unauthorized_saas_access", "event_id": f"replay-{index}",
+                "user": f"user{index}@company.com", "source": "slack", "timestamp": "2024-01-01T12:00:00Z"}
+    return {"type": "open_s3_bucket", "event_id": f"replay-{index}",
+            "bucket_name": f"bucket-{index}", "region": "us-east-1", "timestamp": "2024-01-01T12:00:00Z"}
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    path = tmp_path / "config.yaml"
+    path.write_text(yaml.safe_dump({
+        "settings": {
+            "dry_run_mode": False,
+            "audit_format": "jsonl",
+            "audit_file": str(tmp_path / "audit.jsonl"),
+            "dedup_enabled": True
+        },
+        "modules": {
+            "unauthorized_saas_access": {"class": "SaaSAccessReaper"},
+            "open_s3_bucket": {"class": "S3VisibilityReaper"}
+        }
+    }))
+    return str(path)
+
+
+class TestEventReplayer:
+    """Test replaying NDJSON events in-process"""
+
+    def test_replay_reports_and_audits_every_event(self, tmp_path, config_path):
+        """Results come back in input order and every processed event is audited"""
+        lines = [json.dumps(make_event(i)).encode() + b"\n" for i in range(40)]
+        lines.insert(5, b"{not json\n")
+        lines.append(json.dumps(make_event(0)).encode() + b"\n")
+        output = io.BytesIO()
+
+        report = EventReplayer(config_path, workers=8, dry_run=True, output=output).run(lines)
+        assert report['events'] == 42 and report['workers'] == 8 and report['dry_run'] is True
+        assert report['statuses'] == {"processed": 40, "validation_error": 1, "duplicate": 1}
+        assert report['events_per_second'] > 0
+        assert 0 < report['latency_ms']['p50'] <= report['latency_ms']['p99'] <= report['latency_ms']['max']
+
+        results = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert [result['index'] for result in results] == list(range(42))
+        assert results[5]['status'] == 'validation_error'
+        assert "Mode: DRY RUN" in results[0]['log'][0]
+
+        with open(tmp_path / "audit.jsonl") as f:
+            assert len(f.readlines()) == 40
+
+    def test_format_report(self):
+        """The terminal report shows throughput, latency percentiles and status counts"""
+        report = EventReplayer._summarize([1.0, 2.0, 3.0])
+        text = format_report({"events": 3, "workers": 1, "dry_run": False, "elapsed_seconds": 0.1,
+                              "events_per_second": 30.0, "statuses": {"processed": 3}, "latency_ms": report})
+        assert "3 events in 0.1s with 1 workers (LIVE)" in text
+        assert "p50 2.0" in text and "processed: 3" in text
+
+    @staticmethod
+    def write_events(tmp_path, count):
+        events_file = tmp_path / "events.ndjson"
+        events_file.write_text("".join(json.dumps(make_event(i)) + "\n" for i in range(count)))
+        return events_file
+
+    def test_cli(self, tmp_path, config_path, capsys):
+        """python -m app replay reads the file and prints the report as JSON"""
+        events_file = self.write_events(tmp_path, 6)
+        rehearsal_audit = tmp_path / "rehearsal.jsonl"
+
+        assert cli(["replay", str(events_file), "--config", config_path, "-j", "2",
+                    "--audit-file", str(rehearsal_audit), "--json"]) == 0
+        report = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+        assert report['events'] == 6 and report['statuses'] == {"processed": 6}
+        assert report['dry_run'] is False
+        assert len(rehearsal_audit.read_text().splitlines()) == 6
+        assert not (tmp_path / "audit.jsonl").exists()
+
+    def test_cli_report_accepts_utc_suffix(self, tmp_path, config_path):
+        """python -m app report takes --since/--until with a trailing 'Z'"""
+        assert cli(["replay", str(self.write_events(tmp_path, 2)), "--config", config_path]) == 0
+        report_file = tmp_path / "report.md"
+        assert cli(["report", "--config", config_path, "--since", "2000-01-01T00:00:00Z",
+                    "--until", "2999-01-01T00:00:00z", "-o", str(report_file)]) == 0
+        assert report_file.read_text().count("## Action Report") == 2
+
+    def test_cli_missing_file(self, tmp_path, capsys):
+        """A missing event file is a fatal error"""
+        assert cli(["replay", str(tmp_path / "missing.ndjson")]) == 1
+        assert "FATAL" in capsys.readouterr().err
@@ -3,8 +3,10 @@ Test exception handling and schema validation
 """
 import json
 import pytest
+from jsonschema import Draft7Validator
 
 from app.utils.schema import APISchemaValidator
+from app.utils.schema_compiler import compile_schema
 
 
 class TestSchemaValidation:
@@ -95,6 +97,78 @@ class TestSchemaValidation:
         assert "/dashboard" not in spec["paths"]  # Should be added if needed
 
 
+class TestCompiledValidators:
+    """Test the validation functions compiled from the schemas"""
+    
+    VALID_S3 = {
+        "type": "open_s3_bucket",
+        "event_id": "test-100",
+        "bucket_name": "my-bucket",
+        "region": "us-east-1",
+        "timestamp": "2024-01-01T12:00:00Z"
+    }
+    
+    @pytest.mark.parametrize("changes", [
+        {"event_id": "has spaces"},
+        {"bucket_name": "ab"},
+        {"bucket_name": "b" * 64},
+        {"region": 5},
+        {"severity": "urgent"},
+        {"bucket_name": "INVALID", "region": "US"},
+        {"bucket_name": None},
+    ])
+    def test_messages_match_jsonschema(self, changes):
+        """The first error is reported with jsonschema's wording"""
+        event = {**self.VALID_S3, **changes}
+        expected = next(Draft7Validator(APISchemaValidator.S3_BUCKET_SCHEMA).iter_errors(event)).message
+        is_valid, message = APISchemaValidator.validate_event(event)
+        assert not is_valid
+        assert message == f"Schema validation failed: {expected}"
+    
+    def test_missing_fields_and_wrong_types(self):
+        """Required properties and non-object events are reported like jsonschema"""
+        event = {key: value for key, value in self.VALID_S3.items() if key != 'region'}
+        assert APISchemaValidator.validate_event(event) == (False, "Schema validation failed: 'region' is a required property")
+        assert APISchemaValidator.validate_event({"type": "open_s3_bucket"})[1] == \
+            "Schema validation failed: 'event_id' is a required property"
+        assert APISchemaValidator.validate_event(["not", "an", "object"])[1] == \
+            "Schema validation failed: ['not', 'an', 'object'] is not of type 'object'"
+    
+    def test_formats_are_ignored_by_default(self):
+        """Like a Draft7Validator without a format checker, formats are only annotations"""
+        event = {"type": "unauthorized_saas_access", "event_id": "test-101", "user": "invalid-email",
+                 "source": "slack", "timestamp": "2024-01-01T12:00:00Z"}
+        assert APISchemaValidator.validate_event(event)[0]
+        for timestamp in ("2024-01-01T12:00:00", "2024-01-01 12:00:00", "2024-01-01T12:00:00.123456", "yesterday"):
+            assert APISchemaValidator.validate_event({**self.VALID_S3, "timestamp": timestamp})[0]
+        validate = compile_schema({"type": "object", "properties": {"at": {"format": "date-time", "minimum": 1}}})
+        assert validate({"at": "yesterday"}) is None
+    
+    def test_formats_when_enabled(self):
+        """With check_formats, email and date-time formats are checked"""
+        saas = compile_schema(APISchemaValidator.SAAS_ACCESS_SCHEMA, check_formats=True)
+        assert saas({"type": "unauthorized_saas_access", "event_id": "test-102", "user": "invalid-email"}) == \
+            "'invalid-email' is not a 'email'"
+        
+        s3 = compile_schema(APISchemaValidator.S3_BUCKET_SCHEMA, check_formats=True)
+        for timestamp in ("2024-01-01T12:00:00.123+02:00", "2024-01-01t12:00:00z", "2024-02-29T12:00:00Z"):
+            assert s3({**self.VALID_S3, "timestamp": timestamp}) is None
+        for timestamp in ("2024-01-01", "2024-13-01T12:00:00Z", "2024-02-30T12:00:00Z", "2023-02-29T12:00:00Z",
+                          "2024-01-01T12:00:00", "yesterday"):
+            assert s3({**self.VALID_S3, "timestamp": timestamp}) == f"{timestamp!r} is not a 'date-time'"
+    
+    def test_min_length_message_matches_pinned_jsonschema(self):
+        """An empty string is "too short", as jsonschema 4.19 words it"""
+        event = {"type": "unauthorized_saas_access", "event_id": "", "user": "a@b.com"}
+        assert APISchemaValidator.validate_event(event) == (False, "Schema validation failed: '' is too short")
+    
+    def test_unsupported_keywords_fall_back_to_jsonschema(self):
+        """Schemas with keywords the compiler does not handle are validated by jsonschema"""
+        validate = compile_schema({"type": "object", "properties": {"count": {"type": "integer", "minimum": 1}}})
+        assert validate({"count": 2}) is None
+        assert validate({"count": 0}) == "0 is less than the minimum of 1"
+
+
 class TestExceptionHandling:
     """Test exception handling in API endpoints"""
     
@@ -191,6 +265,22 @@ class TestDashboard:
         assert b'<!DOCTYPE html>' in response.data
         assert b'Reaper Agent Dashboard' in response.data
     
+    def test_dashboard_shows_markdown_entries(self, tmp_path):
+        """Markdown audit trails list their recent events instead of a file pointer"""
+        from types import SimpleNamespace
+        from app.utils.audit import AuditTrailManager
+        from app.utils.dashboard import DashboardGenerator
+        
+        config = {'settings': {'audit_format': 'markdown', 'audit_file': str(tmp_path / 'audit.md')}}
+        manager = AuditTrailManager(config)
+        event = {"type": "open_s3_bucket", "event_id": "md-001", "severity": "high"}
+        manager.log_action(event, {"status": "processed", "log": []})
+        
+        agent = SimpleNamespace(dry_run_mode=False, modules_map={})
+        data = DashboardGenerator.generate_dashboard_data(agent, manager)
+        assert data['recent_events'][0]['event_id'] == 'md-001'
+        assert data['recent_events'][0]['severity'] == 'high'
+    
     def test_openapi_endpoint(self, client):
         """Test OpenAPI specification endpoint"""
         response = client.get('/openapi.json')
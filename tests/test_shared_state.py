@@ -0,0 +1,93 @@
+"""
+Shared agent state tests
+"""
+import multiprocessing
+
+from app.agent import ReaperAgent
+from app.modules import S3VisibilityReaper
+from app.utils.shared_state import LocalState, SharedState
+
+
+def toggle_in_child(path, queue):
+    state = SharedState(path)
+    queue.put(state.toggle('dry_run_mode'))
+    state.close()
+
+
+class TestSharedState:
+    """Test the memory-mapped state shared by worker processes"""
+
+    def test_updates_are_visible_to_other_mappings(self, tmp_path):
+        """A value set through one mapping is read through another at once"""
+        path = str(tmp_path / "state.bin")
+        first = SharedState(path, initial={"dry_run_mode": False, "workers": [1, 2]})
+        second = SharedState(path)
+        assert second.snapshot() == {"dry_run_mode": False, "workers": [1, 2]}
+
+        first.update(dry_run_mode=True)
+        assert second.get('dry_run_mode') is True
+        assert second.toggle('dry_run_mode') is False
+        assert first.get('dry_run_mode') is False
+        first.close()
+        second.close()
+
+    def test_toggle_from_another_process(self, tmp_path):
+        """A toggle in a worker process is seen by its siblings"""
+        path = str(tmp_path / "state.bin")
+        state = SharedState(path, initial={"dry_run_mode": False})
+        context = multiprocessing.get_context('fork')
+        queue = context.Queue()
+        processes = [context.Process(target=toggle_in_child, args=(path, queue)) for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        assert sorted(queue.get() for _ in processes) == [False, False, True, True]
+        assert state.get('dry_run_mode') is False
+        state.close()
+
+    def test_state_directory_is_created(self, tmp_path):
+        """A state file in a directory that does not exist yet, as logs/ outside the container"""
+        state = SharedState(str(tmp_path / "logs" / "state.bin"), initial={"dry_run_mode": True})
+        assert state.toggle('dry_run_mode') is False
+        state.close()
+
+    def test_local_state(self):
+        """A single process keeps its state in memory"""
+        state = LocalState({"dry_run_mode": True})
+        assert state.toggle('dry_run_mode') is False
+        state.update(workers=[1])
+        assert state.snapshot() == {"dry_run_mode": False, "workers": [1]}
+
+
+class TestAgentSharedState:
+    """Test dry run mode is shared by agents of several workers"""
+
+    def test_toggle_applies_to_every_agent(self, tmp_path):
+        """Toggling on one agent switches the mode of agents sharing the state"""
+        path = str(tmp_path / "state.bin")
+        config = {"settings": {"audit_format": "jsonl", "audit_file": str(tmp_path / "audit.jsonl")}}
+        first = ReaperAgent({'open_s3_bucket': S3VisibilityReaper}, config,
+                            state=SharedState(path, initial={"dry_run_mode": False}))
+        second = ReaperAgent({'open_s3_bucket': S3VisibilityReaper}, config, state=SharedState(path))
+
+        assert first.toggle_dry_run_mode() is True
+        result = second.process_event({"type": "open_s3_bucket", "event_id": "shared-1",
+                                       "bucket_name": "shared-bucket", "region": "us-east-1"})
+        assert "DRY RUN" in result['log'][2]
+        assert second.audit_manager.get_recent_entries(1)[0]['mode'] == 'DRY_RUN'
+
+    def test_agents_share_target_locks_and_audit_view(self, tmp_path):
+        """Agents of several workers lock targets through one file and see each other's entries"""
+        path = str(tmp_path / "state.bin")
+        config = {"settings": {"audit_format": "jsonl", "audit_file": str(tmp_path / "audit.jsonl")}}
+        first = ReaperAgent({'open_s3_bucket': S3VisibilityReaper}, config,
+                            state=SharedState(path, initial={"dry_run_mode": False}))
+        second = ReaperAgent({'open_s3_bucket': S3VisibilityReaper}, config, state=SharedState(path))
+
+        assert first.target_locks.lock_file == f"{path}.targets.lock"
+        assert second.target_locks.stats()['shared_by_workers'] is True
+        first.process_event({"type": "open_s3_bucket", "event_id": "shared-2",
+                             "bucket_name": "shared-bucket", "region": "us-east-1"})
+        assert second.audit_manager.get_recent_entries(1)[0]['event_data']['event_id'] == "shared-2"
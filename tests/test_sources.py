@@ -0,0 +1,152 @@
+"""
+Event source tests
+"""
+import io
+import json
+import os
+import random
+import socket
+import struct
+import tempfile
+import time
+
+import pytest
+
+from app.sources.unix_socket import FrameTooLarge, LengthPrefixedFraming, NDJSONFraming, UnixSocketSource
+from tests.helpers import make_s3_event
+
+
+@pytest.fixture
+def socket_path():
+    # Unix socket paths are limited to about 100 bytes, so keep the directory short
+    directory = tempfile.mkdtemp(prefix="reaper-")
+    yield os.path.join(directory, "events.sock")
+    if os.path.exists(os.path.join(directory, "events.sock")):
+        os.unlink(os.path.join(directory, "events.sock"))
+    os.rmdir(directory)
+
+
+def connect(path):
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(path)
+    return client, client.makefile('rb')
+
+
+class TestFraming:
+    """Test newline-delimited and length-prefixed frames"""
+
+    def test_ndjson(self):
+        """Lines are frames; blank lines are skipped and long lines rejected"""
+        framing = NDJSONFraming(max_bytes=64)
+        stream = io.BytesIO(b'{"a":1}\n\n{"b":2}\n')
+        assert framing.read(stream) == b'{"a":1}\n'
+        assert framing.read(stream) == b'{"b":2}\n'
+        assert framing.read(stream) is None
+        with pytest.raises(FrameTooLarge):
+            framing.read(io.BytesIO(b'x' * 100 + b'\n'))
+
+    def test_length_prefixed(self):
+        """Frames are read by their length header; a truncated frame ends the stream"""
+        framing = LengthPrefixedFraming(max_bytes=64)
+        stream = io.BytesIO(framing.encode(b'{"a":1}') + framing.encode(b'{"b":2}') + b'\x00\x00')
+        assert framing.read(stream) == b'{"a":1}'
+        assert framing.read(stream) == b'{"b":2}'
+        assert framing.read(stream) is None
+        with pytest.raises(FrameTooLarge):
+            framing.read(io.BytesIO(struct.pack('>I', 65)))
+
+
+class TestUnixSocketSource:
+    """Test the Unix domain socket source with a stand-in handler"""
+
+    def test_pipelined_responses_keep_request_order(self, socket_path):
+        """Events processed concurrently are answered in the order they were sent"""
+        def handler(event_data):
+            time.sleep(random.uniform(0, 0.02))
+            return {"status": "processed", "event_id": event_data['event_id']}, 200, {}
+
+        source = UnixSocketSource(socket_path, handler, workers=8, pipeline_depth=4)
+        source.start()
+        try:
+            client, responses = connect(socket_path)
+            client.sendall(b"".join(json.dumps({"event_id": i}).encode() + b"\n" for i in range(50)))
+            client.sendall(b"not json\n")
+            client.shutdown(socket.SHUT_WR)
+            lines = [json.loads(line) for line in responses]
+            client.close()
+        finally:
+            source.stop()
+
+        assert [line['event_id'] for line in lines[:50]] == list(range(50))
+        assert lines[50]['status'] == 'error' and lines[50]['log'][0].startswith("Invalid JSON")
+        stats = source.stats()
+        assert stats['events'] == 50 and stats['errors'] == 1 and stats['connections'] == 1
+        assert not os.path.exists(socket_path)
+
+    def test_length_prefixed_and_oversized_frames(self, socket_path):
+        """Length-prefixed responses; an oversized frame is answered and the connection closed"""
+        source = UnixSocketSource(socket_path, lambda event: ({"status": "processed"}, 200, {}),
+                                  framing='length', max_frame_bytes=128)
+        source.start()
+        try:
+            client, responses = connect(socket_path)
+            client.sendall(LengthPrefixedFraming.encode(b'{"event_id":"a"}') + struct.pack('>I', 1000))
+            framing = LengthPrefixedFraming(max_bytes=1024)
+            assert json.loads(framing.read(responses)) == {"status": "processed"}
+            assert "exceeds 128 bytes" in json.loads(framing.read(responses))['log'][0]
+            assert framing.read(responses) is None
+            client.close()
+        finally:
+            source.stop()
+        assert source.stats()['oversized_frames'] == 1
+
+    def test_stale_socket_file_is_replaced(self, socket_path):
+        """A socket file left by a crashed run is removed; a live one is not taken over"""
+        stale = UnixSocketSource.bind(socket_path)
+        stale.close()
+        live = UnixSocketSource.bind(socket_path)
+        try:
+            with pytest.raises(OSError):
+                UnixSocketSource.bind(socket_path)
+        finally:
+            live.close()
+
+
+class TestSocketEvents:
+    """Test that socket events behave as /event"""
+
+    @pytest.fixture
+    def app(self, socket_path, monkeypatch):
+        from app import main
+        original = main.load_module_map_from_config
+
+        def load_config(config_path='config.yaml'):
+            modules, config = original(config_path)
+            config['settings']['event_socket_path'] = socket_path
+            return modules, config
+        monkeypatch.setattr(main, 'load_module_map_from_config', load_config)
+        app = main.create_app()
+        yield app
+        for source in app.extensions['reaper_sources']:
+            source.stop()
+
+    def test_matches_http(self, app, socket_path):
+        """Validation, processing, dedup and audit are the same as over HTTP"""
+        client = app.test_client()
+        invalid = {"type": "open_s3_bucket", "event_id": "socket-invalid"}
+        event_id = f"socket-{time.time_ns()}"
+
+        sock, responses = connect(socket_path)
+        for event in (invalid, make_s3_event(event_id), make_s3_event(event_id)):
+            sock.sendall(json.dumps(event).encode() + b"\n")
+        results = [json.loads(responses.readline()) for _ in range(3)]
+        sock.close()
+
+        assert results[0] == client.post('/event', json=invalid).get_json()
+        # Pipelined events run concurrently, so either copy may be the one processed
+        assert sorted(result['status'] for result in results[1:]) == ['duplicate', 'processed']
+        assert client.post('/event', json=make_s3_event(event_id)).get_json()['status'] == 'duplicate'
+
+        audit = client.get(f'/audit/export?event_id={event_id}')
+        assert len(audit.get_data(as_text=True).strip().splitlines()) == 1
+        assert client.get('/stats').get_json()['sources'][0]['events'] == 3